@@ -0,0 +1,98 @@
+"""
+bench_db.py
+Compares contact import and status-update throughput of the old
+connect-per-call SQLite helpers against ContactStore.
+
+Usage: python bench_db.py [number_of_contacts]
+"""
+
+import os
+import sys
+import sqlite3
+import datetime
+import tempfile
+import time
+
+from contacts_db import ContactStore
+
+
+# ---------------- Old helpers (one connection + commit per call) ----------------
+def legacy_init_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone TEXT UNIQUE,
+            name TEXT,
+            status TEXT,
+            timestamp TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+def legacy_add_contact(path, phone, name):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT OR IGNORE INTO contacts (phone, name, status) VALUES (?, ?, ?)",
+                 (phone, name, "Pending"))
+    conn.commit()
+    conn.close()
+
+def legacy_is_sent(path, phone):
+    conn = sqlite3.connect(path)
+    result = conn.execute("SELECT status FROM contacts WHERE phone=?", (phone,)).fetchone()
+    conn.close()
+    return bool(result and result[0] == "Sent")
+
+def legacy_update_status(path, phone, status):
+    conn = sqlite3.connect(path)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute("UPDATE contacts SET status=?, timestamp=? WHERE phone=?", (status, timestamp, phone))
+    conn.commit()
+    conn.close()
+
+
+# ---------------- Runs ----------------
+def run_legacy(path, contacts):
+    legacy_init_db(path)
+    t0 = time.perf_counter()
+    for phone, name in contacts:
+        legacy_add_contact(path, phone, name)
+    t1 = time.perf_counter()
+    for phone, _ in contacts:
+        if not legacy_is_sent(path, phone):
+            legacy_update_status(path, phone, "Sent")
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t1
+
+def run_store(path, contacts):
+    store = ContactStore(path)
+    t0 = time.perf_counter()
+    store.add_contacts(contacts)
+    t1 = time.perf_counter()
+    already_sent = store.contacted_since()
+    for phone, _ in contacts:
+        if phone not in already_sent:
+            store.update_status(phone, "Sent")
+    store.flush()
+    t2 = time.perf_counter()
+    store.close()
+    return t1 - t0, t2 - t1
+
+def report(label, n, import_s, update_s):
+    print(f"{label:<14} import: {n / import_s:>10.0f} rows/s ({import_s:.2f}s)   "
+          f"status: {n / update_s:>10.0f} rows/s ({update_s:.2f}s)")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    contacts = [(f"92300{i:07d}", f"Contact {i}") for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = run_legacy(os.path.join(tmp, "legacy.db"), contacts)
+        store = run_store(os.path.join(tmp, "store.db"), contacts)
+    print(f"{n} contacts")
+    report("connect/call", n, *legacy)
+    report("ContactStore", n, *store)
+    print(f"speed-up       import: x{legacy[0] / store[0]:.1f}   status: x{legacy[1] / store[1]:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_ingest.py
+Checks that ingest.clean_numbers() matches clean_phone + normalize_number on
+randomly generated corpora for several default countries, then times both on a
+large column of mixed-country numbers (some malformed).
+
+Usage: python bench_ingest.py [rows] [seed]      e.g. python bench_ingest.py 3000000
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import clean_phone, normalize_number, clean_numbers
+
+PIECES = ["0", "3", "03", "92", "+92", "0092", " ", "-", "(", ")", ".", "x", "ext",
+          "٣", "۴", "²", "５", "\t", "0300", "345", "1234567", "+44", "07", "+1", "00971", ".0"]
+COUNTRIES = ["PK", "GB", "US", "AE", "DE"]
+
+
+def random_value(rng):
+    kind = rng.random()
+    if kind < 0.05:
+        return None
+    if kind < 0.10:
+        return np.nan
+    if kind < 0.25:
+        return rng.randint(0, 10 ** rng.randint(1, 13))
+    if kind < 0.30:
+        return float(rng.randint(0, 10 ** 12))
+    if kind < 0.60:
+        # realistic number shapes
+        body = "".join(rng.choice("0123456789") for _ in range(rng.randint(9, 13)))
+        return rng.choice(["", "+", "0", "92", "+92 ", "03", "+44 7", "00971", "1", "01"]) + body
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 8)))
+
+def build_corpus(n, seed):
+    """Adversarial mix of types, separators and non-ASCII digits."""
+    rng = random.Random(seed)
+    return pd.Series([random_value(rng) for _ in range(n)], dtype=object)
+
+def build_sheet_column(n, seed):
+    """Numbers shaped like a real export: mostly formatted Pakistani strings, some ints, other
+    countries' numbers, a few blanks and a few malformed values."""
+    rng = random.Random(seed)
+    formats = ["03{}-{}", "+92 3{} {}", "923{}{}", "3{}{}", "0092-3{}-{}",
+               "+44 7{} {}", "+1 (2{}) {}", "00971 5{} {}", "3{}-{}99", "{}-{}"]
+    values = []
+    for _ in range(n):
+        if rng.random() < 0.02:
+            values.append(None)
+            continue
+        a, b = f"{rng.randint(0, 99):02d}", f"{rng.randint(0, 9999999):07d}"
+        values.append(int("923" + a + b) if rng.random() < 0.2 else rng.choice(formats).format(a, b))
+    return pd.Series(values, dtype=object)
+
+def check(corpus, country):
+    expected = corpus.apply(clean_phone).apply(normalize_number, country=country)
+    actual = clean_numbers(corpus, country)
+    mismatches = [(v, e, a) for v, e, a in zip(corpus, expected, actual) if e != a]
+    for v, e, a in mismatches[:10]:
+        print(f"  MISMATCH {v!r}: expected {e!r}, got {a!r}")
+    return not mismatches
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1234
+
+    for s in range(seed, seed + 20):
+        country = COUNTRIES[s % len(COUNTRIES)]
+        if not check(build_corpus(5_000, s), country):
+            print(f"[ERROR] Vectorized output differs from reference (seed {s}, country {country})")
+            sys.exit(1)
+    print(f"Equivalence: OK (20 random corpora x 5000 values, default country {'/'.join(COUNTRIES)})")
+
+    corpus = build_sheet_column(n, seed)
+    t0 = time.perf_counter()
+    corpus.apply(clean_phone).apply(normalize_number)
+    t1 = time.perf_counter()
+    cleaned = clean_numbers(corpus)
+    t2 = time.perf_counter()
+    rejected = int((cleaned == "").sum() - corpus.isna().sum())
+    print(f"{n} values   apply: {t1 - t0:.2f}s   vectorized: {t2 - t1:.2f}s ({n / (t2 - t1) / 1e6:.1f}M/s)   "
+          f"x{(t1 - t0) / (t2 - t1):.1f}   {rejected} malformed rejected")
+
+if __name__ == "__main__":
+    main()
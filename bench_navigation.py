@@ -0,0 +1,63 @@
+"""
+bench_navigation.py
+Per-stage latency of opening chats by full page load ("url") versus in-app
+navigation ("in_app"), measured against the local fake WhatsApp Web page.
+
+Usage: python bench_navigation.py [messages_per_mode] [boot_seconds]
+Needs Chrome; no real messages are sent.
+"""
+
+import statistics
+import sys
+import tempfile
+import urllib.parse
+
+import whatsapp_web
+from fake_whatsapp import start_server
+from metrics import percentile
+
+
+def run_mode(driver, mode, count):
+    stages = {"navigate": [], "send": [], "confirm": [], "total": []}
+    modes = []
+    for i in range(count):
+        timings = {}
+        phone = f"92300{i:07d}"
+        ok = whatsapp_web.send_message_to_number(driver, phone, urllib.parse.quote(f"bench {i}"),
+                                                 lambda msg: None, mode=mode, timings=timings)
+        if not ok:
+            continue
+        modes.append(timings.get("mode"))
+        for stage in ("navigate", "send", "confirm"):
+            stages[stage].append(timings.get(stage, 0.0))
+        stages["total"].append(sum(timings.get(s, 0.0) for s in ("navigate", "send", "confirm")))
+    return stages, modes
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    boot = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    server, state, url = start_server(latency=0.05, send_delay=0.05, boot=boot)
+    whatsapp_web.WHATSAPP_URL = url
+
+    with tempfile.TemporaryDirectory() as profile:
+        driver = whatsapp_web.init_driver(headless=True, profile_dir=profile)
+        if not driver:
+            sys.exit(1)
+        try:
+            for mode in ("url", "in_app"):
+                driver.get(url)
+                stages, modes = run_mode(driver, mode, count)
+                fallbacks = sum(1 for m in modes if m != mode)
+                print(f"{mode:<7} ({len(modes)} sent, {fallbacks} fell back to url)")
+                for stage, values in stages.items():
+                    if values:
+                        print(f"  {stage:<9} mean {statistics.mean(values) * 1000:7.0f} ms   "
+                              f"p50 {percentile(values, 50) * 1000:7.0f} ms   "
+                              f"p95 {percentile(values, 95) * 1000:7.0f} ms")
+        finally:
+            driver.quit()
+            server.shutdown()
+    print(f"fake server recorded {len(state.sent)} messages")
+
+if __name__ == "__main__":
+    main()
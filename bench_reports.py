@@ -0,0 +1,118 @@
+"""
+bench_reports.py
+Times the campaign report queries (reports.py) on a database holding millions
+of finished messages, against the same aggregates computed straight from the
+messages table, and what keeping the rollup costs per completed message.
+
+Usage: python bench_reports.py [number_of_messages]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import reports
+from contacts_db import ContactStore, FAILED, QUEUED, SENT, STATS_BUCKET
+
+CAMPAIGNS = 5
+DAYS = 7
+ERRORS = ("timeout", "chat_not_loaded", "invalid_number", "send_button_missing")
+
+
+def fill(store, n):
+    """n messages over CAMPAIGNS campaigns and the last DAYS days; the newest campaign is half queued."""
+    rnd = random.Random(7)
+    now = int(time.time())
+    conn = store.conn
+    ids = [store.create_campaign(f"bench {i}", "bench.xlsx", "Hi {name}") for i in range(CAMPAIGNS)]
+    per_campaign = n // CAMPAIGNS
+    for c, cid in enumerate(ids):
+        start = now - DAYS * 86400 + c * 86400
+        rows = []
+        for i in range(per_campaign):
+            phone = f"92300{c}{i:07d}"
+            if c == CAMPAIGNS - 1 and i >= per_campaign // 2:
+                rows.append((cid, phone, QUEUED, 0, None, None, None))
+                continue
+            ok = rnd.random() > 0.08
+            done = min(now, start + i * 86400 // per_campaign + rnd.randrange(60))
+            if c == CAMPAIGNS - 1:
+                done = now - 3600 + i * 3600 // per_campaign
+            rows.append((cid, phone, SENT if ok else FAILED, 1 if ok else rnd.randint(1, 3),
+                         None if ok else rnd.choice(ERRORS), done, rnd.randint(800, 6000)))
+        conn.executemany("INSERT INTO messages (campaign_id, phone, state, attempts, last_error, completed_at, "
+                         "duration_ms) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.execute("UPDATE campaigns SET enqueued=? WHERE id=?", (len(rows), cid))
+    # The rollup complete_message() would have built message by message.
+    conn.execute(
+        "INSERT INTO message_stats (campaign_id, minute, state, error, messages, attempts, total_ms, timed) "
+        "SELECT campaign_id, completed_at / ? * ?, state, COALESCE(last_error, ''), COUNT(*), SUM(attempts), "
+        "SUM(duration_ms), COUNT(duration_ms) FROM messages WHERE completed_at IS NOT NULL GROUP BY 1, 2, 3, 4",
+        (STATS_BUCKET, STATS_BUCKET),
+    )
+    for cid in ids[:-1]:
+        conn.execute("UPDATE campaigns SET finished_at=? WHERE id=?", (now, cid))
+    conn.commit()
+    return ids
+
+def timed(label, fn, repeat=5):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    print(f"{label:<42} {(time.perf_counter() - started) / repeat * 1000:9.1f} ms")
+    return result
+
+def from_messages(store, campaign_id=None):
+    """The same throughput and failure aggregates, computed over messages."""
+    where = "WHERE completed_at IS NOT NULL" + (f" AND campaign_id={int(campaign_id)}" if campaign_id else "")
+    conn = store.conn
+    conn.execute(f"SELECT completed_at / 3600, SUM(state='sent'), SUM(state='failed'), AVG(duration_ms) "
+                 f"FROM messages {where} GROUP BY 1").fetchall()
+    conn.execute(f"SELECT last_error, COUNT(*) FROM messages {where} AND state='failed' GROUP BY 1").fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report query benchmark on a generated message history.")
+    parser.add_argument("messages", type=int, nargs="?", default=2_000_000, help="finished messages to generate")
+    n = parser.parse_args().messages
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ContactStore(os.path.join(tmp, "bench.db"))
+        started = time.perf_counter()
+        ids = fill(store, n)
+        print(f"{n} messages in {CAMPAIGNS} campaigns generated in {time.perf_counter() - started:.1f}s\n")
+        last = ids[-1]
+
+        timed("full report, every campaign", lambda: reports.build_report(store))
+        timed(f"full report, campaign #{last} (running)", lambda: reports.build_report(store, last))
+        timed("  throughput per minute, every campaign", lambda: reports.throughput(store, bucket="minute"))
+        timed("  failure breakdown", lambda: reports.failures(store))
+        timed("  ETA", lambda: reports.eta(store, last))
+        timed("  latency percentiles (last hour)", lambda: reports.latency(store, last))
+        timed("same aggregates from messages, every campaign", lambda: from_messages(store), repeat=1)
+        timed(f"same aggregates from messages, campaign #{last}", lambda: from_messages(store, last), repeat=1)
+
+        # What the rollup adds to recording a result.
+        queued = [r[0] for r in store.conn.execute(
+            "SELECT id FROM messages WHERE campaign_id=? AND state='queued' LIMIT 20000", (last,))]
+        half = len(queued) // 2
+        started = time.perf_counter()
+        for message_id in queued[:half]:
+            store.complete_message(message_id, True, duration=1.5)
+        store.flush()
+        with_rollup = (time.perf_counter() - started) / half * 1e6
+        started = time.perf_counter()
+        for message_id in queued[half:]:
+            store.conn.execute("UPDATE messages SET state=?, attempts=attempts+1, updated_at=? WHERE id=?",
+                               (SENT, time.time(), message_id))
+            store._count_update()
+        store.flush()
+        without = (time.perf_counter() - started) / half * 1e6
+        print(f"\ncomplete_message: {with_rollup:.1f} µs per message, {without:.1f} µs for the bare update")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+bench_sender.py
+Offline throughput benchmark against the local fake WhatsApp Web (fake_whatsapp.py).
+
+Three stages, each optional:
+  startup    init_driver() + login check in a fresh headless Chrome
+  send       send_message_to_number() in a loop on one driver
+  pipeline   SendEngine.start() as used by the GUI and the CLI: a generated workbook
+             is streamed, queued, sent through the sender pool and the statuses merged back;
+             --tabs sets its pipeline depth (tabs per browser, see tab_pipeline.py)
+
+Reports messages/sec, p50/p95/p99 per-message latency and startup time, and
+appends every run to RESULTS_FILE so runs can be compared with --compare.
+
+Usage:
+    python bench_sender.py --messages 200 --invalid-rate 0.05 --label "in-app nav"
+    python bench_sender.py --stages pipeline --tabs 3 --boot 2 --label "3 tabs"
+    python bench_sender.py --compare 10
+Needs Chrome; no real messages are sent.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import tempfile
+import time
+import urllib.parse
+
+from metrics import percentile
+
+RESULTS_FILE = "bench_results.jsonl"
+STAGES = ("startup", "send", "pipeline")
+
+
+def latency_summary(seconds):
+    if not seconds:
+        return {}
+    return {f"p{p}_ms": round(percentile(seconds, p) * 1000, 1) for p in (50, 95, 99)}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def bench_phones(count):
+    return [f"92300{i:07d}" for i in range(count)]
+
+
+# ---------------- Stages ----------------
+def bench_startup(whatsapp_web, profile):
+    started = time.perf_counter()
+    driver = whatsapp_web.init_driver(headless=True, profile_dir=profile)
+    if not driver:
+        return None, {"error": "Chrome did not start"}
+    logged_in = whatsapp_web.wait_for_login(driver, timeout=60)
+    return driver, {"startup_s": round(time.perf_counter() - started, 3), "logged_in": logged_in}
+
+def bench_send(whatsapp_web, driver, state, count, mode):
+    latencies, failed = [], 0
+    before = len(state.sent)
+    started = time.perf_counter()
+    for i, phone in enumerate(bench_phones(count)):
+        t = time.perf_counter()
+        ok = whatsapp_web.send_message_to_number(driver, phone, urllib.parse.quote(f"bench {i}"),
+                                                 lambda msg: None, mode=mode)
+        if ok:
+            latencies.append(time.perf_counter() - t)
+        else:
+            failed += 1
+    wall = time.perf_counter() - started
+    return {"messages": count, "ok": len(latencies), "failed": failed,
+            "delivered": len(state.sent) - before, "wall_s": round(wall, 3),
+            "msgs_per_sec": round(len(latencies) / wall, 3) if wall else 0.0,
+            **latency_summary(latencies)}
+
+def write_workbook(path, count):
+    import pandas as pd
+    pd.DataFrame({"number": bench_phones(count), "name": [f"Bench {i}" for i in range(count)],
+                  "status": ["Applied"] * count}).to_excel(path, index=False)
+
+def bench_pipeline(workdir, count, accounts, state, tabs=1):
+    """Run a whole campaign through SendEngine.start, as the GUI and the CLI do."""
+    from browser_session import SessionManager
+    from contacts_db import ContactStore
+    from engine import SendEngine
+    from metrics import METRICS
+
+    class LoggedInSessions(SessionManager):
+        # The fake server is always logged in, so every profile can start headless.
+        def _known_login(self, profile_dir):
+            return True
+
+    completions, lines, done = [], [], {}
+
+    def on_progress(session):
+        # Also called when a session comes up or dies; only count finished messages.
+        total = session.sent + session.failed
+        if total > done.get(session.index, 0):
+            done[session.index] = total
+            completions.append(time.perf_counter())
+
+    path = os.path.join(workdir, "bench.xlsx")
+    write_workbook(path, count)
+    store = ContactStore(os.path.join(workdir, "bench.db"))
+    manager = LoggedInSessions(headless=True)
+    engine = SendEngine(store, log=lines.append, on_progress=on_progress, session_manager=manager,
+                        profile_base=os.path.join(workdir, "profile"))
+    before = len(state.sent)
+    started = time.perf_counter()
+    try:
+        engine.start(path, "Hello {name}, this is a benchmark.", accounts=accounts, tabs=tabs,
+                     pacing={"per_minute": 10 ** 9, "per_hour": 10 ** 9, "min_gap": 0, "jitter": 0})
+    finally:
+        wall = time.perf_counter() - started
+        manager.shutdown()
+        store.close()
+    gaps = [b - a for a, b in zip([started] + completions, completions)]
+    delivered = len(state.sent) - before
+    stages = {stage: {k: v for k, v in summary.items() if k in ("count", "p50_ms", "p95_ms")}
+              for stage, summary in METRICS.summary()["stages"].items()}
+    return {"messages": count, "accounts": accounts, "tabs": tabs, "completed": len(completions), "delivered": delivered,
+            "wall_s": round(wall, 3), "msgs_per_sec": round(len(completions) / wall, 3) if wall else 0.0,
+            "first_message_s": round(completions[0] - started, 3) if completions else None,
+            **latency_summary(gaps[1:] if len(gaps) > 1 else gaps),
+            "stages": stages, "errors": [line for line in lines if line.startswith("❌")][:5]}
+
+
+# ---------------- Results ----------------
+def save_result(result, path=RESULTS_FILE):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+def compare(path=RESULTS_FILE, last=10):
+    try:
+        with open(path, encoding="utf-8") as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        print(f"No results in {path} yet.")
+        return
+    print(f"{'when':<17}{'commit':<9}{'label':<20}{'startup':>9}{'send/s':>8}{'p95 ms':>8}"
+          f"{'pipe/s':>8}{'p95 ms':>8}")
+    for run in runs[-last:]:
+        send, pipe = run.get("send", {}), run.get("pipeline", {})
+        cells = [run.get("startup", {}).get("startup_s"), send.get("msgs_per_sec"), send.get("p95_ms"),
+                 pipe.get("msgs_per_sec"), pipe.get("p95_ms")]
+        print(f"{run['when'][:16]:<17}{run.get('commit') or '-':<9}{(run.get('label') or '')[:19]:<20}"
+              + "".join(f"{'-' if c is None else c:>{w}}" for c, w in zip(cells, (9, 8, 8, 8, 8))))
+
+def print_result(result):
+    for stage in STAGES:
+        if stage in result:
+            print(f"{stage:<9} " + "  ".join(f"{k}={v}" for k, v in result[stage].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline sender benchmark against the fake WhatsApp Web.")
+    parser.add_argument("--messages", type=int, default=100, help="messages per stage")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--mode", choices=("in_app", "url"), default=None, help="navigation mode for the send stage")
+    parser.add_argument("--accounts", type=int, default=1, help="parallel sessions in the pipeline stage")
+    parser.add_argument("--tabs", type=int, default=1, help="tabs per session in the pipeline stage")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--send-delay", type=float, default=0.05)
+    parser.add_argument("--boot", type=float, default=1.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.05)
+    parser.add_argument("--label", default="", help="free text stored with the run")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", type=int, metavar="N", help="print the last N saved runs and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.results, args.compare)
+        return
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    import whatsapp_web
+    from fake_whatsapp import start_server
+
+    server, state, url = start_server(latency=args.latency, send_delay=args.send_delay, boot=args.boot,
+                                      jitter=args.jitter, invalid_rate=args.invalid_rate)
+    whatsapp_web.WHATSAPP_URL = url
+    result = {"when": datetime.datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+              "label": args.label, "config": {k: v for k, v in vars(args).items()
+                                              if k not in ("results", "no_save", "compare", "label")}}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            driver = None
+            if "startup" in stages or "send" in stages:
+                driver, result["startup"] = bench_startup(whatsapp_web, os.path.join(workdir, "profile-send"))
+            try:
+                if "send" in stages and driver:
+                    result["send"] = bench_send(whatsapp_web, driver, state, args.messages, args.mode)
+            finally:
+                if driver:
+                    driver.quit()
+            if "pipeline" in stages:
+                result["pipeline"] = bench_pipeline(workdir, args.messages, args.accounts, state, args.tabs)
+    finally:
+        server.shutdown()
+
+    print_result(result)
+    if not args.no_save:
+        save_result(result, args.results)
+        print(f"saved to {args.results}")
+
+if __name__ == "__main__":
+    main()
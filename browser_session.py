@@ -0,0 +1,101 @@
+"""
+browser_session.py
+Keeps logged-in WhatsApp Web browsers warm between campaigns.
+
+SessionManager hands out one Chrome per profile directory. A profile that has
+logged in before is started headless straight away; one that has not (or whose
+login expired) gets a visible window for the QR scan and keeps it. Either way
+login is checked in the same browser that will send, and the driver stays
+alive after a campaign so the next one starts warm. Profiles known to be
+logged in are remembered in SESSION_CACHE next to the chromedriver path.
+"""
+
+import time
+
+from whatsapp_web import init_driver, wait_for_login, is_alive, load_cache, save_cache, cache_lock
+
+WARM_CHECK_TIMEOUT = 5      # seconds a warm browser gets to show it is still logged in
+HEADLESS_LOGIN_TIMEOUT = 30
+
+
+class SessionManager:
+    def __init__(self, headless=True, login_timeout=120):
+        self.headless = headless
+        self.login_timeout = login_timeout
+        self.drivers = {}
+
+    def acquire(self, profile_dir, log=print):
+        """Return a logged-in driver for profile_dir, reusing a warm one when possible."""
+        started = time.perf_counter()
+        driver = self.drivers.get(profile_dir)
+        if driver and is_alive(driver) and wait_for_login(driver, timeout=WARM_CHECK_TIMEOUT):
+            log(f"⏱ Warm start ({profile_dir}): {time.perf_counter() - started:.2f}s")
+            return driver
+        if driver:
+            self._quit(driver)
+            self.drivers.pop(profile_dir, None)
+
+        driver = self._cold_start(profile_dir, log)
+        if driver:
+            self.drivers[profile_dir] = driver
+            log(f"⏱ Cold start ({profile_dir}): {time.perf_counter() - started:.2f}s")
+        return driver
+
+    def restart(self, profile_dir, log=print, logged_out=False):
+        """Quit profile_dir's browser and start a fresh one; a logged-out profile goes straight to the QR window."""
+        started = time.perf_counter()
+        driver = self.drivers.pop(profile_dir, None)
+        if driver:
+            self._quit(driver)
+        if logged_out:
+            self._remember_login(profile_dir, False)
+        driver = self._cold_start(profile_dir, log)
+        if driver:
+            self.drivers[profile_dir] = driver
+            log(f"⏱ Restart ({profile_dir}): {time.perf_counter() - started:.2f}s")
+        return driver
+
+    def _cold_start(self, profile_dir, log):
+        if self.headless and self._known_login(profile_dir):
+            driver = init_driver(headless=True, profile_dir=profile_dir)
+            if driver and wait_for_login(driver, timeout=HEADLESS_LOGIN_TIMEOUT):
+                return driver
+            log(f"⚠ Saved login for {profile_dir} has expired, opening a window for the QR scan…")
+            if driver:
+                self._quit(driver)
+            self._remember_login(profile_dir, False)
+
+        log(f"📱 Please scan QR if needed ({profile_dir})…")
+        driver = init_driver(headless=False, profile_dir=profile_dir)
+        if not driver:
+            return None
+        if not wait_for_login(driver, timeout=self.login_timeout):
+            self._quit(driver)
+            return None
+        self._remember_login(profile_dir, True)
+        return driver
+
+    def _known_login(self, profile_dir):
+        return profile_dir in load_cache().get("logged_in", [])
+
+    def _remember_login(self, profile_dir, logged_in):
+        with cache_lock:
+            cache = load_cache()
+            profiles = set(cache.get("logged_in", []))
+            if logged_in:
+                profiles.add(profile_dir)
+            else:
+                profiles.discard(profile_dir)
+            cache["logged_in"] = sorted(profiles)
+            save_cache(cache)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def shutdown(self):
+        for driver in self.drivers.values():
+            self._quit(driver)
+        self.drivers.clear()
@@ -0,0 +1,338 @@
+"""
+contact_source.py
+Streams contacts out of large .xlsx / .csv files in fixed-size batches.
+
+.xlsx files are read with openpyxl in read-only mode (iter_rows), CSV files with
+pandas' chunked reader, so memory stays flat however big the file is and the
+send loop can start on the first batch while the rest is still on disk.
+Every batch carries ROW_COLUMN, the 1-based sheet row of each contact (the
+header is row 1), which merge_statuses() uses to write results back.
+
+MergedSource reads several files as one stream for a campaign fed by more
+than one workbook; its ROW_COLUMN also says which file a row came from (see
+split_row()).
+
+pandas is imported on first use, so opening a source just to check its header
+stays fast.
+"""
+
+import csv
+import json
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+BATCH_SIZE = 1000
+ROW_COLUMN = "__row__"
+ROW_SPAN = 1 << 32      # row numbers reserved per file of a MergedSource
+STATUS_COLUMN = "WhatsApp Status"
+
+
+class ContactSource:
+    def __init__(self, path, sheet_name=None, batch_size=BATCH_SIZE):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.batch_size = batch_size
+        self.kind = os.path.splitext(path)[1].lower()
+        self._wb = None
+        self._rows = None
+
+        if self.kind in (".xlsx", ".xlsm"):
+            import openpyxl
+            self._wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            ws = self._wb[sheet_name] if sheet_name else self._wb.active
+            self._rows = ws.iter_rows(values_only=True)
+            header = next(self._rows, ())
+            self.columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        elif self.kind == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                self.columns = _column_names(next(csv.reader(f), []))
+        else:
+            # Legacy formats (.xls) have no streaming reader; load once and slice.
+            import pandas as pd
+            self._frame = pd.read_excel(path, sheet_name=sheet_name or 0)
+            self.columns = list(self._frame.columns)
+
+    def batches(self, after=0):
+        """Yield DataFrames of at most batch_size rows, with ROW_COLUMN set. Sheet rows up to
+        `after` are skipped before any DataFrame is built (see SendEngine.resume)."""
+        try:
+            if self.kind in (".xlsx", ".xlsm"):
+                yield from self._xlsx_batches(after)
+            elif self.kind == ".csv":
+                yield from self._csv_batches(after)
+            else:
+                for start in range(max(0, after - 1), len(self._frame), self.batch_size):
+                    chunk = self._frame.iloc[start:start + self.batch_size].copy()
+                    chunk[ROW_COLUMN] = chunk.index + 2
+                    yield chunk.reset_index(drop=True)
+        finally:
+            self.close()
+
+    def _xlsx_batches(self, after):
+        width = len(self.columns)
+        row_no = 1
+        buf, rows_at = [], []
+        for values in self._rows:
+            row_no += 1
+            if row_no <= after or not any(v is not None for v in values):
+                continue
+            buf.append(values[:width] + (None,) * (width - len(values)))
+            rows_at.append(row_no)
+            if len(buf) >= self.batch_size:
+                yield self._frame_of(buf, rows_at)
+                buf, rows_at = [], []
+        if buf:
+            yield self._frame_of(buf, rows_at)
+
+    def _frame_of(self, buf, rows_at):
+        import pandas as pd
+        frame = pd.DataFrame.from_records(buf, columns=self.columns)
+        frame[ROW_COLUMN] = rows_at
+        return frame
+
+    def _csv_batches(self, after):
+        import pandas as pd
+        # Line 0 is the header, so sheet rows 2..after are lines 1..after-1.
+        skip = range(1, after) if after > 1 else None
+        row_no = max(2, after + 1)
+        for chunk in pd.read_csv(self.path, chunksize=self.batch_size, dtype=str, skip_blank_lines=False,
+                                 header=0, names=self.columns, encoding="utf-8-sig", skiprows=skip):
+            chunk[ROW_COLUMN] = range(row_no, row_no + len(chunk))
+            row_no += len(chunk)
+            yield chunk.reset_index(drop=True)
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.close()
+            self._wb = None
+
+
+class MergedSource:
+    """Several files read one after the other as a single source.
+
+    Columns are the union of the files' columns, first seen first; rows of a file
+    lacking one have it blank. ROW_COLUMN holds file index * ROW_SPAN + sheet row,
+    so with a single file it is simply the sheet row.
+    """
+
+    def __init__(self, paths, sheet_name=None, batch_size=BATCH_SIZE):
+        self.paths = list(paths)
+        self.sources = []
+        try:
+            for path in self.paths:
+                self.sources.append(ContactSource(path, sheet_name=sheet_name, batch_size=batch_size))
+        except Exception:
+            self.close()
+            raise
+        self.columns = list(dict.fromkeys(c for source in self.sources for c in source.columns))
+
+    def missing(self, column):
+        """Paths of the files without `column`."""
+        return [source.path for source in self.sources if column not in source.columns]
+
+    def batches(self, after=0):
+        """Like ContactSource.batches(); `after` is a ROW_COLUMN value, so whole files before
+        its file are skipped too."""
+        after_file, after_row = split_row(after)
+        try:
+            for index, source in enumerate(self.sources):
+                if index < after_file:
+                    continue
+                for frame in source.batches(after_row if index == after_file else 0):
+                    if source.columns != self.columns:
+                        frame = frame.reindex(columns=self.columns + [ROW_COLUMN])
+                    if index:
+                        frame[ROW_COLUMN] += index * ROW_SPAN
+                    yield frame
+        finally:
+            self.close()
+
+    def close(self):
+        for source in self.sources:
+            source.close()
+
+
+def split_row(row):
+    """(file index, sheet row) of a MergedSource ROW_COLUMN value."""
+    return divmod(int(row), ROW_SPAN)
+
+def source_field(paths):
+    """A campaign's `source` for its input files: the path itself for one file, a JSON list for several."""
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    return paths[0] if len(paths) == 1 else json.dumps(paths)
+
+def source_paths(source):
+    """The input files of a campaign's `source` (see source_field)."""
+    return json.loads(source) if source.startswith("[") else [source]
+
+def read_columns(path, sheet_name=None):
+    """Header names of a source without loading openpyxl or pandas (.xlsx/.xlsm/.csv).
+
+    Anything the light reader does not understand falls back to ContactSource.
+    """
+    kind = os.path.splitext(path)[1].lower()
+    try:
+        if kind == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                return _column_names(next(csv.reader(f), []))
+        if kind in (".xlsx", ".xlsm"):
+            return _xlsx_header(path, sheet_name)
+    except Exception:
+        pass
+    source = ContactSource(path, sheet_name=sheet_name)
+    source.close()
+    return source.columns
+
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+def _xlsx_header(path, sheet_name):
+    with zipfile.ZipFile(path) as z:
+        workbook = ET.fromstring(z.read("xl/workbook.xml"))
+        sheets = list(workbook.find(_MAIN + "sheets"))
+        if sheet_name:
+            sheet = next(s for s in sheets if s.get("name") == sheet_name)
+        else:
+            view = workbook.find(f"{_MAIN}bookViews/{_MAIN}workbookView")
+            sheet = sheets[int(view.get("activeTab", 0)) if view is not None else 0]
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        target = next(r.get("Target") for r in rels if r.get("Id") == sheet.get(_REL + "id"))
+        target = target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+        cells = {}      # column index -> (type, raw value) of row 1
+        with z.open(target) as f:
+            for _, el in ET.iterparse(f):
+                if el.tag != _MAIN + "row":
+                    continue
+                if el.get("r", "1") == "1":
+                    for i, c in enumerate(el.iter(_MAIN + "c")):
+                        ref = c.get("r")
+                        col = _column_index(ref) if ref else i
+                        if c.get("t") == "inlineStr":
+                            cells[col] = ("str", "".join(t.text or "" for t in c.iter(_MAIN + "t")))
+                        else:
+                            v = c.find(_MAIN + "v")
+                            if v is not None:
+                                cells[col] = (c.get("t"), v.text or "")
+                break
+
+        wanted = {int(v) for t, v in cells.values() if t == "s"}
+        shared = {}
+        if wanted:
+            with z.open("xl/sharedStrings.xml") as f:
+                index = 0
+                for _, el in ET.iterparse(f):
+                    if el.tag == _MAIN + "si":
+                        if index in wanted:
+                            shared[index] = "".join(t.text or "" for t in el.iter(_MAIN + "t"))
+                            if len(shared) == len(wanted):
+                                break
+                        index += 1
+                        el.clear()
+
+    width = max(cells) + 1 if cells else 0
+    header = []
+    for i in range(width):
+        kind, value = cells.get(i, (None, None))
+        if kind == "s":
+            value = shared[int(value)]
+        elif kind is None and value is not None:
+            number = float(value)
+            value = str(int(number)) if number.is_integer() and "." not in value else str(number)
+        header.append(value)
+    return [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+
+def _column_index(ref):
+    index = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        index = index * 26 + ord(ch.upper()) - 64
+    return index - 1
+
+def _column_names(header):
+    """Header cells named the way pandas names them: blanks become "Unnamed: i", repeats get ".1", ".2"."""
+    names, seen = [], {}
+    for i, cell in enumerate(header):
+        name = cell.strip() if cell and cell.strip() else f"Unnamed: {i}"
+        base = name
+        while name in seen:
+            seen[base] += 1
+            name = f"{base}.{seen[base]}"
+        seen[name] = 0
+        names.append(name)
+    return names
+
+
+# ---------------- Write-back ----------------
+def merge_statuses(path, statuses, column=STATUS_COLUMN, sheet_name=None):
+    """Write {sheet_row: status} into `column` of the source file, keeping every other cell."""
+    if not statuses:
+        return
+    kind = os.path.splitext(path)[1].lower()
+    if kind in (".xlsx", ".xlsm"):
+        _merge_xlsx(path, statuses, column, sheet_name)
+    elif kind == ".csv":
+        _merge_csv(path, statuses, column)
+    else:
+        import pandas as pd
+        df = pd.read_excel(path, sheet_name=sheet_name or 0)
+        if column not in df.columns:
+            df[column] = ""
+        for row_no, status in statuses.items():
+            df.loc[row_no - 2, column] = status
+        df.to_excel(path, index=False)
+
+def _merge_xlsx(path, statuses, column, sheet_name):
+    """Stream-copy the workbook row by row (read-only in, write-only out), so memory stays
+    flat like the reader's; cell values are kept, cell formatting is not."""
+    import openpyxl
+    src = openpyxl.load_workbook(path, read_only=True)
+    dst = openpyxl.Workbook(write_only=True)
+    tmp = path + ".tmp"
+    try:
+        target = src[sheet_name] if sheet_name else src.active
+        for ws in src.worksheets:
+            out = dst.create_sheet(ws.title)
+            rows = ws.iter_rows(values_only=True)
+            if ws.title != target.title:
+                for values in rows:
+                    out.append(values)
+                continue
+            header = list(next(rows, ()))
+            if column in header:
+                col = header.index(column)
+            else:
+                col = len(header)
+                header.append(column)
+            out.append(header)
+            for row_no, values in enumerate(rows, start=2):
+                if row_no in statuses:
+                    values = list(values) + [None] * (col + 1 - len(values))
+                    values[col] = statuses[row_no]
+                out.append(values)
+        dst.active = src.worksheets.index(src.active)
+        dst.save(tmp)
+    finally:
+        src.close()
+    os.replace(tmp, path)
+
+def _merge_csv(path, statuses, column):
+    tmp = path + ".tmp"
+    with open(path, newline="", encoding="utf-8-sig") as src, \
+            open(tmp, "w", newline="", encoding="utf-8-sig") as dst:
+        reader, writer = csv.reader(src), csv.writer(dst)
+        header = next(reader, [])
+        if column in header:
+            col = header.index(column)
+        else:
+            col = len(header)
+            header.append(column)
+        writer.writerow(header)
+        for row_no, row in enumerate(reader, start=2):
+            row += [""] * (col + 1 - len(row))
+            if row_no in statuses:
+                row[col] = statuses[row_no]
+            writer.writerow(row)
+    os.replace(tmp, path)
@@ -0,0 +1,610 @@
+"""
+contacts_db.py
+SQLite store for contacts and their WhatsApp sending status.
+
+A single long-lived connection is kept open in WAL mode. Imports run as one
+transaction and status updates are group-committed (every N updates or T seconds).
+
+Campaigns keep their own queue in the `messages` table. Each message moves
+queued -> in_flight -> sent / failed; in-flight rows carry a lease (owner and
+expiry), so rows held by a sender that died are handed out again once the
+lease runs out, and a campaign can be resumed from the database alone. Every
+send attempt is counted in `attempts`, with the reason of the last failure in
+`last_error`; a message waiting for a retry keeps its lease until then.
+
+Several sender processes can work one campaign (see worker mode in
+sender_cli.py): each leases under its own owner name, keeps its leases alive
+with heartbeat() (which also records it in `workers`), re-checks a lease with
+renew_message() right before sending, and completes only messages it still
+holds, so a message whose lease moved to another worker is never sent twice.
+
+Numbers WhatsApp rejected are kept in `invalid_numbers` for INVALID_TTL seconds,
+so later campaigns drop them at ingestion instead of trying them again.
+contacts.last_sent_at (epoch seconds, indexed) records the last successful
+send to each phone; contacted_since() and invalid_since() hand ingestion the
+phones to skip in one range scan each (see ingest.ContactIndex).
+
+Each completed message gets completed_at (epoch seconds) and duration_ms (how
+long its last send took), and is counted in `message_stats`, a per-minute
+rollup by campaign, state and error that complete_message() keeps up to date.
+The report queries (see reports.py) read the rollup, so throughput, failure
+breakdowns and ETAs take the same few milliseconds however many messages
+there are.
+"""
+
+import sqlite3
+import datetime
+import json
+import threading
+import time
+
+DB_FILE = "whatsapp_contacts.db"
+
+PAGE_SIZE = 100         # rows per page in the contacts viewer
+LEASE_SECONDS = 900     # an in-flight message goes back to the queue if not completed in this time
+WORKER_LEASE = 120      # lease of a heartbeating worker: it is renewed long before it runs out
+INVALID_TTL = 30 * 24 * 3600    # a number found invalid is skipped for this long, then tried again
+STATS_BUCKET = 60       # seconds covered by one message_stats row
+LATENCY_SAMPLES = 10000     # latest send durations behind the latency percentiles
+
+QUEUED, IN_FLIGHT, SENT, FAILED = "queued", "in_flight", "sent", "failed"
+
+
+class ContactStore:
+    def __init__(self, path=DB_FILE, commit_every=50, commit_interval=2.0):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        self.init_schema()
+
+    def init_schema(self):
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS contacts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    phone TEXT UNIQUE,
+                    name TEXT,
+                    status TEXT,
+                    timestamp TEXT
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS campaigns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    source TEXT,
+                    template TEXT,
+                    created_at REAL,
+                    ingested_through INTEGER DEFAULT 0,
+                    ingest_done INTEGER DEFAULT 0,
+                    finished_at REAL,
+                    options TEXT,
+                    enqueued INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            self._add_column("contacts", "last_sent_at", "INTEGER")
+            self._add_column("campaigns", "options", "TEXT")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    campaign_id INTEGER NOT NULL REFERENCES campaigns(id),
+                    phone TEXT NOT NULL,
+                    name TEXT,
+                    body TEXT,
+                    encoded TEXT,
+                    sheet_row INTEGER,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    lease_owner TEXT,
+                    leased_until REAL,
+                    updated_at REAL,
+                    completed_at INTEGER,
+                    duration_ms INTEGER,
+                    UNIQUE (campaign_id, phone)
+                )
+            ''')
+            self._add_column("messages", "encoded", "TEXT")
+            self._add_column("messages", "attempts", "INTEGER NOT NULL DEFAULT 0")
+            self._add_column("messages", "last_error", "TEXT")
+            self._add_column("messages", "duration_ms", "INTEGER")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS message_stats (
+                    campaign_id INTEGER NOT NULL,
+                    minute INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    error TEXT NOT NULL DEFAULT '',
+                    messages INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    total_ms INTEGER NOT NULL DEFAULT 0,
+                    timed INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (campaign_id, minute, state, error)
+                ) WITHOUT ROWID
+            ''')
+            if self._add_column("messages", "completed_at", "INTEGER"):
+                self._backfill_stats()
+            if self._add_column("campaigns", "enqueued", "INTEGER NOT NULL DEFAULT 0"):
+                self.conn.execute("UPDATE campaigns SET enqueued=(SELECT COUNT(*) FROM messages "
+                                  "WHERE messages.campaign_id=campaigns.id)")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS invalid_numbers (
+                    phone TEXT PRIMARY KEY,
+                    marked_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 1
+                ) WITHOUT ROWID
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS workers (
+                    owner TEXT PRIMARY KEY,
+                    campaign_id INTEGER,
+                    started_at REAL,
+                    last_seen REAL,
+                    sent INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            # Serve the contacts viewer: status filter / counts, and name prefix search
+            # (phone prefix search uses the UNIQUE index on phone).
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_contacts_status ON contacts (status)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_contacts_name ON contacts (name COLLATE NOCASE)")
+            # Serve the recency window: phones sent since a time, read from the index alone.
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_contacts_last_sent ON contacts (last_sent_at, phone) "
+                              "WHERE last_sent_at IS NOT NULL")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_invalid_marked ON invalid_numbers (marked_at)")
+            # Serves "next queued rows of a campaign in order" and per-state counts.
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_campaign_state "
+                              "ON messages (campaign_id, state, id)")
+            # Serves per-message latency over a time range (percentiles) from the index alone.
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_completed "
+                              "ON messages (campaign_id, completed_at, duration_ms) WHERE completed_at IS NOT NULL")
+            self._backfill_last_sent()
+            self.conn.commit()
+
+    def _backfill_last_sent(self):
+        """Give phones sent by older versions a last_sent_at from their text timestamp (local time);
+        one sent at an unknown time counts as sent long ago (0)."""
+        self.conn.execute(
+            "UPDATE contacts SET last_sent_at=COALESCE(CAST(strftime('%s', timestamp, 'utc') AS INTEGER), 0) "
+            "WHERE status='Sent' AND last_sent_at IS NULL"
+        )
+
+    def _backfill_stats(self):
+        """Give messages finished by older versions a completed_at (from updated_at) and count
+        them in message_stats; their send durations were never recorded."""
+        self.conn.execute("UPDATE messages SET completed_at=CAST(updated_at AS INTEGER) "
+                          "WHERE state IN (?, ?) AND updated_at IS NOT NULL", (SENT, FAILED))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO message_stats (campaign_id, minute, state, error, messages, attempts) "
+            "SELECT campaign_id, completed_at / ? * ?, state, COALESCE(last_error, ''), COUNT(*), SUM(attempts) "
+            "FROM messages WHERE state IN (?, ?) AND completed_at IS NOT NULL GROUP BY 1, 2, 3, 4",
+            (STATS_BUCKET, STATS_BUCKET, SENT, FAILED),
+        )
+
+    def _add_column(self, table, column, declaration):
+        """Bring a table created by an older version up to date. Returns True if the column was added."""
+        columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        if column in columns:
+            return False
+        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        return True
+
+    # ---------------- Writes ----------------
+    def add_contacts(self, rows):
+        """Insert (phone, name) pairs in a single transaction; existing phones are ignored."""
+        with self.lock:
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO contacts (phone, name, status) VALUES (?, ?, 'Pending')",
+                    rows,
+                )
+                self.conn.commit()
+                self._reset_commit_window()
+            except Exception as e:
+                self.conn.rollback()
+                print("DB insert error:", e)
+
+    def update_status(self, phone, status):
+        """Record a status change; the transaction is committed once enough updates pile up."""
+        now = datetime.datetime.now()
+        sent_at = int(now.timestamp()) if status == "Sent" else None
+        with self.lock:
+            self.conn.execute("UPDATE contacts SET status=?, timestamp=?, last_sent_at=COALESCE(?, last_sent_at) "
+                              "WHERE phone=?", (status, now.strftime("%Y-%m-%d %H:%M:%S"), sent_at, phone))
+            self._count_update()
+
+    def mark_invalid(self, phone):
+        """Remember that WhatsApp rejected phone (group-committed like update_status)."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO invalid_numbers (phone, marked_at) VALUES (?, ?) "
+                "ON CONFLICT(phone) DO UPDATE SET marked_at=excluded.marked_at, hits=hits + 1",
+                (phone, time.time()),
+            )
+            self._count_update()
+
+    def purge_invalid(self, ttl=INVALID_TTL):
+        """Drop negative-cache entries older than ttl. Returns the count."""
+        with self.lock:
+            cur = self.conn.execute("DELETE FROM invalid_numbers WHERE marked_at < ?", (time.time() - ttl,))
+            self.conn.commit()
+            self._reset_commit_window()
+            return cur.rowcount
+
+    def _count_update(self):
+        self._uncommitted += 1
+        if (self._uncommitted >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.flush()
+
+    def flush(self):
+        """Commit any pending status updates."""
+        with self.lock:
+            self.conn.commit()
+            self._reset_commit_window()
+
+    def _reset_commit_window(self):
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    # ---------------- Reads ----------------
+    def contacted_since(self, since=None):
+        """Phones sent to at or after epoch `since` (None: ever), as a set."""
+        with self.lock:
+            if since is None:
+                rows = self.conn.execute("SELECT phone FROM contacts WHERE last_sent_at IS NOT NULL")
+            else:
+                rows = self.conn.execute("SELECT phone FROM contacts WHERE last_sent_at >= ?", (int(since),))
+            return {r[0] for r in rows}
+
+    def invalid_since(self, ttl=INVALID_TTL):
+        """Phones found invalid within the last ttl seconds, as a set."""
+        with self.lock:
+            rows = self.conn.execute("SELECT phone FROM invalid_numbers WHERE marked_at >= ?", (time.time() - ttl,))
+            return {r[0] for r in rows}
+
+    def pending_elsewhere(self, campaign_id=None):
+        """Phones queued or in flight in unfinished campaigns other than campaign_id, as a set."""
+        with self.lock:
+            # CROSS JOIN keeps campaigns outermost, so only unfinished campaigns' index ranges are read.
+            rows = self.conn.execute(
+                "SELECT m.phone FROM campaigns c CROSS JOIN messages m ON m.campaign_id = c.id "
+                "AND m.state IN (?, ?) WHERE c.finished_at IS NULL AND c.id IS NOT ?",
+                (QUEUED, IN_FLIGHT, campaign_id),
+            )
+            return {r[0] for r in rows}
+
+    def contacts_page(self, status=None, search=None, after_id=0, limit=PAGE_SIZE):
+        """One page of (id, phone, name, status, timestamp) with id > after_id, in id order.
+
+        Keyset pagination: the next page starts after the last id of this one, so any
+        page costs the same however deep it is. `search` matches a phone prefix when it
+        is all digits (a leading + is ignored), otherwise a case-insensitive name prefix.
+        """
+        where, params = ["id > ?"], [after_id]
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        search = (search or "").strip()
+        if search:
+            digits = search.lstrip("+")
+            if digits.isdigit():
+                where.append("phone >= ? AND phone < ?")
+                params += [digits, digits + "~"]
+            else:
+                where.append("name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE")
+                params += [search, search + "\U0010ffff"]
+        params.append(limit)
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, phone, name, status, timestamp FROM contacts "
+                f"WHERE {' AND '.join(where)} ORDER BY id LIMIT ?", params
+            ).fetchall()
+
+    def status_counts(self):
+        """{status: count} over all contacts, answered from the status index."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM contacts GROUP BY status").fetchall())
+
+    # ---------------- Campaigns ----------------
+    def create_campaign(self, name, source, template, options=None):
+        """`options` (a dict, stored as JSON) records how the source is read, so Resume reads it the same way."""
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO campaigns (name, source, template, created_at, options) VALUES (?, ?, ?, ?, ?)",
+                (name, source, template, time.time(), json.dumps(options or {})),
+            )
+            self.conn.commit()
+            return cur.lastrowid
+
+    def drop_campaign(self, campaign_id):
+        """Delete a campaign and everything queued or counted for it (e.g. one that never got to send)."""
+        with self.lock:
+            self.flush()
+            for table in ("messages", "message_stats", "workers"):
+                self.conn.execute(f"DELETE FROM {table} WHERE campaign_id=?", (campaign_id,))
+            self.conn.execute("DELETE FROM campaigns WHERE id=?", (campaign_id,))
+            self.conn.commit()
+            self._reset_commit_window()
+
+    def campaign(self, campaign_id):
+        with self.lock:
+            self.conn.row_factory = sqlite3.Row
+            try:
+                return self.conn.execute("SELECT * FROM campaigns WHERE id=?", (campaign_id,)).fetchone()
+            finally:
+                self.conn.row_factory = None
+
+    def unfinished_campaigns(self):
+        """(id, name, created_at) of campaigns that still have work, newest first."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, name, created_at FROM campaigns WHERE finished_at IS NULL ORDER BY id DESC"
+            ).fetchall()
+
+    def enqueue_messages(self, campaign_id, rows, ingested_through=None):
+        """Queue (phone, name, body, encoded, sheet_row) tuples in one transaction; re-queuing a phone is a no-op.
+
+        `encoded` is the URL-encoded body as it goes into the send link.
+        """
+        with self.lock:
+            now = time.time()
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO messages (campaign_id, phone, name, body, encoded, sheet_row, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((campaign_id, phone, name, body, encoded, sheet_row, now)
+                 for phone, name, body, encoded, sheet_row in rows),
+            )
+            self.conn.execute("UPDATE campaigns SET enqueued=enqueued+? WHERE id=?", (cur.rowcount, campaign_id))
+            if ingested_through is not None:
+                self.conn.execute("UPDATE campaigns SET ingested_through=? WHERE id=?",
+                                  (int(ingested_through), campaign_id))
+            self.conn.commit()
+            self._reset_commit_window()
+
+    def mark_ingested(self, campaign_id):
+        with self.lock:
+            self.conn.execute("UPDATE campaigns SET ingest_done=1 WHERE id=?", (campaign_id,))
+            self.conn.commit()
+
+    def lease_messages(self, campaign_id, owner, limit=50, lease_seconds=LEASE_SECONDS):
+        """Claim up to `limit` queued messages in order: [(id, phone, name, body, encoded, sheet_row)].
+
+        In-flight messages of other owners whose lease has run out are put back in the
+        queue first. An owner's own expired leases are only reclaimed through
+        requeue_owned(), so a slow sender never hands itself a duplicate.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE messages SET state='queued', lease_owner=NULL, leased_until=NULL "
+                "WHERE campaign_id=? AND state='in_flight' AND leased_until < ? AND lease_owner != ?",
+                (campaign_id, now, owner),
+            )
+            rows = self.conn.execute('''
+                UPDATE messages SET state='in_flight', lease_owner=?, leased_until=?, updated_at=?
+                WHERE id IN (
+                    SELECT id FROM messages WHERE campaign_id=? AND state='queued' ORDER BY id LIMIT ?
+                )
+                RETURNING id, phone, name, body, encoded, sheet_row
+            ''', (owner, now + lease_seconds, now, campaign_id, limit)).fetchall()
+            self.conn.commit()
+            self._reset_commit_window()
+        return sorted(rows)
+
+    def requeue_owned(self, campaign_id, owner):
+        """Put back in-flight messages of `owner`, e.g. after that sender crashed. Returns the count."""
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE messages SET state='queued', lease_owner=NULL, leased_until=NULL "
+                "WHERE campaign_id=? AND state='in_flight' AND lease_owner=?",
+                (campaign_id, owner),
+            )
+            self.conn.commit()
+            return cur.rowcount
+
+    def complete_message(self, message_id, ok, error=None, owner=None, duration=None):
+        """Mark a leased message sent or failed after one more attempt (group-committed like update_status).
+
+        `duration` is how long the send took, in seconds. With `owner` only a message still
+        leased by that owner is completed, so a late or repeated completion changes nothing.
+        Returns True if the message was updated.
+        """
+        now = time.time()
+        state = SENT if ok else FAILED
+        duration_ms = None if duration is None else round(duration * 1000)
+        sql = ("UPDATE messages SET state=?, attempts=attempts+1, last_error=?, lease_owner=NULL, "
+               "leased_until=NULL, updated_at=?, completed_at=?, duration_ms=? WHERE id=?")
+        params = [state, error, now, int(now), duration_ms, message_id]
+        if owner is not None:
+            sql += " AND state='in_flight' AND lease_owner=?"
+            params.append(owner)
+        with self.lock:
+            row = self.conn.execute(sql + " RETURNING campaign_id, attempts", params).fetchone()
+            if row:
+                self.conn.execute(
+                    "INSERT INTO message_stats (campaign_id, minute, state, error, messages, attempts, total_ms, timed) "
+                    "VALUES (?, ?, ?, ?, 1, ?, ?, ?) ON CONFLICT DO UPDATE SET messages=messages+1, "
+                    "attempts=attempts+excluded.attempts, total_ms=total_ms+excluded.total_ms, timed=timed+excluded.timed",
+                    (row[0], int(now) // STATS_BUCKET * STATS_BUCKET, state, error or "", row[1],
+                     duration_ms or 0, int(duration_ms is not None)),
+                )
+            self._count_update()
+            return row is not None
+
+    def retry_message(self, message_id, error, delay):
+        """Count a failed attempt of a message that will be retried in `delay` seconds; its lease
+        is stretched past the retry so no other sender picks it up meanwhile."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE messages SET attempts=attempts+1, last_error=?, leased_until=?, updated_at=? WHERE id=?",
+                (error, now + delay + LEASE_SECONDS, now, message_id),
+            )
+            self._count_update()
+
+    def campaign_counts(self, campaign_id):
+        """{state: count} for one campaign."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) FROM messages WHERE campaign_id=? GROUP BY state", (campaign_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def finish_campaign(self, campaign_id):
+        """Close the campaign if nothing is left queued or in flight. Returns True if this call
+        closed it, so only one of several workers finishing together goes on to write it back."""
+        with self.lock:
+            self.flush()
+            counts = self.campaign_counts(campaign_id)
+            row = self.conn.execute("SELECT ingest_done FROM campaigns WHERE id=?", (campaign_id,)).fetchone()
+            if not row or not row[0] or counts.get(QUEUED) or counts.get(IN_FLIGHT):
+                return False
+            cur = self.conn.execute("UPDATE campaigns SET finished_at=? WHERE id=? AND finished_at IS NULL",
+                                    (time.time(), campaign_id))
+            self.conn.commit()
+            return cur.rowcount > 0
+
+    # ---------------- Workers ----------------
+    def renew_message(self, message_id, owner, lease_seconds=WORKER_LEASE):
+        """Extend owner's lease on a message just before sending it. False if the lease was lost
+        (it ran out and another worker took the message, or it is already done): then it must not be sent."""
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE messages SET leased_until=? WHERE id=? AND state='in_flight' AND lease_owner=?",
+                (time.time() + lease_seconds, message_id, owner),
+            )
+            self.conn.commit()
+            self._reset_commit_window()
+            return cur.rowcount > 0
+
+    def heartbeat(self, campaign_id, owner, lease_seconds=WORKER_LEASE, sent=0, failed=0):
+        """Keep all of owner's leases in the campaign alive and record that the worker is still running.
+        Returns the number of leases extended."""
+        now = time.time()
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE messages SET leased_until=? WHERE campaign_id=? AND state='in_flight' AND lease_owner=?",
+                (now + lease_seconds, campaign_id, owner),
+            )
+            self.conn.execute(
+                "INSERT INTO workers (owner, campaign_id, started_at, last_seen, sent, failed) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(owner) DO UPDATE SET campaign_id=excluded.campaign_id, "
+                "last_seen=excluded.last_seen, sent=excluded.sent, failed=excluded.failed",
+                (owner, campaign_id, now, now, sent, failed),
+            )
+            self.conn.commit()
+            self._reset_commit_window()
+            return cur.rowcount
+
+    def active_workers(self, campaign_id, within=WORKER_LEASE):
+        """(owner, last_seen, sent, failed) of workers that sent a heartbeat in the last `within` seconds."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT owner, last_seen, sent, failed FROM workers WHERE campaign_id=? AND last_seen >= ? "
+                "ORDER BY owner", (campaign_id, time.time() - within)
+            ).fetchall()
+
+    def pending_counts(self, campaign_id, owner):
+        """(queued, in flight with other owners) for a campaign: what a worker may still get to send."""
+        with self.lock:
+            queued, others = self.conn.execute(
+                "SELECT SUM(state='queued'), SUM(state='in_flight' AND lease_owner != ?) FROM messages "
+                "WHERE campaign_id=? AND state IN ('queued', 'in_flight')", (owner, campaign_id)
+            ).fetchone()
+        return queued or 0, others or 0
+
+    def campaign_results(self, campaign_id):
+        """(sheet_row, state, last_error) of every finished message of a campaign."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT sheet_row, state, last_error FROM messages WHERE campaign_id=? AND state IN (?, ?)",
+                (campaign_id, SENT, FAILED)
+            ).fetchall()
+
+    # ---------------- Reports ----------------
+    def _stats_filter(self, campaign_id, since=None):
+        where, params = [], []
+        if campaign_id is not None:
+            where.append("campaign_id = ?")
+            params.append(campaign_id)
+        if since is not None:
+            where.append("minute >= ?")
+            params.append(int(since) // STATS_BUCKET * STATS_BUCKET)
+        return (" WHERE " + " AND ".join(where)) if where else "", params
+
+    def throughput(self, campaign_id=None, bucket=3600, offset=0, since=None):
+        """[(bucket start, sent, failed, total_ms, timed)] oldest first, from message_stats.
+
+        Buckets are `bucket` seconds wide (a multiple of STATS_BUCKET), aligned `offset`
+        seconds east of UTC so that hours and days can follow local time.
+        """
+        where, params = self._stats_filter(campaign_id, since)
+        with self.lock:
+            return self.conn.execute(
+                "SELECT (minute + ?) / ? * ? - ?, SUM(CASE WHEN state=? THEN messages ELSE 0 END), "
+                "SUM(CASE WHEN state=? THEN messages ELSE 0 END), SUM(total_ms), SUM(timed) "
+                f"FROM message_stats{where} GROUP BY 1 ORDER BY 1",
+                [offset, bucket, bucket, offset, SENT, FAILED, *params],
+            ).fetchall()
+
+    def failure_breakdown(self, campaign_id=None):
+        """[(error, failed messages, attempts spent on them)], most frequent first."""
+        where, params = self._stats_filter(campaign_id)
+        where += (" AND" if where else " WHERE") + " state = ?"
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT error, SUM(messages), SUM(attempts) FROM message_stats{where} GROUP BY error ORDER BY 2 DESC",
+                [*params, FAILED],
+            ).fetchall()
+
+    def campaign_stats(self, campaign_id=None):
+        """[(id, name, created_at, finished_at, sent, failed, attempts, total_ms, timed, last minute)]
+        per campaign, newest first."""
+        where, params = ("WHERE c.id = ?", [campaign_id]) if campaign_id is not None else ("", [])
+        with self.lock:
+            return self.conn.execute(
+                "SELECT c.id, c.name, c.created_at, c.finished_at, "
+                "COALESCE(SUM(CASE WHEN s.state=? THEN s.messages END), 0), "
+                "COALESCE(SUM(CASE WHEN s.state=? THEN s.messages END), 0), COALESCE(SUM(s.attempts), 0), "
+                "COALESCE(SUM(s.total_ms), 0), COALESCE(SUM(s.timed), 0), MAX(s.minute) "
+                f"FROM campaigns c LEFT JOIN message_stats s ON s.campaign_id = c.id {where} "
+                "GROUP BY c.id ORDER BY c.id DESC", [SENT, FAILED, *params],
+            ).fetchall()
+
+    def open_counts(self, campaign_id):
+        """(queued, in flight) of a campaign without counting its queued rows: messages are never
+        removed, so whatever was enqueued and is neither completed nor in flight is still queued."""
+        with self.lock:
+            enqueued, completed, in_flight = self.conn.execute(
+                "SELECT enqueued, (SELECT COALESCE(SUM(messages), 0) FROM message_stats WHERE campaign_id=c.id), "
+                "(SELECT COUNT(*) FROM messages WHERE campaign_id=c.id AND state='in_flight') "
+                "FROM campaigns c WHERE id=?", (campaign_id,)
+            ).fetchone() or (0, 0, 0)
+        return max(enqueued - completed - in_flight, 0), in_flight
+
+    def completed_since(self, campaign_id, since):
+        """Messages of a campaign completed since epoch `since` (to the minute)."""
+        where, params = self._stats_filter(campaign_id, since)
+        with self.lock:
+            return self.conn.execute(f"SELECT COALESCE(SUM(messages), 0) FROM message_stats{where}",
+                                     params).fetchone()[0]
+
+    def durations(self, campaign_id, since=0, limit=LATENCY_SAMPLES):
+        """Sorted send durations (ms) of the latest `limit` messages of a campaign completed since epoch `since`."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT duration_ms FROM messages WHERE campaign_id=? AND completed_at >= ? "
+                "AND duration_ms IS NOT NULL ORDER BY completed_at DESC LIMIT ?", (campaign_id, int(since), limit)
+            ).fetchall()
+        return sorted(r[0] for r in rows)
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
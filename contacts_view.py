@@ -0,0 +1,132 @@
+"""
+contacts_view.py
+Contacts & Status window.
+
+Only the visible page is fetched from the database (keyset pagination on id),
+so the window opens at once however many contacts there are. Status filter and
+search run in SQL on indexed columns, and the per-status counts refresh while
+the window is open.
+"""
+
+import time
+
+import customtkinter as ctk
+
+from contacts_db import PAGE_SIZE
+
+COUNTS_REFRESH_MS = 2000    # how often the status counts (and the page) are re-read
+SEARCH_DELAY_MS = 300       # typing pause before the search runs
+ALL = "All"
+
+
+class ContactsViewer(ctk.CTkToplevel):
+    def __init__(self, master, store, page_size=PAGE_SIZE):
+        super().__init__(master)
+        self.store = store
+        self.page_size = page_size
+        self.page_starts = [0]      # after_id of every page visited, for "Previous"
+        self.rows = []
+        self._search_job = None
+        self._refresh_job = None
+
+        self.title("Contacts & Status")
+        self.geometry("700x520")
+
+        controls = ctk.CTkFrame(self, corner_radius=15)
+        controls.pack(padx=10, pady=(10, 5), fill="x")
+        ctk.CTkLabel(controls, text="Status:", font=("Poppins", 12)).pack(side="left", padx=(10, 5), pady=5)
+        self.status_menu = ctk.CTkOptionMenu(controls, values=[ALL], width=110, command=lambda _: self.first_page())
+        self.status_menu.set(ALL)
+        self.status_menu.pack(side="left", pady=5)
+        ctk.CTkLabel(controls, text="Search:", font=("Poppins", 12)).pack(side="left", padx=(15, 5))
+        self.search_entry = ctk.CTkEntry(controls, width=200, placeholder_text="phone or name prefix")
+        self.search_entry.pack(side="left", pady=5)
+        self.search_entry.bind("<KeyRelease>", self.on_search)
+        self.counts_label = ctk.CTkLabel(controls, text="", font=("Poppins", 12), text_color="gray80")
+        self.counts_label.pack(side="left", padx=10)
+
+        frame = ctk.CTkFrame(self, corner_radius=15)
+        frame.pack(padx=10, pady=5, fill="both", expand=True)
+        self.textbox = ctk.CTkTextbox(frame, width=660, height=380, font=("Consolas", 12))
+        self.textbox.pack(padx=10, pady=10, fill="both", expand=True)
+
+        nav = ctk.CTkFrame(self, fg_color="transparent")
+        nav.pack(padx=10, pady=(0, 10), fill="x")
+        self.prev_button = ctk.CTkButton(nav, text="◀ Previous", width=110, command=self.previous_page)
+        self.prev_button.pack(side="left")
+        self.next_button = ctk.CTkButton(nav, text="Next ▶", width=110, command=self.next_page)
+        self.next_button.pack(side="right")
+        self.page_label = ctk.CTkLabel(nav, text="", font=("Poppins", 12))
+        self.page_label.pack(side="left", expand=True)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh()
+
+    # ---------------- Paging ----------------
+    def filters(self):
+        status = self.status_menu.get()
+        return (None if status == ALL else status), self.search_entry.get()
+
+    def load_page(self):
+        status, search = self.filters()
+        # One extra row tells whether a next page exists without a COUNT(*).
+        rows = self.store.contacts_page(status, search, after_id=self.page_starts[-1], limit=self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        self.rows = rows[:self.page_size]
+        self.render()
+
+    def first_page(self):
+        self.page_starts = [0]
+        self.load_page()
+
+    def next_page(self):
+        if self.has_next and self.rows:
+            self.page_starts.append(self.rows[-1][0])
+            self.load_page()
+
+    def previous_page(self):
+        if len(self.page_starts) > 1:
+            self.page_starts.pop()
+            self.load_page()
+
+    def on_search(self, _event=None):
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self.first_page)
+
+    def render(self):
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        lines = [f"{'Phone':<15}{'Name':<20}{'Status':<10}{'Timestamp':<20}", "-" * 70]
+        for _, phone, name, status, timestamp in self.rows:
+            lines.append(f"{phone or '':<15}{(name or '')[:19]:<20}{status or '':<10}{timestamp or '-':<20}")
+        if not self.rows:
+            lines.append("No contacts match.")
+        self.textbox.insert("1.0", "\n".join(lines))
+        self.textbox.configure(state="disabled")
+
+        page = len(self.page_starts)
+        self.page_label.configure(text=f"Page {page}")
+        self.prev_button.configure(state="normal" if page > 1 else "disabled")
+        self.next_button.configure(state="normal" if self.has_next else "disabled")
+
+    # ---------------- Live counts ----------------
+    def refresh(self):
+        started = time.perf_counter()
+        counts = self.store.status_counts()
+        total = sum(counts.values())
+        parts = [f"{status or '-'}: {count:,}" for status, count in sorted(counts.items(), key=lambda kv: str(kv[0]))]
+        self.counts_label.configure(text=f"Total: {total:,}   " + "   ".join(parts))
+        values = [ALL] + sorted(s for s in counts if s)
+        if self.status_menu.cget("values") != values:
+            self.status_menu.configure(values=values)
+        self.load_page()
+        # Very large tables make the count itself noticeable; back off so it stays under ~5% of the time.
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._refresh_job = self.after(max(COUNTS_REFRESH_MS, int(elapsed_ms * 20)), self.refresh)
+
+    def on_close(self):
+        for job in (self._refresh_job, self._search_job):
+            if job:
+                self.after_cancel(job)
+        self.destroy()
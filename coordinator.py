@@ -0,0 +1,118 @@
+"""
+coordinator.py
+Small HTTP front for the campaign queue, for workers on other machines.
+
+SQLite files must not be shared over a network drive, so when workers run on
+several hosts one process owns the database and serves the queue operations
+(leases, heartbeats, completions, ...) as JSON over HTTP:
+
+    POST /rpc/<method>   body {"args": [...], "kwargs": {...}}  ->  {"result": ...}
+    GET  /status         campaign counts and live workers
+
+Only the ContactStore methods listed in METHODS can be called. RemoteStore is
+the client side: it offers those methods with the same arguments and results,
+so SendEngine.work() runs unchanged against either. Workers on the same host
+as the database can skip the coordinator and open the file directly.
+
+There is no authentication: bind it to a private network (--host).
+"""
+
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PORT = 8770
+TIMEOUT = 30
+
+# What a worker needs from the store, and nothing that deletes or rewrites data in bulk.
+METHODS = ("campaign", "unfinished_campaigns", "lease_messages", "renew_message", "heartbeat",
+           "complete_message", "retry_message", "mark_invalid", "update_status", "pending_counts",
+           "campaign_counts", "active_workers", "finish_campaign", "requeue_owned", "flush")
+
+
+def _jsonable(value):
+    if hasattr(value, "keys"):          # sqlite3.Row
+        return {k: value[k] for k in value.keys()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def make_handler(store, campaign_id=None):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload, status=200):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/status" or campaign_id is None:
+                return self._reply({"error": "not found"}, 404)
+            self._reply({"campaign": campaign_id, "counts": store.campaign_counts(campaign_id),
+                         "workers": _jsonable(store.active_workers(campaign_id))})
+
+        def do_POST(self):
+            method = self.path.rsplit("/", 1)[-1]
+            if not self.path.startswith("/rpc/") or method not in METHODS:
+                return self._reply({"error": f"unknown method {method}"}, 404)
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                result = getattr(store, method)(*body.get("args", []), **body.get("kwargs", {}))
+            except Exception as e:
+                return self._reply({"error": f"{type(e).__name__}: {e}"}, 500)
+            self._reply({"result": _jsonable(result)})
+
+    return Handler
+
+
+def start_coordinator(store, host="127.0.0.1", port=PORT, campaign_id=None):
+    """Serve store in a background thread. Returns (server, url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(store, campaign_id))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    shown = socket.gethostname() if host in ("0.0.0.0", "") else host
+    return server, f"http://{shown}:{server.server_address[1]}"
+
+
+class RemoteError(Exception):
+    pass
+
+
+class RemoteStore:
+    """ContactStore stand-in that forwards METHODS to a coordinator."""
+
+    def __init__(self, url, timeout=TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, method, *args, **kwargs):
+        data = json.dumps({"args": args, "kwargs": kwargs}).encode("utf-8")
+        request = urllib.request.Request(f"{self.url}/rpc/{method}", data=data,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())["result"]
+        except urllib.error.HTTPError as e:
+            raise RemoteError(json.loads(e.read() or b"{}").get("error", str(e))) from None
+
+    def __getattr__(self, method):
+        if method not in METHODS:
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self._call(method, *args, **kwargs)
+
+    def lease_messages(self, *args, **kwargs):
+        return [tuple(row) for row in self._call("lease_messages", *args, **kwargs)]
+
+    def pending_counts(self, *args, **kwargs):
+        return tuple(self._call("pending_counts", *args, **kwargs))
+
+    def close(self):
+        pass
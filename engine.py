@@ -0,0 +1,571 @@
+"""
+engine.py
+Campaign engine shared by the GUI (main.py), the command line (sender_cli.py)
+and whatsapp_bulk_send.py.
+
+SendEngine streams contacts out of one or more workbooks (merged into one
+campaign, duplicates dropped across all of them), queues them in the database,
+sends them through a SenderPool and writes the statuses back to each file. It reports only
+through callbacks (log lines, session list, per-session progress), so the same
+code runs under Tk, in a terminal or as a daemon.
+
+pandas, selenium and webdriver_manager are imported only once a campaign
+actually starts; checking a file's header and template (validate()) does not
+load them.
+"""
+
+import datetime
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import urllib.parse
+
+from contacts_db import QUEUED, SENT, FAILED, WORKER_LEASE
+from message_template import TemplateError, compile_template
+from metrics import METRICS
+
+# Leases taken on this machine are tagged with its host, so Resume can reclaim them after a crash.
+CAMPAIGN_OWNER = f"gui@{socket.gethostname()}"
+LEASE_BATCH = 10       # messages leased at a time; kept small so leases stay fresh
+HEARTBEAT_SECONDS = 30  # how often a worker renews its leases (well inside WORKER_LEASE)
+WORKER_POLL = 5         # seconds a worker waits for other workers' messages to finish or come back
+
+PHONE_COLUMN = "number"
+STATUS_COLUMN = "status"
+STATUS_VALUE = "applied"
+NAME_COLUMN = "name"
+
+
+def input_paths(path):
+    """A source path, or a list of them, as a list."""
+    return [path] if isinstance(path, str) or path is None else list(path)
+
+def worker_owner():
+    """Lease owner name of this worker process, unique across processes and hosts."""
+    return f"worker@{socket.gethostname()}:{os.getpid()}"
+
+def failure_name(result):
+    return getattr(result, "name", "FAILED")
+
+
+class SendEngine:
+    def __init__(self, store, log=print, on_sessions=None, on_progress=None, session_manager=None,
+                 headless=True, profile_base=None, owner=CAMPAIGN_OWNER):
+        """`on_sessions(sessions)` is called once the pool is built, `on_progress(session)` after
+        every result; both may be called from worker threads."""
+        self.store = store
+        self.log = log
+        self.on_sessions = on_sessions or (lambda sessions: None)
+        self.on_progress = on_progress
+        self.session_manager = session_manager
+        self._own_manager = session_manager is None
+        self.headless = headless
+        self.profile_base = profile_base
+        self.owner = owner
+
+    def close(self):
+        """Quit the browsers kept warm by an engine-owned session manager."""
+        if self._own_manager and self.session_manager:
+            self.session_manager.shutdown()
+            self.session_manager = None
+
+    def _sessions(self):
+        if self.session_manager is None:
+            from browser_session import SessionManager
+            self.session_manager = SessionManager(headless=self.headless)
+        return self.session_manager
+
+    # ---------------- Checks ----------------
+    def compile(self, template, columns, name_column=NAME_COLUMN):
+        """Compile the message template against the sheet's columns; logs and returns None if it does not fit.
+
+        {name} stays usable without a name column (it renders blank) as it always has.
+        """
+        try:
+            return compile_template(template, columns, aliases={"name": name_column}, optional={"name"})
+        except TemplateError as e:
+            self.log(f"❌ Message template: {e}")
+            return None
+
+    def validate(self, path, template="", sheet_name=None, phone_column=PHONE_COLUMN,
+                 status_column=STATUS_COLUMN, name_column=NAME_COLUMN, country=None, **_):
+        """Check the file(s), their headers, the template and the phone country without reading the rows.
+        Returns True if usable."""
+        from contact_source import read_columns
+        from phone_numbers import rules_for
+
+        ok, columns = True, {}
+        for path in input_paths(path) or [None]:
+            if not path or not os.path.exists(path):
+                self.log(f"❌ File not found: {path or '(none)'}")
+                return False
+            try:
+                file_columns = read_columns(path, sheet_name=sheet_name)
+            except Exception as e:
+                self.log(f"❌ Could not read {path}: {e}")
+                return False
+            for column in (phone_column, status_column):
+                if column and column not in file_columns:
+                    self.log(f"❌ {os.path.basename(path)} has no '{column}' column "
+                             f"(columns: {', '.join(file_columns)}).")
+                    ok = False
+            columns.update(dict.fromkeys(file_columns))
+        if self.compile(template, columns, name_column) is None:
+            ok = False
+        if not template.strip():
+            self.log("❌ Message template is empty.")
+            ok = False
+        try:
+            rules_for(country)
+        except ValueError as e:
+            self.log(f"❌ Phone numbers: {e}")
+            ok = False
+        return ok
+
+    def preview(self, path, sheet_name=None, phone_column=PHONE_COLUMN, status_column=STATUS_COLUMN,
+                status_value=STATUS_VALUE, country=None, recent_days=None, **_):
+        """Dry run: read and clean the whole file(s) and count what would be sent, without sending."""
+        from contact_source import MergedSource
+        from ingest import ContactIndex, prepare_batches
+
+        totals, skipped = {}, {"recent": 0, "invalid": 0, "pending": 0}
+        index = ContactIndex.from_store(self.store, recent_days=recent_days)
+        source = MergedSource(input_paths(path), sheet_name=sheet_name)
+        for df in prepare_batches(source.batches(), totals, phone_column=phone_column,
+                                  status_column=status_column, status_value=status_value, country=country):
+            for reason, mask in index.skipped(df[phone_column]).items():
+                skipped[reason] += int(mask.sum())
+        totals.update(already_sent=skipped["recent"], known_invalid=skipped["invalid"],
+                      queued_elsewhere=skipped["pending"], to_send=totals.get("unique", 0) - sum(skipped.values()))
+        return totals
+
+    # ---------------- Campaigns ----------------
+    def start(self, path, template, accounts=1, pacing=None, sheet_name=None, phone_column=PHONE_COLUMN,
+              status_column=STATUS_COLUMN, status_value=STATUS_VALUE, name_column=NAME_COLUMN, tabs=None,
+              country=None, recent_days=None):
+        """Create and run a campaign from a workbook, or a list of them merged into one campaign.
+        Returns the campaign id, or None if it could not start (then no campaign is kept).
+
+        `tabs` is the number of tabs each browser sends from (default WHATSAPP_TABS, see tab_pipeline.py);
+        `country` is the one numbers without a calling code belong to (default WHATSAPP_COUNTRY, see
+        phone_numbers.py). Numbers sent within the last `recent_days` days are skipped (None: every
+        number ever sent, 0: none).
+        """
+        options = {"sheet_name": sheet_name, "phone_column": phone_column, "status_column": status_column,
+                   "status_value": status_value, "name_column": name_column, "country": country,
+                   "recent_days": recent_days}
+        opened = self._open_source(path, template, options)
+        if opened is None:
+            return None
+        source, compiled, batches, totals = opened
+        campaign_id = self._create_campaign(path, template, options)
+        ran = self.run_campaign(campaign_id, compiled, accounts, pacing, batches=batches, options=options, tabs=tabs)
+        source.close()
+        if not ran:
+            # Nothing was queued yet: drop the campaign rather than leave one Resume cannot finish.
+            self.store.drop_campaign(campaign_id)
+            self.log(f"🗑 Campaign #{campaign_id} dropped, nothing was sent.")
+            return None
+        self.log(f"📋 {totals['unique']} unique contacts ({self._dropped(totals)}).")
+        return campaign_id
+
+    def enqueue(self, path, template, sheet_name=None, phone_column=PHONE_COLUMN, status_column=STATUS_COLUMN,
+                status_value=STATUS_VALUE, name_column=NAME_COLUMN, country=None, recent_days=None):
+        """Create a campaign (from one workbook or a list, as start()) and queue all of its contacts
+        without sending, for workers (see work()) to send. Returns the campaign id, or None if the
+        files or template are not usable."""
+        from ingest import ContactIndex
+
+        options = {"sheet_name": sheet_name, "phone_column": phone_column, "status_column": status_column,
+                   "status_value": status_value, "name_column": name_column, "country": country,
+                   "recent_days": recent_days}
+        opened = self._open_source(path, template, options)
+        if opened is None:
+            return None
+        source, compiled, batches, totals = opened
+        campaign_id = self._create_campaign(path, template, options)
+        index = ContactIndex.from_store(self.store, campaign_id, recent_days)
+        for df in batches:
+            self.queue_batch(campaign_id, df, compiled, index, phone_column=phone_column, name_column=name_column)
+        self.store.mark_ingested(campaign_id)
+        source.close()
+        counts = self.store.campaign_counts(campaign_id)
+        self.log(f"📋 {totals['unique']} unique contacts ({self._dropped(totals)}); "
+                 f"{counts.get(QUEUED, 0)} queued in campaign #{campaign_id}.")
+        return campaign_id
+
+    @staticmethod
+    def _dropped(totals):
+        return (f"{totals['matched'] - totals['valid']} blank or invalid numbers, "
+                f"{totals['valid'] - totals['unique']} duplicates dropped")
+
+    def _create_campaign(self, path, template, options):
+        from contact_source import source_field
+
+        self.store.purge_invalid()
+        paths = input_paths(path)
+        more = f" + {len(paths) - 1} more" if len(paths) > 1 else ""
+        name = f"{os.path.basename(paths[0])}{more} {datetime.datetime.now():%Y-%m-%d %H:%M}"
+        campaign_id = self.store.create_campaign(name, source_field(paths), template, options)
+        self.log(f"🗂 Campaign #{campaign_id} created.")
+        return campaign_id
+
+    def _open_source(self, path, template, options):
+        """Open, check and start streaming the workbook(s): (source, compiled template, batches, totals), or None."""
+        from contact_source import MergedSource
+        from ingest import prepare_batches
+        from status_journal import merge_journal
+
+        sheet_name, phone_column, status_column, status_value, name_column = (
+            options["sheet_name"], options["phone_column"], options["status_column"], options["status_value"],
+            options["name_column"])
+
+        # Finish the write-back of a campaign that crashed before merging its journal
+        paths = input_paths(path)
+        for journal_path in paths:
+            try:
+                recovered = merge_journal(journal_path, sheet_name=sheet_name)
+                if recovered:
+                    self.log(f"♻ Recovered {recovered} statuses from the previous run's journal.")
+            except Exception as e:
+                self.log(f"❌ Could not merge the previous run's journal: {e}")
+                return None
+
+        try:
+            source = MergedSource(paths, sheet_name=sheet_name)
+        except Exception as e:
+            self.log(f"❌ Could not read {', '.join(map(os.path.basename, paths))}: {e}")
+            return None
+
+        # Ensure the phone and status columns exist in every file
+        missing = [(c, lacking) for c in (phone_column, status_column) if c for lacking in source.missing(c)]
+        if missing:
+            for column, lacking in missing:
+                self.log(f"❌ Excel must have a {column!r} column ({os.path.basename(lacking)} has none).")
+            source.close()
+            return None
+        compiled = self.compile(template, source.columns, name_column)
+        if compiled is None:
+            source.close()
+            return None
+
+        # Stream matching rows batch by batch: clean/normalize numbers, drop blanks and duplicates
+        totals = {}
+        batches = prepare_batches(source.batches(), totals, phone_column=phone_column,
+                                  status_column=status_column, status_value=status_value,
+                                  country=options.get("country"))
+        first = next(batches, None)
+        if first is None:
+            if not totals.get("matched"):
+                self.log(f"❌ No contacts with status '{status_value.title()}' found." if status_column
+                         else "❌ No contacts found.")
+            else:
+                self.log("❌ No valid phone numbers after cleaning.")
+            return None
+        batches = itertools.chain([first], batches)
+        return source, compiled, batches, totals
+
+    def resume(self, accounts=1, pacing=None, campaign_id=None, tabs=None):
+        """Pick up an unfinished campaign (the newest by default) from the database, without
+        re-reading finished rows. Returns its id, or None if there was nothing to resume."""
+        from contact_source import MergedSource, source_paths
+        from ingest import prepare_batches
+
+        if campaign_id is None:
+            unfinished = self.store.unfinished_campaigns()
+            if not unfinished:
+                self.log("ℹ No unfinished campaign to resume.")
+                return None
+            campaign_id = unfinished[0][0]
+        campaign = self.store.campaign(campaign_id)
+        if campaign is None:
+            self.log(f"❌ No campaign #{campaign_id}.")
+            return None
+        options = json.loads(campaign["options"] or "{}")
+
+        recovered = self.store.requeue_owned(campaign["id"], self.owner)
+        self.log(f"♻ Resuming campaign #{campaign['id']} ({campaign['name']}); "
+                 f"{recovered} interrupted messages re-queued.")
+
+        batches, compiled = None, None
+        if not campaign["ingest_done"]:
+            # The crash happened while the file was still being queued: continue after the last queued row.
+            try:
+                source = MergedSource(source_paths(campaign["source"]), sheet_name=options.get("sheet_name"))
+            except Exception:
+                self.log(f"❌ Could not reopen {campaign['source']}; sending what was already queued.")
+            else:
+                compiled = self.compile(campaign["template"], source.columns, options.get("name_column", NAME_COLUMN))
+            if compiled is not None:
+                batches = prepare_batches(source.batches(after=campaign["ingested_through"] or 0), {},
+                                          phone_column=options.get("phone_column", PHONE_COLUMN),
+                                          status_column=options.get("status_column", STATUS_COLUMN),
+                                          status_value=options.get("status_value", STATUS_VALUE),
+                                          country=options.get("country"))
+        if not self.run_campaign(campaign["id"], compiled, accounts, pacing, batches=batches,
+                                 options=options, tabs=tabs):
+            return None
+        return campaign["id"]
+
+    def queue_batch(self, campaign_id, df, template, index, phone_column=PHONE_COLUMN, name_column=NAME_COLUMN):
+        """Store one ingested batch as queued campaign messages, skipping the phones `index`
+        (an ingest.ContactIndex) says to leave alone.
+
+        `template` is a compiled message_template.Template; the batch is rendered and
+        URL-encoded in one go.
+        """
+        from contact_source import ROW_COLUMN
+
+        phones = df[phone_column]
+        names = df[name_column].fillna("") if name_column and name_column in df.columns else [""] * len(df)
+        self.store.add_contacts(zip(phones, names))
+        skipped = index.skipped(phones)
+        if skipped["invalid"].any():
+            self.log(f"⚠ Skipping {skipped['invalid'].sum()} numbers WhatsApp rejected recently.")
+        for phone in phones[skipped["recent"]]:
+            self.log(f"⚠ Skipping {phone} — already sent.")
+        if skipped["pending"].any():
+            self.log(f"⚠ Skipping {skipped['pending'].sum()} numbers queued in another unfinished campaign.")
+        drop = skipped["invalid"] | skipped["recent"] | skipped["pending"]
+        METRICS.inc("skipped", int(drop.sum()))
+        keep = ~drop
+        pending = df[keep]
+        with METRICS.timer("render"):
+            bodies, encoded = template.render(pending)
+        rows = list(zip(pending[phone_column], itertools.compress(names, keep), bodies, encoded,
+                        pending[ROW_COLUMN].astype(int).tolist()))
+        last_row = int(df[ROW_COLUMN].max()) if len(df) else None
+        with METRICS.timer("db_enqueue"):
+            self.store.enqueue_messages(campaign_id, rows, ingested_through=last_row)
+
+    def _result_handlers(self, journals=None, owner=None):
+        """(on_result, on_retry) for SenderPool.run(), recording results in the store (and in
+        `journals`, one StatusJournal or None per input file).
+
+        With `owner` a result only counts if that owner still held the message's lease.
+        """
+        from contact_source import split_row
+        from whatsapp_web import INVALID
+
+        def on_result(item, success, seconds=None):
+            phone, _, (message_id, sheet_row) = item
+            file_index, row = split_row(sheet_row) if sheet_row is not None else (0, None)
+            journal = journals[file_index] if journals else None
+            status = "Sent" if success else "Invalid" if success is INVALID else "Failed"
+            with METRICS.timer("db_complete"):
+                if not self.store.complete_message(message_id, bool(success), error=None if success else failure_name(success),
+                                                   owner=owner, duration=seconds):
+                    self.log(f"⚠ {phone}: result not recorded, another worker had taken over the message.")
+                    return
+                if success is INVALID:
+                    self.store.mark_invalid(phone)
+                self.store.update_status(phone, status)
+            METRICS.inc("sent" if success else "failed")
+            if journal:
+                with METRICS.timer("journal_write"):
+                    journal.record(row, "" if success else status, phone)  # blank for valid
+
+        def on_retry(item, failure, delay):
+            with METRICS.timer("db_complete"):
+                self.store.retry_message(item[2][0], failure_name(failure), delay)
+
+        return on_result, on_retry
+
+    def run_campaign(self, campaign_id, template, accounts=1, pacing=None, batches=None, options=None,
+                     tabs=None):
+        """Send a campaign's queued messages; `batches` (if given) are rendered with the compiled
+        `template` and queued as they stream in. Returns False if no session could log in."""
+        from contact_source import source_paths
+        from ingest import ContactIndex
+        from sender_pool import SenderPool
+        from status_journal import StatusJournal
+        from tab_pipeline import PIPELINE_TABS
+        from whatsapp_web import profile_dirs
+
+        options = options or {}
+        METRICS.reset()
+        # ---------------- Chrome Sessions ----------------
+        profiles = profile_dirs(accounts, self.profile_base) if self.profile_base else profile_dirs(accounts)
+        pool = SenderPool(profiles, log=self.log, on_progress=self.on_progress, pacing=pacing,
+                          manager=self._sessions(), tabs=tabs or PIPELINE_TABS)
+        self.on_sessions(pool.sessions)
+        if not pool.start():
+            self.log("❌ No Chrome session could log in.")
+            pool.close()
+            return False
+        self.log(f"✅ {len(pool.healthy())} session(s) ready for sending…")
+
+        # ---------------- Sending Loop ----------------
+        # Results go to an append-only journal next to each workbook and are merged
+        # into it in one pass once the campaign is done.
+        paths = source_paths(self.store.campaign(campaign_id)["source"])
+        journals = [StatusJournal(path) if os.path.exists(path) else None for path in paths]
+
+        def drain():
+            while True:
+                with METRICS.timer("db_lease"):
+                    leased = self.store.lease_messages(campaign_id, self.owner, limit=LEASE_BATCH)
+                if not leased:
+                    return
+                for message_id, phone, name, body, encoded, sheet_row in leased:
+                    # Messages queued by older versions were stored without their encoded form.
+                    yield phone, encoded or urllib.parse.quote(body), (message_id, sheet_row)
+
+        def messages():
+            if batches is not None:
+                with METRICS.timer("contact_index"):
+                    index = ContactIndex.from_store(self.store, campaign_id, options.get("recent_days"))
+                for df in METRICS.timed(batches, "ingest_batch"):
+                    with METRICS.timer("queue_batch"):
+                        self.queue_batch(campaign_id, df, template, index,
+                                         phone_column=options.get("phone_column", PHONE_COLUMN),
+                                         name_column=options.get("name_column", NAME_COLUMN))
+                    yield from drain()
+                self.store.mark_ingested(campaign_id)
+            yield from drain()
+
+        pool.run(messages(), *self._result_handlers(journals))
+        pool.close()
+        if pool.unsent:
+            self.store.requeue_owned(campaign_id, self.owner)
+            self.log(f"⚠ {len(pool.unsent)} messages left queued — every session stopped. Use Resume to continue.")
+
+        for journal in filter(None, journals):
+            try:
+                with METRICS.timer("excel_merge"):
+                    journal.merge(sheet_name=options.get("sheet_name"))
+            except Exception as e:
+                self.log(f"❌ Could not write statuses back to the file (kept in {journal.path}): {e}")
+
+        counts = self.store.campaign_counts(campaign_id)
+        self.log(f"📊 Campaign #{campaign_id}: {counts.get(SENT, 0)} sent, {counts.get(FAILED, 0)} failed, "
+                 f"{counts.get(QUEUED, 0)} queued.")
+        if METRICS.enabled:
+            base = METRICS.export(f"campaign_{campaign_id}_{datetime.datetime.now():%Y%m%d-%H%M%S}")
+            self.log(f"📈 {METRICS.live_line()} — metrics saved to {base}.prom / .json")
+        if self.store.finish_campaign(campaign_id):
+            self.log("🎉 All messages sent!")
+        return True
+
+    # ---------------- Workers ----------------
+    def work(self, campaign_id=None, accounts=1, pacing=None, tabs=None, finish=True):
+        """Send a queued campaign (the newest unfinished one by default) alongside other workers.
+
+        Any number of processes, here or on other hosts, can work the same campaign: each
+        leases small batches under its own owner name (self.owner, see worker_owner()),
+        keeps them alive with a heartbeat, checks the lease again right before each send
+        and completes only messages it still holds. A worker that dies stops heartbeating
+        and its messages return to the queue after WORKER_LEASE seconds. Results go to
+        the database; with `finish`, the worker that finds the campaign done closes it and
+        runs write_back() to put them into the workbook (a coordinator does both for the
+        workers it serves). Returns the number of messages this worker sent, or None if it
+        could not start.
+        """
+        from sender_pool import SenderPool
+        from tab_pipeline import PIPELINE_TABS
+        from whatsapp_web import profile_dirs
+
+        if campaign_id is None:
+            unfinished = self.store.unfinished_campaigns()
+            if not unfinished:
+                self.log("ℹ No unfinished campaign to work on.")
+                return None
+            campaign_id = unfinished[0][0]
+        if self.store.campaign(campaign_id) is None:
+            self.log(f"❌ No campaign #{campaign_id}.")
+            return None
+
+        METRICS.reset()
+        profiles = profile_dirs(accounts, self.profile_base) if self.profile_base else profile_dirs(accounts)
+        pool = SenderPool(profiles, log=self.log, on_progress=self.on_progress, pacing=pacing,
+                          manager=self._sessions(), tabs=tabs or PIPELINE_TABS, claim=self._claim)
+        self.on_sessions(pool.sessions)
+        if not pool.start():
+            self.log("❌ No Chrome session could log in.")
+            pool.close()
+            return None
+        self.log(f"👷 {self.owner} working on campaign #{campaign_id} with {len(pool.healthy())} session(s).")
+
+        stop = threading.Event()
+
+        def heartbeat():
+            while True:
+                try:
+                    self.store.heartbeat(campaign_id, self.owner, sent=sum(s.sent for s in pool.sessions),
+                                         failed=sum(s.failed for s in pool.sessions))
+                except Exception as e:
+                    self.log(f"⚠ Heartbeat failed: {e}")
+                if stop.wait(HEARTBEAT_SECONDS):
+                    return
+
+        def messages():
+            while True:
+                with METRICS.timer("db_lease"):
+                    leased = self.store.lease_messages(campaign_id, self.owner, limit=LEASE_BATCH,
+                                                       lease_seconds=WORKER_LEASE)
+                for message_id, phone, name, body, encoded, sheet_row in leased:
+                    yield phone, encoded or urllib.parse.quote(body), (message_id, sheet_row)
+                if leased:
+                    continue
+                # Nothing to lease: done once nothing is queued or held by other workers (whose
+                # leases may still run out) and the campaign has been queued completely.
+                queued, others = self.store.pending_counts(campaign_id, self.owner)
+                if not queued and not others and self.store.campaign(campaign_id)["ingest_done"]:
+                    return
+                time.sleep(WORKER_POLL)
+
+        threading.Thread(target=heartbeat, daemon=True).start()
+        try:
+            pool.run(messages(), *self._result_handlers(owner=self.owner))
+        finally:
+            stop.set()
+            pool.close()
+        if pool.unsent:
+            self.store.requeue_owned(campaign_id, self.owner)
+            self.log(f"⚠ {len(pool.unsent)} messages put back in the queue — every session stopped.")
+        sent, failed = sum(s.sent for s in pool.sessions), sum(s.failed for s in pool.sessions)
+        try:
+            self.store.heartbeat(campaign_id, self.owner, sent=sent, failed=failed)
+        except Exception:
+            pass    # the coordinator may already be gone once the campaign is done
+        self.log(f"📊 {self.owner}: {sent} sent, {failed} failed for campaign #{campaign_id}.")
+        if METRICS.enabled:
+            METRICS.export(f"worker_{campaign_id}_{os.getpid()}_{datetime.datetime.now():%Y%m%d-%H%M%S}")
+        if finish and self.store.finish_campaign(campaign_id):
+            self.write_back(campaign_id)
+            self.log("🎉 All messages sent!")
+        return sent
+
+    def _claim(self, item):
+        try:
+            return self.store.renew_message(item[2][0], self.owner)
+        except Exception as e:
+            self.log(f"⚠ Could not confirm the lease for {item[0]} ({e}); not sending it.")
+            return False
+
+    def write_back(self, campaign_id):
+        """Write a campaign's results from the database into its workbook(s), as the journals do for
+        a single sender. Returns the number of rows written."""
+        from contact_source import merge_statuses, source_paths, split_row
+
+        campaign = self.store.campaign(campaign_id)
+        options = json.loads(campaign["options"] or "{}")
+        paths = source_paths(campaign["source"])
+        statuses = [{} for _ in paths]
+        for position, state, error in self.store.campaign_results(campaign_id):
+            if position is not None:
+                file_index, row = split_row(position)
+                statuses[file_index][row] = "" if state == SENT else "Invalid" if error == "INVALID" else "Failed"
+        written = 0
+        for path, file_statuses in zip(paths, statuses):
+            try:
+                merge_statuses(path, file_statuses, sheet_name=options.get("sheet_name"))
+            except Exception as e:
+                self.log(f"❌ Could not write statuses back to {path}: {e}")
+                continue
+            self.log(f"💾 {len(file_statuses)} statuses written to {path}.")
+            written += len(file_statuses)
+        return written
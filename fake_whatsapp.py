@@ -0,0 +1,204 @@
+"""
+fake_whatsapp.py
+Local stand-in for WhatsApp Web, for trying the sender without sending real messages.
+
+Serves pages shaped like the parts of WhatsApp Web the sender touches:
+  /                      logged-in app shell (contenteditable search box)
+  /send?phone=&text=     chat with the contenteditable data-tab='10' box and the
+                         span[data-icon='send'] button; invalid numbers get the
+                         "phone number shared via url is invalid" popup instead
+  /chat?phone=&text=     the same chat as a fragment; links to /send?... clicked
+                         inside the page load it in place, without a reload
+  /api/sent              JSON list of messages "sent" so far (POST /api/reset clears it)
+
+Latency is configurable per page load (--latency, plus a random --jitter), per
+full app boot (--boot) and per send (--send-delay); --invalid-rate turns a
+repeatable share of numbers into invalid ones. bench_sender.py drives it.
+
+Usage:
+    python fake_whatsapp.py --port 8765 --latency 0.3 --jitter 0.1 --boot 1.5
+    WHATSAPP_URL=http://127.0.0.1:8765 python main.py
+"""
+
+import argparse
+import html
+import json
+import random
+import threading
+import zlib
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+INVALID_PREFIX = "000"      # numbers starting with this are treated as not on WhatsApp
+
+SHELL = """<!doctype html>
+<html><head><title>WhatsApp</title></head>
+<body>
+  <div id="side"><div contenteditable="true" data-tab="3" title="Search input textbox"></div></div>
+  <div id="main">{main}</div>
+<script>
+  let sending = false;
+  function bind() {{
+    const box = document.querySelector("[data-tab='10']");
+    if (!box) return;
+    const phone = document.getElementById("chat").dataset.phone;
+    function send() {{
+      const text = box.innerText;
+      if (sending || !text) return;
+      sending = true;
+      setTimeout(() => {{
+        fetch("/api/sent", {{method: "POST", body: JSON.stringify({{phone: phone, text: text}})}});
+        const bubble = document.createElement("div");
+        bubble.className = "message-out";
+        bubble.innerText = text;
+        document.getElementById("messages").appendChild(bubble);
+        box.innerText = "";
+        const icon = document.querySelector("span[data-icon='send']");
+        if (icon) icon.remove();
+        sending = false;
+      }}, {send_delay_ms});
+    }}
+    box.addEventListener("keydown", e => {{ if (e.key === "Enter") {{ e.preventDefault(); send(); }} }});
+    document.getElementById("send-btn").addEventListener("click", send);
+  }}
+  // OK on the invalid-number popup closes it.
+  document.addEventListener("click", e => {{
+    const ok = e.target.closest("[data-animate-modal-popup] [role='button']");
+    if (ok) ok.closest("[data-animate-modal-popup]").remove();
+  }});
+  // Like the real app, send links clicked inside the page open the chat without a reload.
+  document.addEventListener("click", e => {{
+    const a = e.target.closest("a[href*='/send?']");
+    if (!a) return;
+    e.preventDefault();
+    const query = a.href.slice(a.href.indexOf("?"));
+    fetch("/chat" + query).then(r => r.text()).then(html => {{
+      document.getElementById("main").innerHTML = html;
+      bind();
+    }});
+  }}, true);
+  bind();
+</script>
+</body></html>
+"""
+
+CHAT_FRAGMENT = """
+    <div id="chat" data-phone="{phone}">
+      <div id="messages"></div>
+      <footer>
+        <div contenteditable="true" data-tab="10" role="textbox">{text}</div>
+        <button id="send-btn"><span data-icon="send"></span></button>
+      </footer>
+    </div>
+"""
+
+INVALID_FRAGMENT = """
+    <div data-animate-modal-popup="true" role="dialog">
+      <div data-animate-modal-body="true">Phone number shared via url is invalid.</div>
+      <div role="button">OK</div>
+    </div>
+"""
+
+
+class FakeWhatsApp:
+    def __init__(self, latency=0.2, send_delay=0.1, boot=1.0, jitter=0.0, invalid_rate=0.0):
+        self.latency = latency
+        self.boot = boot
+        self.send_delay = send_delay
+        self.jitter = jitter
+        self.invalid_rate = invalid_rate
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def page(self, main):
+        return SHELL.format(main=main, send_delay_ms=int(self.send_delay * 1000))
+
+    def delay(self):
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def is_invalid(self, phone):
+        if not phone.isdigit() or phone.startswith(INVALID_PREFIX):
+            return True
+        # Hash-based, so the same numbers are invalid on every run.
+        return self.invalid_rate > 0 and zlib.crc32(phone.encode()) % 10000 < self.invalid_rate * 10000
+
+    def chat_fragment(self, phone, text):
+        if self.is_invalid(phone):
+            return INVALID_FRAGMENT
+        return CHAT_FRAGMENT.format(phone=html.escape(phone), text=html.escape(text))
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body, content_type="text/html; charset=utf-8", status=200):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/api/sent":
+                with state.lock:
+                    return self._reply(json.dumps(state.sent), "application/json")
+            time.sleep(state.delay())
+            if url.path != "/chat":
+                time.sleep(state.boot)  # a full page load re-boots the whole app
+            if url.path in ("/send", "/chat"):
+                query = parse_qs(url.query)
+                fragment = state.chat_fragment(query.get("phone", [""])[0], query.get("text", [""])[0])
+                if url.path == "/chat":
+                    return self._reply(fragment)
+                return self._reply(state.page(fragment))
+            return self._reply(state.page(""))
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with state.lock:
+                if url.path == "/api/sent":
+                    entry = json.loads(body or b"{}")
+                    entry["ts"] = time.time()
+                    state.sent.append(entry)
+                elif url.path == "/api/reset":
+                    state.sent.clear()
+            return self._reply("{}", "application/json")
+
+    return Handler
+
+
+def start_server(port=0, latency=0.2, send_delay=0.1, boot=1.0, jitter=0.0, invalid_rate=0.0):
+    """Start the fake server on a background thread. Returns (server, state, base_url)."""
+    state = FakeWhatsApp(latency=latency, send_delay=send_delay, boot=boot, jitter=jitter,
+                         invalid_rate=invalid_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for WhatsApp Web.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every page load")
+    parser.add_argument("--send-delay", type=float, default=0.1, help="seconds before a sent bubble appears")
+    parser.add_argument("--boot", type=float, default=1.0, help="extra seconds for a full page load")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many random seconds added to --latency")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="share of numbers answered as invalid (0-1)")
+    args = parser.parse_args()
+    server, _, url = start_server(args.port, args.latency, args.send_delay, args.boot, args.jitter,
+                                  args.invalid_rate)
+    print(f"Fake WhatsApp Web on {url} — set WHATSAPP_URL={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+ingest.py
+Contact ingestion shared by the GUI (main.py) and whatsapp_bulk_send.py.
+
+Status filtering, digit stripping, number normalization (per-country rules,
+see phone_numbers.py), blank dropping and de-duplication all run as
+vectorized pandas string operations. Numbers the rules reject come out blank
+and are dropped with the blanks. clean_phone / normalize_number are kept as
+the per-value reference implementation; clean_numbers() returns exactly what
+series.apply(clean_phone).apply(normalize_number) would.
+
+Duplicates are dropped across the whole stream (every batch of every file of
+a campaign); ContactIndex then drops phones the database says to leave alone.
+"""
+
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from phone_numbers import rules_for
+
+
+# ---------------- Reference (per value) ----------------
+def clean_phone(number_str) -> str:
+    """Normalize phone number: remove spaces, plus signs and non-digit chars.
+
+    A trailing ".0" (a number read as a float) is dropped and digits of other
+    scripts (e.g. Arabic-Indic) become ASCII digits.
+    """
+    if pd.isna(number_str):
+        return ""
+    s = str(number_str)
+    if s.endswith(".0"):
+        s = s[:-2]
+    return "".join(str(unicodedata.decimal(ch)) for ch in s if ch.isdecimal())
+
+def normalize_number(number: str, country=None) -> str:
+    """International form of a cleaned number, or "" if it is not valid (see phone_numbers.py)."""
+    number = number.strip().replace(" ", "").replace("-", "")
+    return rules_for(country).normalize(number)
+
+
+# ---------------- Vectorized ----------------
+def clean_numbers(numbers: pd.Series, country=None) -> pd.Series:
+    """Vectorized clean_phone + normalize_number over a whole column."""
+    text = numbers.astype(str).where(numbers.notna(), "")
+
+    # Digits of other scripts (e.g. Arabic-Indic) are not matched by the regex below,
+    # so those rare cells take the slow path.
+    non_ascii = text.str.contains(r"[^\x00-\x7f]", regex=True)
+    digits = text.str.replace(r"\.0$|[^0-9]", "", regex=True)
+    out = rules_for(country).normalize_column(digits)
+
+    if non_ascii.any():
+        out[non_ascii] = [normalize_number(clean_phone(v), country) for v in numbers[non_ascii]]
+    return out
+
+def prepare_contacts(df, phone_column="number", status_column="status", status_value="applied",
+                     seen=None, country=None):
+    """Filter, clean and de-duplicate a contacts sheet (`country`: see phone_numbers.rules_for).
+
+    Returns (contacts, stats): contacts keeps only eligible rows (first occurrence of each
+    phone, index reset) and stats holds the row counts after each stage. When `seen` is a
+    set, phones already in it are dropped and the new ones are added, so consecutive
+    batches of one file are de-duplicated against each other.
+    """
+    stats = {"rows": len(df)}
+    if status_column:
+        statuses = df[status_column].astype("string").str.strip().str.lower()
+        df = df[(statuses == status_value).fillna(False).to_numpy(dtype=bool)]
+    stats["matched"] = len(df)
+
+    df = df.assign(**{phone_column: clean_numbers(df[phone_column], country)})
+    df = df[df[phone_column] != ""]
+    stats["valid"] = len(df)
+
+    df = df.drop_duplicates(subset=[phone_column])
+    if seen is not None:
+        df = df[~df[phone_column].isin(seen)]
+        seen.update(df[phone_column])
+    df = df.reset_index(drop=True)
+    stats["unique"] = len(df)
+    return df, stats
+
+def prepare_batches(batches, totals, **kwargs):
+    """Run prepare_contacts over a stream of batches, skipping empty results.
+
+    Stage counts are summed into the `totals` dict as the stream is consumed.
+    """
+    seen = set()
+    for batch in batches:
+        contacts, stats = prepare_contacts(batch, seen=seen, **kwargs)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        if not contacts.empty:
+            yield contacts
+
+
+# ---------------- Contact index ----------------
+class ContactIndex:
+    """Phones a campaign must skip, held in memory for the whole ingestion.
+
+    `recent`: sent within the recency window; `invalid`: rejected by WhatsApp within
+    INVALID_TTL; `pending`: queued or in flight in another unfinished campaign. Seeded
+    with one indexed query each, so batches are checked with hash lookups instead of
+    a database round trip per batch.
+    """
+
+    def __init__(self, recent=(), invalid=(), pending=()):
+        self.recent = set(recent)
+        self.invalid = set(invalid)
+        self.pending = set(pending)
+
+    @classmethod
+    def from_store(cls, store, campaign_id=None, recent_days=None):
+        """`recent_days`: numbers sent within that many days are skipped (None: sent ever, 0: none)."""
+        since = None if recent_days is None else time.time() - recent_days * 86400
+        return cls(store.contacted_since(since), store.invalid_since(), store.pending_elsewhere(campaign_id))
+
+    def skipped(self, phones):
+        """{reason: boolean mask} over a Series of phones; a phone counts under its first reason only."""
+        values = phones.tolist()
+        masks, taken = {}, np.zeros(len(values), dtype=bool)
+        for reason, index in (("invalid", self.invalid), ("recent", self.recent), ("pending", self.pending)):
+            if not index:
+                masks[reason] = np.zeros(len(values), dtype=bool)
+                continue
+            masks[reason] = np.fromiter(map(index.__contains__, values), dtype=bool, count=len(values)) & ~taken
+            taken |= masks[reason]
+        return masks
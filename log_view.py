@@ -0,0 +1,69 @@
+"""
+log_view.py
+Thread-safe log pipeline for the GUI.
+
+Worker threads only push lines (or small UI callbacks) onto a queue. The Tk
+main loop drains it every DRAIN_MS in batches, appends the lines to the textbox
+in a single insert and trims the widget so it never holds more than MAX_LINES. Every line can also be
+appended to a log file, so nothing is lost when old lines scroll out.
+"""
+
+import datetime
+import queue
+
+MAX_LINES = 2000        # lines kept in the log widget
+DRAIN_MS = 100          # how often the Tk loop pulls queued lines
+MAX_BATCH = 5000        # lines handled per drain, so a flood cannot stall the UI
+LOG_FILE = "whatsapp_bulk.log"
+
+
+class LogPump:
+    def __init__(self, root, textbox, max_lines=MAX_LINES, log_file=LOG_FILE):
+        self.root = root
+        self.textbox = textbox
+        self.max_lines = max_lines
+        self.queue = queue.SimpleQueue()
+        self.lines_in_widget = 0
+        self.file = open(log_file, "a", encoding="utf-8") if log_file else None
+        self.root.after(DRAIN_MS, self.drain)
+
+    def push(self, text):
+        """Queue one line; safe to call from any thread."""
+        self.queue.put(text)
+
+    def call(self, fn):
+        """Run fn() on the Tk thread at the next drain; safe to call from any thread."""
+        self.queue.put(fn)
+
+    def drain(self):
+        lines, calls = [], []
+        try:
+            while len(lines) + len(calls) < MAX_BATCH:
+                item = self.queue.get_nowait()
+                (calls if callable(item) else lines).append(item)
+        except queue.Empty:
+            pass
+        for fn in calls:
+            fn()
+
+        if lines:
+            if self.file:
+                stamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self.file.writelines(f"{stamp} {line}\n" for line in lines)
+                self.file.flush()
+            shown = lines[-self.max_lines:]
+            self.textbox.insert("end", "\n".join(shown) + "\n")
+            self.lines_in_widget += sum(1 + line.count("\n") for line in shown)
+            excess = self.lines_in_widget - self.max_lines
+            if excess > 0:
+                self.textbox.delete("1.0", f"{excess + 1}.0")
+                self.lines_in_widget -= excess
+            self.textbox.see("end")
+
+        # Come back sooner while there is still a backlog.
+        self.root.after(1 if len(lines) + len(calls) >= MAX_BATCH else DRAIN_MS, self.drain)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
@@ -1,134 +1,16 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog
-import pandas as pd
-import time
-import urllib.parse
 import threading
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from contacts_db import ContactStore, DB_FILE
+from engine import SendEngine
+from pacing import PER_MINUTE, PER_HOUR
+from log_view import LogPump
+from contacts_view import ContactsViewer
+from metrics import METRICS
 
-import sqlite3
-import datetime
-
-# ---------------- Driver ----------------
-def init_driver(headless=False):
-    options = webdriver.ChromeOptions()
-    options.add_argument(r"--user-data-dir=C:\chrome-whatsapp-profile")
-    options.add_argument("--start-maximized")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
-    options.binary_location = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-
-    if headless:
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-    try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.get("https://web.whatsapp.com")
-        return driver
-    except Exception as e:
-        print("[ERROR] Failed to start Chrome:", e)
-        return None
-
-def wait_for_login(driver, timeout=60):
-    try:
-        WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true']"))
-        )
-        return True
-    except:
-        return False
-
-# ---------------- Database ----------------
-DB_FILE = "whatsapp_contacts.db"
-
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS contacts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            phone TEXT UNIQUE,
-            name TEXT,
-            status TEXT,
-            timestamp TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-def add_contact(phone, name):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    try:
-        c.execute("INSERT OR IGNORE INTO contacts (phone, name, status) VALUES (?, ?, ?)",
-                  (phone, name, "Pending"))
-        conn.commit()
-    except Exception as e:
-        print("DB insert error:", e)
-    conn.close()
-
-def update_status(phone, status):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("UPDATE contacts SET status=?, timestamp=? WHERE phone=?", (status, timestamp, phone))
-    conn.commit()
-    conn.close()
-
-# ---------------- Phone cleaning ----------------
-def clean_phone(number_str):
-    if pd.isna(number_str):
-        return ""
-    s = str(number_str)
-    return "".join(ch for ch in s if ch.isdigit())
-
-def normalize_number(number: str) -> str:
-    number = number.strip().replace(" ", "").replace("-", "")
-    if number.startswith("92") and len(number) == 12:
-        return number
-    if number.startswith("03") and len(number) == 11:
-        return "92" + number[1:]
-    if number.startswith("0") and len(number) >= 10:
-        return "92" + number[1:]
-    if number.startswith("3") and len(number) == 10:
-        return "92" + number
-    return number
-
-# ---------------- WhatsApp ----------------
-def send_message_to_number(driver, phone, encoded_message, log_callback):
-    url = f"https://web.whatsapp.com/send?phone={phone}&text={encoded_message}"
-    try:
-        driver.get(url)
-        chat_box = WebDriverWait(driver, 8).until(
-            EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true' and @data-tab='10']"))
-        )
-        time.sleep(0.5)
-        chat_box.click()
-        chat_box.send_keys(Keys.ENTER)
-        time.sleep(0.5)
-        # fallback send button
-        try:
-            send_btn = driver.find_element(By.XPATH, "//span[@data-icon='send']")
-            send_btn.click()
-        except:
-            pass
-        log_callback(f"✔ Sent to {phone}")
-        return True
-    except:
-        log_callback(f"❌ Skipped invalid/failed number: {phone}")
-        return False
+METRICS_REFRESH_MS = 1000
 
 # ---------------- GUI ----------------
 class WhatsAppModernApp(ctk.CTk):
@@ -139,6 +21,12 @@ class WhatsAppModernApp(ctk.CTk):
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
         self.excel_path = ""
+        self.store = ContactStore(DB_FILE)
+        # The engine keeps browsers warm between campaigns; it reports back from worker threads.
+        self.engine = SendEngine(self.store, log=self.log, on_progress=self.update_session,
+                                 on_sessions=lambda sessions: self.log_pump.call(lambda: self.show_sessions(sessions)))
+        self.contacts_viewer = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Header
         header = ctk.CTkLabel(self, text="WhatsApp Bulk Messaging App", font=("Poppins", 28, "bold"))
@@ -161,10 +49,38 @@ class WhatsAppModernApp(ctk.CTk):
         self.message_box.insert("1.0", "Assalamualaikum {name},\nThis is an automated message.")
         self.message_box.pack(pady=10)
 
+        # Parallel accounts (one Chrome profile each)
+        accounts_frame = ctk.CTkFrame(self, corner_radius=15)
+        accounts_frame.pack(pady=5, padx=20, fill="x")
+        ctk.CTkLabel(accounts_frame, text="Parallel accounts:", font=("Poppins", 14)).pack(side="left", padx=10, pady=5)
+        self.accounts_menu = ctk.CTkOptionMenu(accounts_frame, values=[str(n) for n in range(1, 9)], width=70)
+        self.accounts_menu.set("1")
+        self.accounts_menu.pack(side="left", pady=5)
+        ctk.CTkLabel(accounts_frame, text="Max/min:", font=("Poppins", 12)).pack(side="left", padx=(15, 5))
+        self.per_minute_entry = ctk.CTkEntry(accounts_frame, width=50)
+        self.per_minute_entry.insert(0, str(PER_MINUTE))
+        self.per_minute_entry.pack(side="left")
+        ctk.CTkLabel(accounts_frame, text="Max/hour:", font=("Poppins", 12)).pack(side="left", padx=(10, 5))
+        self.per_hour_entry = ctk.CTkEntry(accounts_frame, width=60)
+        self.per_hour_entry.insert(0, str(PER_HOUR))
+        self.per_hour_entry.pack(side="left")
+        ctk.CTkLabel(accounts_frame, text="Tabs:", font=("Poppins", 12)).pack(side="left", padx=(10, 5))
+        self.tabs_menu = ctk.CTkOptionMenu(accounts_frame, values=[str(n) for n in range(1, 5)], width=60)
+        self.tabs_menu.set("1")
+        self.tabs_menu.pack(side="left")
+        self.sessions_frame = ctk.CTkFrame(accounts_frame, fg_color="transparent")
+        self.sessions_frame.pack(side="left", padx=10, fill="x", expand=True)
+        self.session_labels = {}
+        self.metrics_label = ctk.CTkLabel(self, text="", font=("Poppins", 12), text_color="gray80")
+        self.metrics_label.pack(pady=(0, 5))
+
         # Buttons
         send_button = ctk.CTkButton(self, text="Start Sending", font=("Poppins", 16, "bold"),
                                     command=self.start_sending_thread, height=45, corner_radius=10)
         send_button.pack(pady=10)
+        resume_button = ctk.CTkButton(self, text="Resume Campaign", font=("Poppins", 14, "bold"),
+                                      command=self.resume_campaign_thread, height=40, corner_radius=10)
+        resume_button.pack(pady=5)
         view_button = ctk.CTkButton(self, text="View Contacts & Status", font=("Poppins", 14, "bold"),
                                      command=self.show_contacts, height=40, corner_radius=10)
         view_button.pack(pady=5)
@@ -175,173 +91,86 @@ class WhatsAppModernApp(ctk.CTk):
         ctk.CTkLabel(log_frame, text="Log Output:", font=("Poppins", 14)).pack(pady=5)
         self.log_window = ctk.CTkTextbox(log_frame, height=200, width=700)
         self.log_window.pack(padx=10, pady=10)
+        self.log_pump = LogPump(self, self.log_window)
+        self.refresh_metrics()
 
     # ---------------- GUI Methods ----------------
     def choose_file(self):
-        self.excel_path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
+        self.excel_path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx"), ("CSV Files", "*.csv")])
         if self.excel_path:
             self.file_label.configure(text=self.excel_path, text_color="white")
 
+    def on_close(self):
+        self.engine.close()
+        self.store.close()
+        self.log_pump.close()
+        self.destroy()
+
+    def show_sessions(self, sessions):
+        for label in self.session_labels.values():
+            label.destroy()
+        self.session_labels = {}
+        for session in sessions:
+            label = ctk.CTkLabel(self.sessions_frame, text=session.summary(), font=("Poppins", 12), anchor="w")
+            label.pack(fill="x")
+            self.session_labels[session.index] = label
+
+    def update_session(self, session):
+        # Looked up on the UI thread, after show_sessions() has made the labels.
+        def refresh():
+            label = self.session_labels.get(session.index)
+            if label:
+                label.configure(text=session.summary())
+        self.log_pump.call(refresh)
+
+    def refresh_metrics(self):
+        self.metrics_label.configure(text=METRICS.live_line() if METRICS.enabled else "Metrics off")
+        self.after(METRICS_REFRESH_MS, self.refresh_metrics)
+
     def log(self, text):
-        self.log_window.insert("end", text + "\n")
-        self.log_window.see("end")
-        self.update()
+        # Called from worker threads: only queue the line, the Tk loop renders it.
+        self.log_pump.push(text)
 
     def show_contacts(self):
-        contacts_window = ctk.CTkToplevel(self)
-        contacts_window.title("Contacts & Status")
-        contacts_window.geometry("600x400")
-        frame = ctk.CTkFrame(contacts_window, corner_radius=15)
-        frame.pack(padx=10, pady=10, fill="both", expand=True)
-        textbox = ctk.CTkTextbox(frame, width=580, height=350)
-        textbox.pack(padx=10, pady=10, fill="both", expand=True)
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT phone, name, status, timestamp FROM contacts")
-        rows = c.fetchall()
-        conn.close()
-        textbox.insert("0.0", f"{'Phone':<15}{'Name':<20}{'Status':<10}{'Timestamp':<20}\n")
-        textbox.insert("0.0", "-"*70 + "\n")
-        for row in rows:
-            phone, name, status, timestamp = row
-            timestamp = timestamp if timestamp else "-"
-            textbox.insert("end", f"{phone:<15}{name:<20}{status:<10}{timestamp:<20}\n")
-        textbox.configure(state="disabled")
+        if self.contacts_viewer and self.contacts_viewer.winfo_exists():
+            self.contacts_viewer.focus()
+            return
+        self.contacts_viewer = ContactsViewer(self, self.store)
 
     # ---------------- Thread ----------------
     def start_sending_thread(self):
         threading.Thread(target=self.start_sending, daemon=True).start()
 
+    def resume_campaign_thread(self):
+        threading.Thread(target=self.resume_campaign, daemon=True).start()
+
     # ---------------- Sending ----------------
     def start_sending(self):
         if not self.excel_path:
             self.log("❌ Please select an Excel file first.")
             return
-
         message_template = self.message_box.get("1.0", "end").strip()
-
-        try:
-            df = pd.read_excel(self.excel_path)
-        except:
-            self.log("❌ Could not read Excel file.")
+        pacing = self.read_pacing()
+        if pacing is None:
             return
-        
-        # Ensure 'number' and 'status' columns exist
-        if "number" not in df.columns or "status" not in df.columns:
-            self.log("❌ Excel must have 'number' and 'status' columns.")
-            return
-
-        # Filter only rows where status is 'Applied'
-        df = df[df["status"].str.strip().str.lower() == "applied"].reset_index(drop=True)
+        self.engine.start(self.excel_path, message_template, accounts=int(self.accounts_menu.get()), pacing=pacing,
+                          tabs=int(self.tabs_menu.get()))
 
-        if df.empty:
-            self.log("❌ No contacts with status 'Applied' found.")
+    def resume_campaign(self):
+        pacing = self.read_pacing()
+        if pacing is None:
             return
+        self.engine.resume(accounts=int(self.accounts_menu.get()), pacing=pacing, tabs=int(self.tabs_menu.get()))
 
-        # Clean and normalize numbers
-        df["number"] = df["number"].apply(clean_phone).apply(normalize_number)
-        df = df[df["number"] != ""].reset_index(drop=True)
-        if df.empty:
-            self.log("❌ No valid phone numbers after cleaning.")
-            return
-        
-        if "WhatsApp Status" not in df.columns:
-            df["WhatsApp Status"] = ""
-
-        # Add contacts to DB
-        for _, row in df.iterrows():
-            phone = row["number"]
-            name = row.get("name", "")
-            add_contact(phone, name)
-
-        # if "number" not in df.columns:
-        #     self.log("❌ Excel missing 'number' column.")
-        #     return
-
-        # df["number"] = df["number"].apply(clean_phone).apply(normalize_number)
-        # df = df[df["number"] != ""].reset_index(drop=True)
-        # if df.empty:
-        #     self.log("❌ No valid phone numbers.")
-        #     return
-
-        # # Add contacts to DB
-        # for _, row in df.iterrows():
-        #     phone = row["number"]
-        #     name = row.get("name", "")
-        #     add_contact(phone, name)
-
-        # ---------------- Chrome Login ----------------
-        self.log("🚀 Launching Chrome for login…")
-        driver = init_driver(headless=False)
-        if not driver:
-            self.log("❌ Could not start Chrome.")
-            return
-
-        self.log("📱 Please scan QR if needed…")
-        if not wait_for_login(driver, timeout=120):
-            self.log("❌ Login failed or timeout.")
-            driver.quit()
-            return
-        self.log("✅ Login successful!")
-        driver.quit()
-
-        # ---------------- Chrome Headless ----------------
-        self.log("🚀 Relaunching Chrome in background (headless)…")
-        driver = init_driver(headless=True)
-        if not driver:
-            self.log("❌ Could not start Chrome headless.")
-            return
-        self.log("✅ Chrome ready for sending…")
-
-        # ---------------- Sending Loop ----------------
-        for i, row in df.iterrows():
-            phone = row["number"]
-            name = row.get("name", "")
-
-            # Skip already sent
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute("SELECT status FROM contacts WHERE phone=?", (phone,))
-            result = c.fetchone()
-            conn.close()
-            if result and result[0] == "Sent":
-                self.log(f"⚠ Skipping {phone} — already sent.")
-                continue
-
-            try:
-                msg = message_template.format(name=name)
-            except:
-                msg = message_template
-
-            encoded = urllib.parse.quote(msg)
-            self.log(f"➡ Sending to {phone} ({i+1}/{len(df)})…")
-            success = send_message_to_number(driver, phone, encoded, self.log)
-
-            if success:
-                update_status(phone, "Sent")
-                df.loc[i, "WhatsApp Status"] = ""  # leave blank for valid
-            else:
-                update_status(phone, "Failed")
-                df.loc[i, "WhatsApp Status"] = "Invalid"  # mark invalid
-
-            # Save Excel after each row (optional, safe)
-            df.to_excel(self.excel_path, index=False)
-
-            # encoded = urllib.parse.quote(msg)
-            # self.log(f"➡ Sending to {phone} ({i+1}/{len(df)})…")
-            # success = send_message_to_number(driver, phone, encoded, self.log)
-            # if success:
-            #     update_status(phone, "Sent")
-            # else:
-            #     update_status(phone, "Failed")
-            time.sleep(4)
-
-        self.log("🎉 All messages sent!")
-        driver.quit()
+    def read_pacing(self):
+        try:
+            return {"per_minute": int(self.per_minute_entry.get()), "per_hour": int(self.per_hour_entry.get())}
+        except ValueError:
+            self.log("❌ Max/min and Max/hour must be whole numbers.")
+            return None
 
 
 # ---------------- RUN ----------------
 if __name__ == "__main__":
-    init_db()
     app = WhatsAppModernApp()
     app.mainloop()
\ No newline at end of file
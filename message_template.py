@@ -0,0 +1,151 @@
+"""
+message_template.py
+Message templates, compiled once per campaign.
+
+A template is plain text with {column} placeholders naming sheet columns, each
+optionally with a default for blank cells: "Hi {name|there}, your order ships
+to {city|your city}". {{ and }} stand for literal braces. compile_template()
+parses the text once and resolves every placeholder against the sheet's
+columns (exact name first, then ignoring case and surrounding spaces), so an
+unknown placeholder is reported before the campaign starts instead of the raw
+template being sent.
+
+Template.render() fills in a whole batch (a DataFrame) at once and returns the
+message bodies and their URL-encoded form. Rows are grouped by their field
+values first, so each distinct message is rendered and encoded only once, and
+the results are cached across batches.
+
+pandas is only imported by render(), so checking a template stays fast.
+"""
+
+import datetime
+import re
+import urllib.parse
+
+CACHE_SIZE = 50000      # distinct rendered messages kept across batches
+
+# {{ or }} (literal braces), or {field} / {field|default}
+TOKEN = re.compile(r"\{\{|\}\}|\{([^{}|]*)(?:\|([^{}]*))?\}")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def parse(text):
+    """Split text into literal strings and (field, default) placeholders, in order."""
+    parts, literal, pos = [], [], 0
+    for match in TOKEN.finditer(text):
+        literal.append(text[pos:match.start()])
+        pos = match.end()
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            literal.append(token[0])
+            continue
+        field = match.group(1).strip()
+        if not field:
+            raise TemplateError(f"empty placeholder {token}")
+        parts.append("".join(literal))
+        parts.append((field, match.group(2) or ""))
+        literal = []
+    literal.append(text[pos:])
+    parts.append("".join(literal))
+    return parts
+
+def resolve(field, columns):
+    if field in columns:
+        return field
+    wanted = field.strip().lower()
+    return next((c for c in columns if str(c).strip().lower() == wanted), None)
+
+def compile_template(text, columns, aliases=None, optional=()):
+    """Compile text against a sheet's columns.
+
+    `aliases` maps placeholder names to columns (e.g. {"name": the configured name
+    column}); placeholders listed in `optional` render blank (or their default) when
+    no column matches instead of failing. Raises TemplateError naming every unknown
+    placeholder.
+    """
+    aliases = aliases or {}
+    columns = list(columns)
+    parts, unknown = parse(text), []
+    for i, part in enumerate(parts):
+        if not isinstance(part, tuple):
+            continue
+        field, default = part
+        column = resolve(aliases[field], columns) if aliases.get(field) else None
+        column = column or resolve(field, columns)
+        if column is None and field not in optional:
+            unknown.append(field)
+        parts[i] = (column, default)
+    if unknown:
+        raise TemplateError(f"no column for {', '.join('{' + f + '}' for f in dict.fromkeys(unknown))} "
+                            f"(columns: {', '.join(map(str, columns))})")
+    return Template(text, parts)
+
+
+class Template:
+    def __init__(self, text, parts):
+        self.text = text
+        self.parts = parts      # literal strings alternating with (column or None, default)
+        self.columns = list(dict.fromkeys(p[0] for p in parts if isinstance(p, tuple) and p[0] is not None))
+        self._cache = {}
+
+    def fill(self, values):
+        """Message for one row given {column: cell text}."""
+        out = []
+        for part in self.parts:
+            if isinstance(part, tuple):
+                column, default = part
+                out.append(values.get(column, "") or default)
+            else:
+                out.append(part)
+        return "".join(out)
+
+    def _rendered(self, key):
+        cached = self._cache.get(key)
+        if cached is None:
+            body = self.fill(dict(zip(self.columns, key)))
+            cached = (body, urllib.parse.quote(body))
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = cached
+        return cached
+
+    def render(self, df):
+        """(bodies, encoded) for every row of df, as lists in row order."""
+        import numpy as np
+        import pandas as pd
+
+        if not self.columns:
+            body, encoded = self._rendered(())
+            return [body] * len(df), [encoded] * len(df)
+        # One integer per row identifying its combination of field values.
+        coded = [column_codes(df[column]) for column in self.columns]
+        rows = coded[0][0]
+        for codes, texts in coded[1:]:
+            rows, _ = pd.factorize(rows * len(texts) + codes)
+        rows, _ = pd.factorize(rows)
+        _, first = np.unique(rows, return_index=True)
+        rendered = [self._rendered(tuple(texts[codes[i]] for codes, texts in coded)) for i in first]
+        bodies = np.array([b for b, _ in rendered], dtype=object)[rows]
+        encoded = np.array([e for _, e in rendered], dtype=object)[rows]
+        return bodies.tolist(), encoded.tolist()
+
+
+def cell_text(value):
+    """How a cell reads in a message: whole numbers lose their ".0", dates their midnight time."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        return value.date().isoformat()
+    return str(value).strip()
+
+def column_codes(series):
+    """(codes, texts): texts[codes[i]] is the cell_text() of row i, each distinct value converted once."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series)
+    texts = [cell_text(v) for v in uniques] + [""]
+    codes[codes < 0] = len(uniques)         # blank cells read as ""
+    return codes, texts
@@ -0,0 +1,182 @@
+"""
+metrics.py
+Per-stage timings and counters for the send pipeline.
+
+Code under measurement calls METRICS.observe(stage, seconds), METRICS.inc(counter)
+or wraps a block in `with METRICS.timer(stage):`. Histograms use fixed buckets
+(for the Prometheus export) plus a window of recent samples (for p50/p95/p99
+in the JSON summary and the GUI). Everything is guarded by one lock.
+
+Set WHATSAPP_METRICS=0 to switch instrumentation off; every call then returns
+straight away and timer() hands back a shared no-op context manager.
+"""
+
+import bisect
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("WHATSAPP_METRICS", "1") != "0"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)   # seconds
+WINDOW = 2048               # recent samples kept per stage for percentiles
+METRICS_DIR = "metrics"
+PREFIX = "whatsapp_sender"
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)     # last slot: above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = collections.deque(maxlen=WINDOW)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def summary(self):
+        recent = list(self.recent)
+        return {"count": self.count, "mean_ms": round(self.sum / self.count * 1000, 1) if self.count else 0.0,
+                "max_ms": round(self.max * 1000, 1),
+                **{f"p{p}_ms": round(percentile(recent, p) * 1000, 1) for p in (50, 95, 99) if recent}}
+
+
+class Metrics:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = collections.Counter()
+            self.started = time.time()
+
+    # ---------------- Recording ----------------
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, counter, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[counter] += amount
+
+    def timer(self, stage):
+        """Context manager timing its block into `stage`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def timed(self, iterable, stage):
+        """Yield from iterable, timing how long each item takes to produce."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - started)
+            yield item
+
+    def observe_timings(self, timings, prefix=""):
+        """Record every numeric entry of a send_message_to_number() timings dict."""
+        if not self.enabled:
+            return
+        for stage, seconds in timings.items():
+            if isinstance(seconds, float):
+                self.observe(prefix + stage, seconds)
+
+    # ---------------- Export ----------------
+    def summary(self):
+        """JSON-ready dict: counters, per-stage latency summaries and elapsed time."""
+        with self.lock:
+            return {"elapsed_s": round(time.time() - self.started, 1),
+                    "counters": dict(self.counters),
+                    "stages": {stage: h.summary() for stage, h in sorted(self.histograms.items())}}
+
+    def prometheus(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for counter, value in sorted(self.counters.items()):
+                name = f"{PREFIX}_{counter}_total"
+                lines += [f"# TYPE {name} counter", f"{name} {value}"]
+            name = f"{PREFIX}_stage_seconds"
+            if self.histograms:
+                lines.append(f"# TYPE {name} histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h.buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def live_line(self):
+        """One short line for the GUI."""
+        with self.lock:
+            c = self.counters
+            text = (f"sent {c['sent']} · failed {c['failed']} · skipped {c['skipped']} · "
+                    f"retries {c['retries']}")
+            total = self.histograms.get("send_total")
+            if total and total.recent:
+                recent = list(total.recent)
+                text += f" · p50 {percentile(recent, 50):.2f}s · p95 {percentile(recent, 95):.2f}s per message"
+            return text
+
+    def export(self, name, directory=METRICS_DIR):
+        """Write <name>.prom and <name>.json under directory. Returns the base path."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        with open(base + ".prom", "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return base
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "started")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+METRICS = Metrics()
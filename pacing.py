@@ -0,0 +1,76 @@
+"""
+pacing.py
+Rate limiting for the gap between contacts.
+
+RateLimiter is a token bucket refilled at the highest sustained rate allowed by
+the per-minute and per-hour caps, with a small random jitter on every gap so
+sends do not tick like a metronome. The caps are also enforced as hard sliding
+windows, so a burst can never exceed them.
+"""
+
+import collections
+import random
+import time
+
+PER_MINUTE = 12     # max sends per minute (per session)
+PER_HOUR = 400      # max sends per hour (per session)
+MIN_GAP = 1.0       # never send two messages closer than this (seconds)
+JITTER = 1.0        # up to this many random seconds added to each gap
+BURST = 1           # sends allowed back-to-back after an idle period
+
+
+class RateLimiter:
+    def __init__(self, per_minute=PER_MINUTE, per_hour=PER_HOUR, min_gap=MIN_GAP, jitter=JITTER,
+                 burst=BURST, clock=time.monotonic, sleep=time.sleep):
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.min_gap = min_gap
+        self.jitter = jitter
+        self.burst = burst
+        self.rate = min(per_minute / 60.0, per_hour / 3600.0)  # tokens per second
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.last = None
+        self.recent = collections.deque()  # send times within the last hour
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        while self.recent and now - self.recent[0] >= 3600:
+            self.recent.popleft()
+
+    def delay(self, now=None):
+        """Seconds to wait before the next send is allowed (0 if it may go now)."""
+        now = self.clock() if now is None else now
+        self._refill(now)
+        waits = [0.0]
+        if self.tokens < 1:
+            waits.append((1 - self.tokens) / self.rate)
+        if self.last is not None:
+            waits.append(self.last + self.min_gap - now)
+        if len(self.recent) >= self.per_hour:
+            waits.append(self.recent[-self.per_hour] + 3600 - now)
+        in_minute = [t for t in self.recent if now - t < 60]
+        if len(in_minute) >= self.per_minute:
+            waits.append(in_minute[-self.per_minute] + 60 - now)
+        return max(waits)
+
+    def acquire(self):
+        """Block until a send is allowed, then take the slot. Returns the seconds waited."""
+        started = self.clock()
+        extra = random.uniform(0, self.jitter) if self.jitter else 0.0
+        while True:
+            wait = self.delay()
+            if wait <= 1e-6:  # float rounding on refill must not spin forever
+                break
+            self.sleep(wait)
+        if extra:
+            self.sleep(extra)
+        now = self.clock()
+        self._refill(now)
+        self.tokens -= 1
+        self.last = now
+        self.recent.append(now)
+        return now - started
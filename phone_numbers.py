@@ -0,0 +1,194 @@
+"""
+phone_numbers.py
+Rule-table phone number normalization for several countries.
+
+Every number is turned into its international form without "+" (the form
+wa.me links and WhatsApp Web expect), or into "" when it cannot be a valid
+number, so malformed numbers are dropped at ingestion instead of failing one
+by one in the browser. Each country in RULES gives its calling code, national
+trunk prefix, the possible lengths of the national number and, optionally,
+its mobile prefixes with the lengths of mobile numbers: a number starting with
+a mobile prefix is only valid at those lengths, so a mobile number missing a
+digit is rejected in every form. One country is the default: numbers written
+without a calling code are read as its numbers.
+
+A number made of digits only (see ingest.clean_phone) is read as the first of:
+  1. an international number of the default country      923001234567
+  2. 00 + an international number of any listed country  00447911123456
+  3. a national number with the default trunk prefix     03001234567
+  4. a national mobile number without trunk prefix       3001234567
+  5. an international number of any listed country       447911123456
+Calling codes are prefix-free, so the listed countries compile into one regex
+shaped like a trie over their codes ("9(?:1...|2...)"), which matches in one
+pass however many countries there are. PhoneRules.normalize_column() applies
+the whole ladder to a pandas column with a handful of vectorized string
+operations.
+
+To support another country, add its row to RULES.
+"""
+
+import functools
+import os
+import re
+
+DEFAULT_COUNTRY = os.environ.get("WHATSAPP_COUNTRY", "PK").upper()
+
+# country: (calling code, trunk prefix, national number lengths, {mobile prefix: mobile number lengths})
+# A national number starting with a mobile prefix must have one of that prefix's lengths (prefix included).
+RULES = {
+    "PK": ("92", "0", (9, 10), {"3": (10,)}),
+    "IN": ("91", "0", (10,), {"6": (10,), "7": (10,), "8": (10,), "9": (10,)}),
+    "BD": ("880", "0", (10,), {"1": (10,)}),
+    "AF": ("93", "0", (9,), {"7": (9,)}),
+    "LK": ("94", "0", (9,), {"7": (9,)}),
+    "NP": ("977", "0", (8, 10), {"9": (10,)}),
+    "IR": ("98", "0", (10,), {"9": (10,)}),
+    "AE": ("971", "0", (8, 9), {"5": (9,)}),
+    "SA": ("966", "0", (8, 9), {"5": (9,)}),
+    "QA": ("974", "", (8,), {"3": (8,), "5": (8,), "6": (8,), "7": (8,)}),
+    "KW": ("965", "", (8,), {"5": (8,), "6": (8,), "9": (8,)}),
+    "BH": ("973", "", (8,), {"3": (8,), "6": (8,)}),
+    "OM": ("968", "", (8,), {"7": (8,), "9": (8,)}),
+    "JO": ("962", "0", (8, 9), {"7": (9,)}),
+    "TR": ("90", "0", (10,), {"5": (10,)}),
+    "EG": ("20", "0", (9, 10), {"1": (10,)}),
+    "MA": ("212", "0", (9,), {"6": (9,), "7": (9,)}),
+    "NG": ("234", "0", (8, 10), {"7": (10,), "8": (10,), "9": (10,)}),
+    "KE": ("254", "0", (9,), {"1": (9,), "7": (9,)}),
+    "ZA": ("27", "0", (9,), {"6": (9,), "7": (9,), "8": (9,)}),
+    "GB": ("44", "0", (9, 10), {"7": (10,)}),
+    "DE": ("49", "0", (10, 11), {"15": (11,), "16": (10, 11), "17": (10, 11)}),
+    "FR": ("33", "0", (9,), {"6": (9,), "7": (9,)}),
+    "ES": ("34", "", (9,), {"6": (9,), "7": (9,)}),
+    "IT": ("39", "", (9, 10), {"3": (9, 10)}),
+    "NL": ("31", "0", (9,), {"6": (9,)}),
+    "US": ("1", "1", (10,), {}),
+    "CA": ("1", "1", (10,), {}),
+    "MX": ("52", "", (10,), {}),
+    "BR": ("55", "0", (10, 11), {}),
+    "CN": ("86", "0", (10, 11), {"1": (11,)}),
+    "ID": ("62", "0", (9, 10, 11, 12), {"8": (9, 10, 11, 12)}),
+    "MY": ("60", "0", (9, 10), {"1": (9, 10)}),
+    "PH": ("63", "0", (10,), {"9": (10,)}),
+    "AU": ("61", "0", (9,), {"4": (9,)}),
+}
+
+
+def _lengths(lengths):
+    """Regex for a run of ASCII digits of one of the given lengths (\\d would also match other scripts)."""
+    lengths = sorted(set(lengths))
+    if lengths == list(range(lengths[0], lengths[-1] + 1)):
+        return f"[0-9]{{{lengths[0]},{lengths[-1]}}}" if len(lengths) > 1 else f"[0-9]{{{lengths[0]}}}"
+    return "(?:" + "|".join(f"[0-9]{{{n}}}" for n in lengths) + ")"
+
+def _national(lengths, mobile):
+    """Regex for a national number: one starting with a mobile prefix has one of that prefix's
+    lengths, any other one a length of the country's."""
+    if not mobile:
+        return _lengths(lengths)
+    branches = [re.escape(p) + _lengths([n - len(p) for n in mobile_lengths]) for p, mobile_lengths in mobile.items()]
+    other = "(?!" + "|".join(map(re.escape, mobile)) + ")" + _lengths(lengths)
+    return "(?:" + "|".join(branches + [other]) + ")"
+
+def _mobile(lengths, mobile):
+    """Regex for a national mobile number (any national number if the mobile prefixes are not known)."""
+    if not mobile:
+        return _lengths(lengths)
+    return "(?:" + "|".join(re.escape(p) + _lengths([n - len(p) for n in mobile_lengths])
+                            for p, mobile_lengths in mobile.items()) + ")"
+
+def _trie_pattern(codes):
+    """One regex matching any {calling code: national number regexes}: code + a valid national number.
+
+    The codes are laid out as a trie, so each digit is looked at once instead of
+    trying every country in turn.
+    """
+    trie = {}
+    for code, patterns in codes.items():
+        node = trie
+        for digit in code:
+            node = node.setdefault(digit, {})
+        node[""] = patterns[0] if len(patterns) == 1 else "(?:" + "|".join(patterns) + ")"
+
+    def walk(node):
+        branches = [tail if digit == "" else digit + walk(tail) for digit, tail in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return walk(trie)
+
+
+class PhoneRules:
+    """RULES compiled for one default country."""
+
+    def __init__(self, country=DEFAULT_COUNTRY, rules=RULES):
+        country = country.upper()
+        if country not in rules:
+            raise ValueError(f"no phone number rules for country {country!r} (known: {', '.join(sorted(rules))})")
+        self.country = country
+        self.code, trunk, lengths, mobile = rules[country]
+        self.trunk = trunk
+
+        codes = {}
+        for cc, _, country_lengths, country_mobile in rules.values():
+            pattern = _national(country_lengths, country_mobile)
+            if pattern not in codes.setdefault(cc, []):
+                codes[cc].append(pattern)
+        national = _national(lengths, mobile)
+        bare = _mobile(lengths, mobile)
+        self.own = re.compile(f"{self.code}{national}")
+        self.international = re.compile(_trie_pattern(codes))
+        self.trunked = re.compile(f"{re.escape(trunk)}({national})") if trunk else None
+        self.bare = re.compile(bare)
+
+    def normalize(self, digits):
+        """International form of one digits-only number, or "" if it is not a valid number."""
+        if self.own.fullmatch(digits):
+            return digits
+        if digits.startswith("00") and self.international.fullmatch(digits, 2):
+            return digits[2:]
+        if self.trunked:
+            match = self.trunked.fullmatch(digits)
+            if match:
+                return self.code + match.group(1)
+        if self.bare.fullmatch(digits):
+            return self.code + digits
+        if self.international.fullmatch(digits):
+            return digits
+        return ""
+
+    def normalize_column(self, digits):
+        """normalize() over a pandas Series of digits-only strings, vectorized.
+
+        Each rule runs only over the numbers no earlier rule matched, so the common
+        shapes are settled by the first one or two passes.
+        """
+        import numpy as np
+        import pandas as pd
+
+        def matching(pattern):
+            return lambda rest: rest.str.fullmatch(pattern.pattern).to_numpy(dtype=bool)
+
+        def dialled(rest):
+            hit = np.array(rest.str.startswith("00"), dtype=bool)
+            hit[hit] = matching(self.international)(rest[hit].str[2:])
+            return hit
+
+        steps = [(matching(self.own), lambda s: s), (dialled, lambda s: s.str[2:])]
+        if self.trunked:
+            steps.append((matching(self.trunked), lambda s: self.code + s.str[len(self.trunk):]))
+        steps += [(matching(self.bare), lambda s: self.code + s), (matching(self.international), lambda s: s)]
+
+        out = np.full(len(digits), "", dtype=object)
+        rest = digits.reset_index(drop=True)     # positional index into out
+        for test, value in steps:
+            if rest.empty:
+                break
+            hit = test(rest)
+            out[rest.index[hit]] = value(rest[hit]).to_numpy(dtype=object)
+            rest = rest[~hit]
+        return pd.Series(out, index=digits.index, dtype=object)
+
+@functools.lru_cache(maxsize=None)
+def rules_for(country=None):
+    """Compiled PhoneRules for a country code such as "PK" (default: $WHATSAPP_COUNTRY or PK)."""
+    return PhoneRules(country or DEFAULT_COUNTRY)
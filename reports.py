@@ -0,0 +1,151 @@
+"""
+reports.py
+Campaign analytics: throughput over time, failure breakdowns, send latency and ETAs.
+
+Counts and rates come from the per-minute message_stats rollup (see
+contacts_db.py), which has a few rows per active minute however many messages
+a campaign holds; only the latency percentiles of one campaign read messages:
+its latest LATENCY_SAMPLES completions, straight from the (campaign_id,
+completed_at, duration_ms) index. The ETA divides what is still queued or in
+flight by the completion rate over the last RATE_WINDOW.
+
+    python sender_cli.py report
+    python sender_cli.py report --campaign 3 --bucket day --output march.json
+    python sender_cli.py report --campaign 3 --table throughput --output march.csv
+
+JSON exports hold the whole report; CSV exports one of its tables.
+"""
+
+import csv
+import datetime
+import json
+import math
+import time
+
+from contacts_db import STATS_BUCKET
+from metrics import percentile
+
+BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
+RATE_WINDOW = 3600          # seconds of recent completions behind the current rate and the ETA
+TABLES = ("campaigns", "throughput", "failures")
+
+
+def utc_offset():
+    """Seconds east of UTC of the local time zone, so buckets start on local hours and days."""
+    return int(datetime.datetime.now().astimezone().utcoffset().total_seconds())
+
+def _iso(epoch):
+    return datetime.datetime.fromtimestamp(epoch).isoformat(timespec="seconds") if epoch else None
+
+def _mean_ms(total_ms, timed):
+    return round(total_ms / timed, 1) if timed else None
+
+
+def throughput(store, campaign_id=None, bucket="hour", since=None):
+    """Sent and failed messages per bucket ("minute", "hour" or "day"), oldest first."""
+    seconds = BUCKETS[bucket]
+    return [{"start": _iso(start), "sent": sent, "failed": failed,
+             "per_minute": round((sent + failed) * 60 / seconds, 2), "avg_send_ms": _mean_ms(total_ms, timed)}
+            for start, sent, failed, total_ms, timed in store.throughput(campaign_id, seconds, utc_offset(), since)]
+
+def failures(store, campaign_id=None):
+    """Failed messages by error, most frequent first, with their share of all failures."""
+    rows = store.failure_breakdown(campaign_id)
+    total = sum(r[1] for r in rows) or 1
+    return [{"error": error or "unknown", "messages": messages, "share": round(messages / total, 4),
+             "attempts": attempts} for error, messages, attempts in rows]
+
+def latency(store, campaign_id, window=RATE_WINDOW):
+    """Percentiles of the send durations of a campaign's latest messages (up to LATENCY_SAMPLES)
+    completed in the last `window` seconds."""
+    durations = store.durations(campaign_id, since=time.time() - window)
+    if not durations:
+        return {"count": 0}
+    return {"count": len(durations), **{f"p{p}_ms": percentile(durations, p) for p in (50, 95, 99)},
+            "max_ms": durations[-1]}
+
+def eta(store, campaign_id, created_at=None, window=RATE_WINDOW):
+    """Remaining messages, the recent completion rate and the expected time to finish them."""
+    now = time.time()
+    queued, in_flight = store.open_counts(campaign_id)
+    start = max(now - window, created_at or 0)
+    done = store.completed_since(campaign_id, start)
+    # The rollup counts whole minutes, so a campaign only seconds old is measured over one.
+    rate = done / max(now - start, STATS_BUCKET)      # messages per second
+    remaining = queued + in_flight
+    if not remaining:
+        seconds = 0
+    else:
+        seconds = math.ceil(remaining / rate) if rate else None     # nothing completed lately: unknown
+    return {"queued": queued, "in_flight": in_flight, "per_minute": round(rate * 60, 2),
+            "eta_seconds": seconds, "finishes_at": _iso(now + seconds) if seconds is not None else None}
+
+def campaigns(store, campaign_id=None):
+    """One summary per campaign, newest first; unfinished campaigns get an ETA."""
+    summaries = []
+    for (cid, name, created_at, finished_at, sent, failed, attempts, total_ms, timed,
+         last_minute) in store.campaign_stats(campaign_id):
+        done = sent + failed
+        summary = {"id": cid, "name": name, "created_at": _iso(created_at), "finished_at": _iso(finished_at),
+                   "sent": sent, "failed": failed, "success_rate": round(sent / done, 4) if done else None,
+                   "attempts_per_message": round(attempts / done, 2) if done else None,
+                   "avg_send_ms": _mean_ms(total_ms, timed), "last_completed": _iso(last_minute)}
+        if finished_at is None:
+            summary.update(eta(store, cid, created_at))
+        summaries.append(summary)
+    return summaries
+
+def build_report(store, campaign_id=None, bucket="hour", since=None):
+    """Everything above in one dict, for one campaign or all of them."""
+    report = {"generated_at": _iso(time.time()), "campaign": campaign_id, "bucket": bucket,
+              "campaigns": campaigns(store, campaign_id),
+              "throughput": throughput(store, campaign_id, bucket, since),
+              "failures": failures(store, campaign_id)}
+    if campaign_id is not None:
+        report["latency"] = latency(store, campaign_id)
+    return report
+
+
+# ---------------- Export ----------------
+def export(report, path, table="campaigns"):
+    """Write the report as JSON, or one of its TABLES as CSV, chosen by the extension of `path`."""
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return
+    if not path.lower().endswith(".csv"):
+        raise ValueError(f"{path}: reports are exported as .json or .csv")
+    rows = report[table]
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_report(report, out=print):
+    """Readable summary of build_report() for the terminal."""
+    for c in report["campaigns"]:
+        line = f"#{c['id']} {c['name']}: {c['sent']} sent, {c['failed']} failed"
+        if c["success_rate"] is not None:
+            line += f" ({c['success_rate']:.1%} ok, {c['attempts_per_message']} attempts each)"
+        if c["avg_send_ms"] is not None:
+            line += f", {c['avg_send_ms']:.0f} ms per send"
+        if c["finished_at"]:
+            line += f" — finished {c['finished_at']}"
+        else:
+            line += f" — {c['queued'] + c['in_flight']} left at {c['per_minute']}/min"
+            if c["eta_seconds"]:
+                line += f", done in ~{datetime.timedelta(seconds=c['eta_seconds'])} ({c['finishes_at']})"
+        out(line)
+    if report["throughput"]:
+        out(f"\nThroughput per {report['bucket']}:")
+        for b in report["throughput"]:
+            out(f"  {b['start']}  {b['sent']:>7} sent  {b['failed']:>6} failed  {b['per_minute']:>8}/min")
+    if report["failures"]:
+        out("\nFailures:")
+        for f in report["failures"]:
+            out(f"  {f['error']:<20} {f['messages']:>7}  {f['share']:.1%}")
+    latency_ = report.get("latency")
+    if latency_ and latency_["count"]:
+        out(f"\nSend time, last {RATE_WINDOW // 60} min: p50 {latency_['p50_ms']} ms, p95 {latency_['p95_ms']} ms, "
+            f"p99 {latency_['p99_ms']} ms over {latency_['count']} sends")
@@ -0,0 +1,82 @@
+"""
+retry.py
+Failure classification and the delayed retry lane used by the sender pool.
+
+Every failed send is sorted into one of three kinds (see whatsapp_web.Failure):
+  transient   the chat did not open in time, a stale element, a slow network:
+              the contact goes into its session's RetryLane and is tried again
+              after an exponential backoff with jitter, between fresh sends
+  permanent   WhatsApp rejected the number: recorded as failed at once
+  session     logged out or the browser stopped answering: the session's
+              browser is restarted and the contact tried again
+A contact gives up after MAX_ATTEMPTS tries.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException, WebDriverException
+
+from whatsapp_web import BROWSER_GONE, PERMANENT, SESSION, TRANSIENT, Failure
+
+MAX_ATTEMPTS = 4            # tries per contact, the first one included
+RETRY_BASE = 30.0           # seconds before the first retry; doubled for every further one
+RETRY_CAP = 600.0           # longest backoff
+MAX_RESTARTS = 2            # browser restarts per session and campaign before it is given up
+
+ERROR = Failure("ERROR", TRANSIENT)     # an unexpected exception escaped the send
+
+# Messages of WebDriverExceptions raised once chromedriver has lost the browser
+_GONE = ("disconnected", "not reachable", "session deleted", "no such session", "target window already closed")
+
+
+def failure_from_error(error):
+    """The Failure standing for an exception raised by a send."""
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return BROWSER_GONE
+    if isinstance(error, WebDriverException) and any(m in str(error).lower() for m in _GONE):
+        return BROWSER_GONE
+    return ERROR
+
+def classify(result, alive=True):
+    """TRANSIENT, PERMANENT or SESSION for a falsy send result; None for a success."""
+    if result:
+        return None
+    if not alive:
+        return SESSION
+    return getattr(result, "kind", TRANSIENT)
+
+def backoff(attempt, base=RETRY_BASE, cap=RETRY_CAP, rng=random.random):
+    """Seconds to wait after failed attempt number `attempt` (1-based): doubling, capped,
+    then jittered into [delay/2, delay] so retries of one burst do not line up."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rng() * delay / 2
+
+
+class RetryLane:
+    """Contacts waiting for their retry, soonest first."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._order = itertools.count()     # keeps equal due times first-in, first-out
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, item, delay):
+        heapq.heappush(self._heap, (self.clock() + delay, next(self._order), item))
+
+    def pop_due(self):
+        """The next contact whose backoff is over, or None."""
+        if self._heap and self._heap[0][0] <= self.clock():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def drain(self):
+        """Take every waiting contact out, due or not."""
+        items = [item for _, _, item in sorted(self._heap)]
+        self._heap = []
+        return items
@@ -0,0 +1,317 @@
+"""
+sender_cli.py
+Command-line and daemon entry point for the sending engine (no Tk needed).
+
+    python sender_cli.py send contacts.xlsx --template-file message.txt --accounts 2
+    python sender_cli.py send march.xlsx april.csv --template "Hi {name}" --recent-days 30
+    python sender_cli.py send contacts.xlsx --template "Hi {name}" --dry-run
+    python sender_cli.py resume
+    python sender_cli.py daemon --inbox incoming --template-file message.txt
+
+`daemon` resumes unfinished campaigns, then watches an inbox folder and runs a
+campaign for every workbook dropped into it, moving finished files to
+<inbox>/done. A <workbook>.template.txt next to a file overrides the template.
+
+Several workers (processes or machines, each with its own accounts) can share
+one campaign:
+
+    python sender_cli.py coordinator --file contacts.xlsx --template-file message.txt --host 0.0.0.0
+    python sender_cli.py --accounts 2 worker --coordinator http://sender-1:8770     # on every machine
+
+`coordinator` queues the workbook, serves the queue over HTTP and writes the
+results back once every message is done. Workers on the machine holding the
+database can leave out --coordinator and use the file directly (`queue` fills
+it without sending).
+
+`report` prints sent/failed counts, throughput over time, failure reasons and
+an ETA per campaign, and exports them with --output report.json or report.csv
+(see reports.py).
+
+Only argparse and the standard library are loaded until a command runs, so
+--help answers at once; --dry-run checks the header and template before it
+reads any rows.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+from contacts_db import ContactStore, DB_FILE, FAILED, IN_FLIGHT, QUEUED, SENT
+from pacing import PER_MINUTE, PER_HOUR
+
+SOURCE_EXTENSIONS = (".xlsx", ".xlsm", ".csv")
+TEMPLATE_SUFFIX = ".template.txt"
+SETTLE_SECONDS = 5          # a dropped file must be this old before the daemon picks it up
+POLL_SECONDS = 30
+
+
+def read_template(args):
+    if args.template_file:
+        with open(args.template_file, encoding="utf-8") as f:
+            return f.read().strip()
+    return (args.template or "").strip()
+
+def source_options(args):
+    return {"sheet_name": args.sheet, "phone_column": args.phone_column,
+            "status_column": args.status_column or None, "status_value": args.status_value.lower(),
+            "name_column": args.name_column or None, "country": args.country, "recent_days": args.recent_days}
+
+def pacing(args):
+    return {"per_minute": args.per_minute, "per_hour": args.per_hour}
+
+def run_options(args):
+    return {"accounts": args.accounts, "pacing": pacing(args), "tabs": args.tabs}
+
+def make_engine(args):
+    from engine import SendEngine
+    store = ContactStore(args.db)
+    return store, SendEngine(store, log=print, headless=not args.visible, profile_base=args.profile_dir)
+
+
+# ---------------- Commands ----------------
+def cmd_send(args):
+    template = read_template(args)
+    options = source_options(args)
+    store, engine = make_engine(args)
+    try:
+        if not engine.validate(args.file, template, **options):
+            return 2
+        if args.dry_run:
+            totals = engine.preview(args.file, **options)
+            print(f"✔ {', '.join(args.file)}: {totals.get('rows', 0)} rows, {totals.get('matched', 0)} matched, "
+                  f"{totals.get('unique', 0)} unique valid numbers; {totals['already_sent']} already sent, "
+                  f"{totals['known_invalid']} known invalid, {totals['queued_elsewhere']} queued in other "
+                  f"campaigns; {totals['to_send']} would be sent.")
+            return 0
+        campaign_id = engine.start(args.file, template, **run_options(args), **options)
+        return 0 if campaign_id else 1
+    finally:
+        engine.close()
+        store.close()
+
+def cmd_resume(args):
+    store, engine = make_engine(args)
+    try:
+        return 0 if engine.resume(campaign_id=args.campaign, **run_options(args)) else 1
+    finally:
+        engine.close()
+        store.close()
+
+def cmd_queue(args):
+    store, engine = make_engine(args)
+    try:
+        campaign_id = engine.enqueue(args.file, read_template(args), **source_options(args))
+        if campaign_id:
+            print(f"📋 Campaign #{campaign_id} queued; start workers with: sender_cli.py worker --campaign {campaign_id}")
+        return 0 if campaign_id else 1
+    finally:
+        engine.close()
+        store.close()
+
+def cmd_worker(args):
+    from coordinator import RemoteStore
+    from engine import SendEngine, worker_owner
+
+    # Other processes write to the same queue, so nothing is held back for group commits.
+    store = RemoteStore(args.coordinator) if args.coordinator else ContactStore(args.db, commit_every=1)
+    engine = SendEngine(store, log=print, headless=not args.visible, profile_base=args.profile_dir,
+                        owner=worker_owner())
+    try:
+        # A coordinator closes the campaigns it serves and writes them back itself.
+        sent = engine.work(campaign_id=args.campaign, finish=not args.coordinator, **run_options(args))
+        return 0 if sent is not None else 1
+    except KeyboardInterrupt:
+        print("Stopped; this worker's messages go back to the queue when their leases run out.")
+        return 0
+    finally:
+        engine.close()
+        store.close()
+
+def cmd_coordinator(args):
+    from coordinator import start_coordinator
+    from engine import SendEngine
+
+    store = ContactStore(args.db, commit_every=1)
+    engine = SendEngine(store, log=print)
+    try:
+        campaign_id = args.campaign
+        if args.file:
+            campaign_id = engine.enqueue(args.file, read_template(args), **source_options(args))
+        elif campaign_id is None and store.unfinished_campaigns():
+            campaign_id = store.unfinished_campaigns()[0][0]
+        if not campaign_id:
+            print("[ERROR] Nothing to coordinate: give --file or an unfinished --campaign.")
+            return 1
+        server, url = start_coordinator(store, args.host, args.port, campaign_id)
+        print(f"🗂 Coordinating campaign #{campaign_id} at {url} (Ctrl+C to stop).")
+        while not store.finish_campaign(campaign_id) and store.campaign(campaign_id)["finished_at"] is None:
+            time.sleep(args.interval)
+            counts = store.campaign_counts(campaign_id)
+            workers = store.active_workers(campaign_id)
+            print(f"📊 {counts.get(SENT, 0)} sent, {counts.get(FAILED, 0)} failed, "
+                  f"{counts.get(IN_FLIGHT, 0)} in flight, {counts.get(QUEUED, 0)} queued — "
+                  f"{len(workers)} worker(s): {', '.join(w[0] for w in workers) or 'none'}")
+        # Give workers a moment to see the campaign finished before the queue goes away.
+        time.sleep(args.interval)
+        server.shutdown()
+        engine.write_back(campaign_id)
+        print("🎉 All messages sent!")
+        return 0
+    except KeyboardInterrupt:
+        print("Stopped; start the coordinator again with --campaign to continue.")
+        return 0
+    finally:
+        engine.close()
+        store.close()
+
+def pending_files(inbox):
+    now = time.time()
+    for entry in sorted(os.scandir(inbox), key=lambda e: e.name):
+        if (entry.is_file() and entry.name.lower().endswith(SOURCE_EXTENSIONS)
+                and not entry.name.startswith(("~$", ".")) and now - entry.stat().st_mtime >= SETTLE_SECONDS):
+            yield entry.path
+
+def move_done(path, done_dir):
+    """Move a finished workbook (and any journal or template next to it) out of the inbox."""
+    os.makedirs(done_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    for suffix in ("", ".status.jsonl", TEMPLATE_SUFFIX):
+        if os.path.exists(path + suffix):
+            shutil.move(path + suffix, os.path.join(done_dir, f"{stamp}-{os.path.basename(path)}{suffix}"))
+
+def cmd_daemon(args):
+    default_template = read_template(args)
+    options = source_options(args)
+    store, engine = make_engine(args)
+    done_dir = os.path.join(args.inbox, "done")
+    failed_dir = os.path.join(args.inbox, "failed")
+    os.makedirs(args.inbox, exist_ok=True)
+    print(f"👀 Watching {os.path.abspath(args.inbox)} every {args.interval}s (Ctrl+C to stop).")
+    try:
+        for campaign_id, _, _ in store.unfinished_campaigns():
+            engine.resume(campaign_id=campaign_id, **run_options(args))
+        while True:
+            for path in pending_files(args.inbox):
+                template = default_template
+                if os.path.exists(path + TEMPLATE_SUFFIX):
+                    with open(path + TEMPLATE_SUFFIX, encoding="utf-8") as f:
+                        template = f.read().strip()
+                print(f"📥 {path}")
+                ok = engine.validate(path, template, **options)
+                campaign_id = ok and engine.start(path, template, **run_options(args), **options)
+                move_done(path, done_dir if campaign_id else failed_dir)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped; unfinished work is picked up on the next start.")
+        return 0
+    finally:
+        engine.close()
+        store.close()
+
+
+def cmd_report(args):
+    from reports import build_report, export, print_report
+
+    store = ContactStore(args.db)
+    try:
+        since = time.time() - args.days * 86400 if args.days else None
+        report = build_report(store, campaign_id=args.campaign, bucket=args.bucket, since=since)
+    finally:
+        store.close()
+    if args.output:
+        try:
+            export(report, args.output, table=args.table)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] {e}")
+            return 1
+        print(f"💾 Report written to {args.output}.")
+    else:
+        print_report(report)
+    return 0
+
+
+# ---------------- Arguments ----------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Send WhatsApp Web campaigns from the command line.")
+    parser.add_argument("--db", default=DB_FILE, help="contacts/campaign database (default: %(default)s)")
+    parser.add_argument("--accounts", type=int, default=1, help="parallel Chrome profiles (default: 1)")
+    parser.add_argument("--per-minute", type=int, default=PER_MINUTE, help="max sends per minute per account")
+    parser.add_argument("--per-hour", type=int, default=PER_HOUR, help="max sends per hour per account")
+    parser.add_argument("--tabs", type=int, default=None,
+                        help="tabs per account: the next chats load in the others while one sends "
+                             "(default: $WHATSAPP_TABS or 1)")
+    parser.add_argument("--profile-dir", default=None, help="base Chrome profile directory")
+    parser.add_argument("--visible", action="store_true", help="always show the Chrome windows")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def source_args(p):
+        group = p.add_mutually_exclusive_group()
+        group.add_argument("--template", help="message text; {column} or {column|default} is filled in per contact")
+        group.add_argument("--template-file", help="file holding the message text")
+        p.add_argument("--sheet", default=None, help="sheet name (default: the active sheet)")
+        p.add_argument("--phone-column", default="number")
+        p.add_argument("--status-column", default="status", help="empty string to send to every row")
+        p.add_argument("--status-value", default="applied", help="rows whose status matches are sent")
+        p.add_argument("--name-column", default="name")
+        p.add_argument("--recent-days", type=float, default=None,
+                       help="skip numbers sent within this many days (default: every number ever sent; "
+                            "0 sends to all)")
+        p.add_argument("--country", default=None,
+                       help="country of numbers written without a calling code, e.g. PK or GB "
+                            "(default: $WHATSAPP_COUNTRY or PK)")
+
+    send = sub.add_parser("send", help="run a campaign from one or more workbooks")
+    send.add_argument("file", nargs="+", help=".xlsx, .xlsm or .csv files, merged into one campaign")
+    source_args(send)
+    send.add_argument("--dry-run", action="store_true", help="check and count, send nothing")
+    send.set_defaults(func=cmd_send)
+
+    resume = sub.add_parser("resume", help="continue an unfinished campaign")
+    resume.add_argument("--campaign", type=int, default=None, help="campaign id (default: the newest)")
+    resume.set_defaults(func=cmd_resume)
+
+    queue = sub.add_parser("queue", help="queue a workbook as a campaign for workers, send nothing")
+    queue.add_argument("file", nargs="+", help=".xlsx, .xlsm or .csv files, merged into one campaign")
+    source_args(queue)
+    queue.set_defaults(func=cmd_queue)
+
+    worker = sub.add_parser("worker", help="send a queued campaign alongside other workers")
+    worker.add_argument("--campaign", type=int, default=None, help="campaign id (default: the newest unfinished)")
+    worker.add_argument("--coordinator", default=None, help="coordinator URL (default: use --db directly)")
+    worker.set_defaults(func=cmd_worker)
+
+    coordinator = sub.add_parser("coordinator", help="serve a campaign's queue to workers on other machines")
+    coordinator.add_argument("--file", nargs="+", default=None, help="workbook(s) to queue first")
+    coordinator.add_argument("--campaign", type=int, default=None, help="campaign id (default: the newest unfinished)")
+    coordinator.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for every interface)")
+    coordinator.add_argument("--port", type=int, default=8770)
+    coordinator.add_argument("--interval", type=int, default=5, help="seconds between progress lines")
+    source_args(coordinator)
+    coordinator.set_defaults(func=cmd_coordinator)
+
+    report = sub.add_parser("report", help="throughput, failures and ETAs of campaigns")
+    report.add_argument("--campaign", type=int, default=None, help="campaign id (default: every campaign)")
+    report.add_argument("--bucket", choices=("minute", "hour", "day"), default="hour",
+                        help="throughput interval (default: %(default)s)")
+    report.add_argument("--days", type=float, default=None, help="only throughput of the last N days")
+    report.add_argument("--output", default=None, help="write to a .json file, or a .csv file holding --table")
+    report.add_argument("--table", choices=("campaigns", "throughput", "failures"), default="campaigns",
+                        help="table written to a .csv --output (default: %(default)s)")
+    report.set_defaults(func=cmd_report)
+
+    daemon = sub.add_parser("daemon", help="watch a folder and send every workbook dropped into it")
+    daemon.add_argument("--inbox", required=True)
+    daemon.add_argument("--interval", type=int, default=POLL_SECONDS, help="seconds between scans")
+    source_args(daemon)
+    daemon.set_defaults(func=cmd_daemon)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
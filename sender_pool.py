@@ -0,0 +1,283 @@
+"""
+sender_pool.py
+Runs several WhatsApp Web sessions (one Chrome profile / account each) in parallel.
+
+Contacts are sharded across sessions by phone number. Each session has its own
+bounded queue, so a streamed contact list never piles up in memory, and its own
+RateLimiter (see pacing.py). When a session's browser dies, the contact it was
+sending and everything still queued for it are handed to the remaining healthy
+sessions.
+
+Failed sends are sorted by retry.classify(): transient failures wait in the
+session's RetryLane and are sent again, between fresh contacts, once their
+backoff is over; session-level failures (logged out, browser gone) restart the
+session's browser up to MAX_RESTARTS times before its contacts are handed on.
+
+With tabs > 1 each session sends through a TabPipeline (see tab_pipeline.py):
+the worker takes the next tabs - 1 contacts off its queue early and their chats
+load in other tabs while the current contact is paced and sent.
+"""
+
+import collections
+import queue
+import threading
+import time
+import zlib
+
+from pacing import RateLimiter
+from metrics import METRICS
+from browser_session import SessionManager
+from retry import MAX_ATTEMPTS, MAX_RESTARTS, SESSION, TRANSIENT, RetryLane, backoff, classify, failure_from_error
+from tab_pipeline import TabPipeline
+from whatsapp_web import LOGGED_OUT, is_alive, send_message_to_number
+
+SHARD_DEPTH = 20        # contacts queued per session ahead of the one being sent
+
+
+class SenderSession:
+    def __init__(self, index, profile_dir, pacing):
+        self.index = index
+        self.name = f"Session {index + 1}"
+        self.profile_dir = profile_dir
+        self.driver = None
+        self.pipeline = None
+        self.alive = False
+        self.queue = queue.Queue(maxsize=SHARD_DEPTH)
+        self.retries = RetryLane()
+        self.restarts = 0
+        self.sent = 0
+        self.failed = 0
+        self.limiter = RateLimiter(**pacing)
+
+    def summary(self):
+        state = "running" if self.alive else "stopped"
+        waiting = f", {len(self.retries)} to retry" if self.retries else ""
+        return f"{self.name}: {self.sent} sent, {self.failed} failed{waiting} — {state}"
+
+
+class SenderPool:
+    """Parallel sender over N Chrome sessions.
+
+    Items passed to run() are (phone, encoded_message, context) tuples; on_result is
+    called as on_result(item, ok, seconds) once per item, `seconds` being how long its
+    last send took, and on_retry as on_retry(item, failure, delay) for every retry
+    scheduled, from worker threads, one call at a time.
+    """
+
+    def __init__(self, profile_dirs, log=print, on_progress=None, pacing=None,
+                 manager=None, tabs=1, max_attempts=MAX_ATTEMPTS, claim=None, send=send_message_to_number):
+        """`pacing` holds RateLimiter keyword arguments applied to every session; `tabs` is
+        the pipeline depth, the number of tabs each browser sends from (1 = no pipeline).
+        `claim(item)`, if given, is asked right before every send; an item it returns False
+        for is dropped without being sent or reported (another worker owns it now).
+
+        Browsers come from `manager` (a SessionManager) and are left running for it on
+        close(); without one the pool uses a private manager and quits its browsers.
+        """
+        self.sessions = [SenderSession(i, d, pacing or {}) for i, d in enumerate(profile_dirs)]
+        self.log = log
+        self.on_progress = on_progress or (lambda session: None)
+        self.manager = manager or SessionManager()
+        self._own_manager = manager is None
+        self.tabs = tabs
+        self.max_attempts = max_attempts
+        self.claim = claim
+        self.send = send
+        self.unsent = []
+        self._attempts = {}     # phone -> sends tried so far
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self._feeding_done = False
+
+    # ---------------- Startup ----------------
+    def start(self):
+        """Log every session in (in parallel). Returns the number of healthy sessions."""
+        threads = [threading.Thread(target=self._start_session, args=(s,), daemon=True) for s in self.sessions]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return len(self.healthy())
+
+    def _start_session(self, session):
+        driver = self.manager.acquire(session.profile_dir, log=self.log)
+        if not driver:
+            self.log(f"❌ {session.name}: could not start Chrome or log in.")
+            return
+        self._use_driver(session, driver)
+        session.alive = True
+        self.log(f"✅ {session.name} ready for sending…")
+        self.on_progress(session)
+
+    def _use_driver(self, session, driver):
+        session.driver = driver
+        session.pipeline = TabPipeline(driver, depth=self.tabs, log=self.log) if self.tabs > 1 else None
+
+    def healthy(self):
+        return [s for s in self.sessions if s.alive]
+
+    # ---------------- Scheduling ----------------
+    def run(self, items, on_result, on_retry=None):
+        """Send every item, sharded across healthy sessions; blocks until all are done."""
+        self._on_result = on_result
+        self._on_retry = on_retry or (lambda item, failure, delay: None)
+        self._feeding_done = False
+        workers = [threading.Thread(target=self._work, args=(s,), daemon=True) for s in self.healthy()]
+        for w in workers:
+            w.start()
+        for item in items:
+            with self._lock:
+                self._outstanding += 1
+            self._dispatch(item, preferred=zlib.crc32(str(item[0]).encode()))
+        self._feeding_done = True
+        for w in workers:
+            w.join()
+
+    def _dispatch(self, item, preferred=0):
+        """Queue an item on its shard's session, or the next healthy one."""
+        while True:
+            live = self.healthy()
+            if not live:
+                self._give_up(item)
+                return
+            session = live[preferred % len(live)]
+            try:
+                session.queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _drop(self, item):
+        self.log(f"⚠ {item[0]}: lease lost to another worker, not sending.")
+        with self._lock:
+            self._outstanding -= 1
+
+    def _give_up(self, item):
+        with self._lock:
+            self.unsent.append(item)
+            self._outstanding -= 1
+
+    def _finish(self, session, item, ok, seconds):
+        with self._lock:
+            if ok:
+                session.sent += 1
+            else:
+                session.failed += 1
+            self._on_result(item, ok, seconds)
+            self._outstanding -= 1
+        self.on_progress(session)
+
+    # ---------------- Workers ----------------
+    def _work(self, session):
+        ahead = collections.deque()     # contacts taken early, their chats loading in other tabs
+        while True:
+            # Retries whose backoff is over go first, then contacts already preloading, then the queue.
+            item = session.retries.pop_due() if session.alive else None
+            if item is None and ahead:
+                item = ahead.popleft()
+            elif item is None:
+                try:
+                    item = session.queue.get(timeout=0.2)
+                except queue.Empty:
+                    with self._lock:
+                        if self._feeding_done and self._outstanding == 0:
+                            return
+                    continue
+
+            if not session.alive:
+                # Contacts that reached a dead session's queue go to a healthy one.
+                if session.pipeline:
+                    session.pipeline.release(item[0])
+                self._dispatch(item, preferred=zlib.crc32(str(item[0]).encode()))
+                continue
+
+            if session.pipeline and session.pipeline.active:
+                self._fill_pipeline(session, item, ahead)
+            with METRICS.timer("pacing_wait"):
+                session.limiter.acquire()
+            phone, encoded, _ = item
+            if self.claim and not self.claim(item):
+                if session.pipeline:
+                    session.pipeline.release(phone)
+                self._drop(item)
+                continue
+            self.log(f"➡ {session.name}: sending to {phone}…")
+            send = session.pipeline.send if session.pipeline else self.send
+            with self._lock:
+                attempt = self._attempts[phone] = self._attempts.get(phone, 0) + 1
+            started = time.perf_counter()
+            try:
+                ok = send(session.driver, phone, encoded, self.log)
+            except Exception as e:
+                ok = failure_from_error(e)
+            seconds = time.perf_counter() - started
+            kind = classify(ok, alive=bool(ok) or is_alive(session.driver))
+            if kind == SESSION:
+                self._recover(session, item, ok)
+            elif kind == TRANSIENT and attempt < self.max_attempts:
+                self._retry_later(session, item, ok, attempt)
+            else:
+                self._finish(session, item, ok, seconds)
+
+    def _fill_pipeline(self, session, current, ahead):
+        """Start loading the current contact and the next ones, one tab each."""
+        pipeline = session.pipeline
+        pipeline.preload(current[0], current[1])
+        for item in ahead:
+            pipeline.preload(item[0], item[1])
+        while len(ahead) < pipeline.depth - 1:
+            try:
+                item = session.queue.get_nowait()
+            except queue.Empty:
+                return
+            ahead.append(item)
+            pipeline.preload(item[0], item[1])
+
+    def _retry_later(self, session, item, failure, attempt):
+        delay = backoff(attempt)
+        session.retries.push(item, delay)
+        METRICS.inc("retries")
+        self.log(f"↻ {session.name}: {item[0]} failed ({failure!r}, attempt {attempt} of {self.max_attempts}); "
+                 f"retrying in {delay:.0f}s.")
+        with self._lock:
+            self._on_retry(item, failure, delay)
+        self.on_progress(session)
+
+    def _recover(self, session, current, failure):
+        """Session-level failure: restart the browser and try the contact again, or hand everything on."""
+        if session.restarts < MAX_RESTARTS:
+            session.restarts += 1
+            METRICS.inc("session_restarts")
+            self.log(f"♻ {session.name}: {'logged out' if failure is LOGGED_OUT else 'browser not responding'}, "
+                     f"restarting it ({session.restarts} of {MAX_RESTARTS})…")
+            if session.pipeline:
+                session.pipeline.close()
+            driver = self.manager.restart(session.profile_dir, log=self.log, logged_out=failure is LOGGED_OUT)
+            if driver:
+                self._use_driver(session, driver)
+                session.retries.push(current, 0)
+                METRICS.inc("retries")
+                with self._lock:
+                    self._on_retry(current, failure, 0)
+                return
+        self._hand_off(session, current)
+
+    def _hand_off(self, session, current):
+        """Mark a session dead; its current, waiting and queued contacts move to healthy sessions."""
+        session.alive = False
+        METRICS.inc("session_deaths")
+        self.log(f"⚠ {session.name}: browser stopped responding, handing its contacts to other sessions.")
+        self.on_progress(session)
+        for item in [current] + session.retries.drain():
+            self._dispatch(item, preferred=zlib.crc32(str(item[0]).encode()))
+
+    def close(self):
+        """Release the sessions; browsers stay warm unless the pool owns its manager."""
+        for s in self.sessions:
+            if s.pipeline:
+                s.pipeline.close()
+                s.pipeline = None
+            s.driver = None
+            s.alive = False
+        if self._own_manager:
+            self.manager.shutdown()
@@ -0,0 +1,83 @@
+"""
+status_journal.py
+Append-only journal of per-row "WhatsApp Status" results.
+
+Each result is appended to a sidecar file next to the workbook
+(<workbook>.status.jsonl) and flushed straight away, so a crash of the app
+loses nothing already recorded. The checkpoint policy controls how often the
+journal is fsync'ed to disk (every N rows or T seconds, whichever comes
+first). When the campaign ends the journal is merged into the workbook in one
+pass; a journal left behind by a crash is merged on the next run.
+"""
+
+import json
+import os
+import time
+
+from contact_source import merge_statuses, STATUS_COLUMN
+
+JOURNAL_SUFFIX = ".status.jsonl"
+CHECKPOINT_ROWS = 25        # fsync after this many results...
+CHECKPOINT_SECONDS = 15     # ...or after this many seconds, whichever comes first
+
+
+class StatusJournal:
+    def __init__(self, workbook_path, checkpoint_rows=CHECKPOINT_ROWS, checkpoint_seconds=CHECKPOINT_SECONDS):
+        self.workbook_path = workbook_path
+        self.path = workbook_path + JOURNAL_SUFFIX
+        self.checkpoint_rows = checkpoint_rows
+        self.checkpoint_seconds = checkpoint_seconds
+        self.file = open(self.path, "a", encoding="utf-8")
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
+    def record(self, row, status, phone=""):
+        """Append one row's status; the line reaches the OS before this returns."""
+        entry = {"row": int(row), "status": status, "phone": phone, "ts": time.time()}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self._since_checkpoint += 1
+        if (self._since_checkpoint >= self.checkpoint_rows
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Force everything recorded so far onto disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self._since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
+    def merge(self, column=STATUS_COLUMN, sheet_name=None):
+        """Write the journal into the workbook and remove it. Returns the number of rows merged."""
+        self.checkpoint()
+        self.file.close()
+        return merge_journal(self.workbook_path, column=column, sheet_name=sheet_name)
+
+    def close(self):
+        if not self.file.closed:
+            self.checkpoint()
+            self.file.close()
+
+
+def read_journal(path):
+    """Return {row: status} from a journal file; later entries win, a torn last line is ignored."""
+    statuses = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            statuses[entry["row"]] = entry["status"]
+    return statuses
+
+def merge_journal(workbook_path, column=STATUS_COLUMN, sheet_name=None):
+    """Merge a (possibly left-over) journal into its workbook. Returns the number of rows merged."""
+    path = workbook_path + JOURNAL_SUFFIX
+    if not os.path.exists(path):
+        return 0
+    statuses = read_journal(path)
+    merge_statuses(workbook_path, statuses, column=column, sheet_name=sheet_name)
+    os.remove(path)
+    return len(statuses)
@@ -0,0 +1,205 @@
+"""
+tab_pipeline.py
+Pipelined sending over several tabs of one logged-in browser.
+
+With one tab every contact waits for its own chat to load. TabPipeline opens up
+to `depth` extra tabs (window handles) next to the session's app tab and starts
+loading the next contacts' chats in them (preload()) while the current one is
+sent and paced, so page-load time overlaps send time instead of adding to it.
+
+Each tab is checked before it is used: the handle must still be open, the page
+must answer, and WhatsApp must not have replaced it with its "open in another
+window" screen. A tab that fails TAB_FAILURES times in a row is closed; if
+WhatsApp refuses a second tab outright the pipeline closes every extra tab and
+the session keeps sending in its app tab, exactly as without a pipeline.
+Contacts whose chat is not preloaded are sent there too.
+"""
+
+import os
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from metrics import METRICS
+from whatsapp_web import (POLL, BROWSER_GONE, InvalidNumber, chat_box_or_invalid, report_invalid,
+                          send_message_to_number, send_url, submit_in_chat)
+
+PIPELINE_TABS = int(os.environ.get("WHATSAPP_TABS", "1"))   # tabs per browser; 1 = no pipeline
+TAB_FAILURES = 2        # consecutive failures after which a tab is closed
+# Shown by WhatsApp Web in a tab that lost the session to a newer one
+TAKEOVER = (By.XPATH, "//*[@role='button' or self::button][contains(., 'Use here')]")
+START_LOAD_JS = "window.location.href = arguments[0];"     # returns at once, unlike driver.get()
+
+
+class TabTakenOver(Exception):
+    pass
+
+
+class TabPipeline:
+    def __init__(self, driver, depth=PIPELINE_TABS, log=print, timeout=8):
+        self.driver = driver
+        self.depth = depth
+        self.log = log
+        self.timeout = timeout
+        self.home = driver.current_window_handle
+        self.free = []          # open tabs with nothing loading
+        self.loading = {}       # phone -> (handle, load started)
+        self.failures = {}      # handle -> consecutive failures
+
+    @property
+    def active(self):
+        return self.depth > 1
+
+    # ---------------- Tabs ----------------
+    def _open_tab(self):
+        if len(self.free) + len(self.loading) >= self.depth:
+            return None
+        try:
+            self.driver.switch_to.new_window("tab")
+            return self.driver.current_window_handle
+        except Exception as e:
+            self.log(f"⚠ Could not open another tab ({e}); sending without a pipeline.")
+            self.depth = 1
+            return None
+
+    def _healthy(self, handle):
+        """The tab is still open, answers and has not been taken over by another window."""
+        try:
+            if handle not in self.driver.window_handles:
+                return False
+            self.driver.switch_to.window(handle)
+            self.driver.execute_script("return document.readyState;")
+            return not self.driver.find_elements(*TAKEOVER)
+        except Exception:
+            return False
+
+    def _close(self, handle):
+        self.failures.pop(handle, None)
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception:
+            pass
+        try:
+            self.driver.switch_to.window(self.home)
+        except Exception:
+            pass
+
+    def _failed(self, handle):
+        METRICS.inc("tab_failures")
+        self.failures[handle] = self.failures.get(handle, 0) + 1
+        if self.failures[handle] >= TAB_FAILURES or not self._healthy(handle):
+            self._close(handle)
+        else:
+            self.free.append(handle)
+
+    def _taken_over(self):
+        """WhatsApp allows one tab per session here: fall back to the app tab for good."""
+        self.log("⚠ WhatsApp Web refused a second tab; continuing with one tab.")
+        self.depth = 1
+        self.close()
+        try:
+            for button in self.driver.find_elements(*TAKEOVER):
+                button.click()      # "Use here" hands the session back to the app tab
+        except Exception:
+            pass
+
+    # ---------------- Pipeline ----------------
+    def preload(self, phone, encoded_message):
+        """Start loading phone's chat in a background tab. Returns whether it is loading."""
+        if phone in self.loading:
+            return True
+        if not self.active:
+            return False
+        handle = self.free.pop() if self.free else self._open_tab()
+        if handle is None:
+            return False
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.execute_script(START_LOAD_JS, send_url(phone, encoded_message))
+        except Exception:
+            self._failed(handle)
+            return False
+        self.loading[phone] = (handle, time.perf_counter())
+        return True
+
+    def release(self, phone):
+        """phone will not be sent from here after all: its tab goes back to the free ones."""
+        entry = self.loading.pop(phone, None)
+        if entry is not None:
+            self.free.append(entry[0])
+
+    def send(self, driver, phone, encoded_message, log_callback, timings=None):
+        """Send to phone from its preloaded tab, or from the app tab if it has none.
+
+        Same contract and result as send_message_to_number(); the driver argument is
+        only there so the pipeline can stand in for it.
+        """
+        entry = self.loading.pop(phone, None)
+        if entry is None:
+            return self._send_home(phone, encoded_message, log_callback, timings)
+        handle, load_started = entry
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        timings["mode"] = "tab"
+        timings["tab_preload"] = started - load_started
+        try:
+            result = self._send_in_tab(handle, phone, log_callback, timings, started)
+        finally:
+            timings["total"] = time.perf_counter() - started
+            METRICS.observe_timings(timings, prefix="send_")
+        if result is None:
+            result = self._send_home(phone, encoded_message, log_callback, None)
+        return result
+
+    def _send_in_tab(self, handle, phone, log_callback, timings, started):
+        """Returns None if the tab could not be used, so the contact is retried from the app tab."""
+        ready = chat_box_or_invalid()
+
+        def tab_ready(driver):
+            if driver.find_elements(*TAKEOVER):
+                raise TabTakenOver()
+            return ready(driver)
+
+        try:
+            self.driver.switch_to.window(handle)
+            chat_box = WebDriverWait(self.driver, self.timeout, poll_frequency=POLL).until(tab_ready)
+        except InvalidNumber:
+            self.free.append(handle)
+            return report_invalid(self.driver, phone, log_callback, timings, started)
+        except TabTakenOver:
+            self._close(handle)
+            self._taken_over()
+            return None
+        except Exception:
+            self._failed(handle)
+            METRICS.inc("tab_fallbacks")
+            return None
+        opened = time.perf_counter()
+        timings["tab_wait"] = opened - started
+        timings["navigate"] = opened - started
+        self.failures.pop(handle, None)
+        METRICS.inc("tab_hits")
+        try:
+            return submit_in_chat(self.driver, chat_box, phone, log_callback, self.timeout, timings, opened)
+        finally:
+            self.free.append(handle)
+
+    def _send_home(self, phone, encoded_message, log_callback, timings):
+        try:
+            self.driver.switch_to.window(self.home)
+        except Exception:
+            return BROWSER_GONE
+        return send_message_to_number(self.driver, phone, encoded_message, log_callback,
+                                      timeout=self.timeout, timings=timings)
+
+    def close(self):
+        """Close every extra tab and go back to the app tab; the browser itself stays open."""
+        for handle in self.free + [h for h, _ in self.loading.values()]:
+            self._close(handle)
+        self.free, self.loading = [], {}
+        try:
+            self.driver.switch_to.window(self.home)
+        except Exception:
+            pass
@@ -0,0 +1,85 @@
+"""
+test_contact_source.py
+Reading contacts from where a resumed campaign left off, and writing statuses
+back into the source files (merge_statuses() in contact_source.py): the status
+column is added or reused, only the given rows change, and every other sheet
+and cell is kept.
+
+Run with: python -m pytest -q
+"""
+
+import openpyxl
+
+from contact_source import (ROW_COLUMN, ROW_SPAN, STATUS_COLUMN, ContactSource, MergedSource, merge_statuses,
+                            read_columns)
+
+
+def rows_of(path, sheet):
+    """A sheet's rows without trailing blank cells."""
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = [list(values) for values in wb[sheet].iter_rows(values_only=True)]
+        for row in rows:
+            while row and row[-1] is None:
+                row.pop()
+        return rows
+    finally:
+        wb.close()
+
+def test_merge_xlsx_adds_the_status_column_and_keeps_other_sheets(tmp_path):
+    path = str(tmp_path / "contacts.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Contacts"
+    ws.append(["number", "name"])
+    ws.append(["03001234567", "Ali"])
+    ws.append(["03007654321"])
+    ws["A5"] = "03111111111"
+    wb.create_sheet("Notes").append(["keep", 1])
+    wb.active = 1
+    wb.save(path)
+
+    merge_statuses(path, {2: "", 3: "Failed", 5: "Invalid"}, sheet_name="Contacts")
+    assert rows_of(path, "Contacts") == [["number", "name", STATUS_COLUMN],
+                                         ["03001234567", "Ali"],
+                                         ["03007654321", None, "Failed"],
+                                         [],
+                                         ["03111111111", None, "Invalid"]]
+    assert rows_of(path, "Notes") == [["keep", 1]]
+    assert openpyxl.load_workbook(path).active.title == "Notes"
+
+    # A second merge reuses the column and changes only its own rows.
+    merge_statuses(path, {2: "Failed"}, sheet_name="Contacts")
+    assert [row[2:] for row in rows_of(path, "Contacts")] == [[STATUS_COLUMN], ["Failed"], ["Failed"], [], ["Invalid"]]
+    assert read_columns(path, "Contacts") == ["number", "name", STATUS_COLUMN]
+
+def test_merge_csv_matches_the_header_behind_a_bom(tmp_path):
+    path = tmp_path / "contacts.csv"
+    path.write_bytes(f"\ufeff{STATUS_COLUMN},number\r\n,03001234567\r\n,03007654321\r\n".encode("utf-8"))
+    merge_statuses(str(path), {3: "Failed"})
+    assert read_columns(str(path)) == [STATUS_COLUMN, "number"]
+    assert path.read_text(encoding="utf-8-sig").splitlines() == [f"{STATUS_COLUMN},number", ",03001234567",
+                                                                 "Failed,03007654321"]
+
+def test_batches_skip_rows_up_to_after(tmp_path):
+    csv_path = tmp_path / "a.csv"
+    csv_path.write_text("number,name\n" + "".join(f"0300000000{i},n{i}\n" for i in range(8)), encoding="utf-8")
+    xlsx_path = str(tmp_path / "b.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(["number", "name"])
+    for i in range(8):
+        wb.active.append([f"0311000000{i}", f"m{i}"])
+    wb.save(xlsx_path)
+
+    def rows(source, after):
+        return [row for frame in source.batches(after=after) for row in frame[ROW_COLUMN].tolist()]
+
+    for path in (str(csv_path), xlsx_path):
+        assert rows(ContactSource(path, batch_size=3), 0) == list(range(2, 10))
+        assert rows(ContactSource(path, batch_size=3), 5) == list(range(6, 10))
+        frames = list(ContactSource(path, batch_size=3).batches(after=5))
+        assert frames[0]["name"].iloc[0][1:] == "4"
+        assert rows(ContactSource(path), 9) == []
+    merged = MergedSource([str(csv_path), xlsx_path], batch_size=3)
+    assert rows(merged, ROW_SPAN + 7) == [ROW_SPAN + 8, ROW_SPAN + 9]
+    assert rows(MergedSource([str(csv_path), xlsx_path]), 8) == [9] + [ROW_SPAN + r for r in range(2, 10)]
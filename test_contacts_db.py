@@ -0,0 +1,86 @@
+"""
+test_contacts_db.py
+Campaign queue semantics of ContactStore: leases, lease takeover between
+workers, renew_message() and owner-checked, idempotent complete_message().
+
+Run with: python -m pytest -q
+"""
+
+import pytest
+
+from contacts_db import FAILED, IN_FLIGHT, QUEUED, SENT, ContactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ContactStore(str(tmp_path / "contacts.db"), commit_every=1)
+    yield store
+    store.close()
+
+@pytest.fixture
+def campaign(store):
+    campaign_id = store.create_campaign("test", "test.xlsx", "Hi {name}")
+    store.enqueue_messages(campaign_id, [(f"92300000000{i}", f"n{i}", "hi", "hi", i + 2) for i in range(5)])
+    return campaign_id
+
+
+def test_lease_hands_out_each_message_once(store, campaign):
+    first = store.lease_messages(campaign, "a", limit=3)
+    second = store.lease_messages(campaign, "b", limit=3)
+    assert [m[0] for m in first] == [1, 2, 3]
+    assert [m[0] for m in second] == [4, 5]
+    assert store.lease_messages(campaign, "c") == []
+    assert store.campaign_counts(campaign) == {IN_FLIGHT: 5}
+
+def test_expired_lease_moves_to_another_worker(store, campaign):
+    (message_id, *_), = store.lease_messages(campaign, "a", limit=1, lease_seconds=-1)
+    # The owner itself never gets its own expired lease back as a new one...
+    assert message_id not in [m[0] for m in store.lease_messages(campaign, "a", limit=10)]
+    # ...but another worker does, and from then on the first owner may not send or complete it.
+    assert [m[0] for m in store.lease_messages(campaign, "b", limit=10)] == [message_id]
+    assert not store.renew_message(message_id, "a")
+    assert not store.complete_message(message_id, True, owner="a")
+    assert store.renew_message(message_id, "b")
+    assert store.complete_message(message_id, True, owner="b")
+
+def test_complete_message_is_idempotent_with_owner(store, campaign):
+    (message_id, *_), = store.lease_messages(campaign, "a", limit=1)
+    assert store.complete_message(message_id, False, error="timeout", owner="a", duration=1.2)
+    assert not store.complete_message(message_id, False, error="timeout", owner="a", duration=1.2)
+    row = store.conn.execute("SELECT state, attempts, last_error, duration_ms FROM messages WHERE id=?",
+                             (message_id,)).fetchone()
+    assert row == (FAILED, 1, "timeout", 1200)
+    assert store.failure_breakdown(campaign) == [("timeout", 1, 1)]
+
+def test_retry_keeps_the_lease_and_counts_the_attempt(store, campaign):
+    (message_id, *_), = store.lease_messages(campaign, "a", limit=1)
+    store.retry_message(message_id, "NOT_OPENED", delay=30)
+    assert store.lease_messages(campaign, "b", limit=10)[0][0] != message_id
+    assert store.complete_message(message_id, True, owner="a")
+    assert store.conn.execute("SELECT state, attempts FROM messages WHERE id=?", (message_id,)).fetchone() == (SENT, 2)
+
+def test_pending_counts_and_finish(store, campaign):
+    store.lease_messages(campaign, "a", limit=2)
+    assert store.pending_counts(campaign, "b") == (3, 2)
+    assert store.open_counts(campaign) == (3, 2)
+    assert not store.finish_campaign(campaign)
+    for message_id, *_ in store.lease_messages(campaign, "b", limit=10):
+        store.complete_message(message_id, True, owner="b")
+    store.requeue_owned(campaign, "a")
+    for message_id, *_ in store.lease_messages(campaign, "b", limit=10):
+        store.complete_message(message_id, True, owner="b")
+    store.mark_ingested(campaign)
+    assert store.campaign_counts(campaign) == {SENT: 5}
+    assert store.open_counts(campaign) == (0, 0)
+    assert store.finish_campaign(campaign)
+    assert not store.finish_campaign(campaign)      # already closed: only one caller writes it back
+
+def test_requeue_owned_returns_messages_to_the_queue(store, campaign):
+    store.lease_messages(campaign, "a", limit=4)
+    assert store.requeue_owned(campaign, "a") == 4
+    assert store.campaign_counts(campaign) == {QUEUED: 5}
+
+def test_re_enqueueing_a_phone_is_a_no_op(store, campaign):
+    store.enqueue_messages(campaign, [("923000000000", "n0", "hi", "hi", 2)])
+    assert store.campaign_counts(campaign) == {QUEUED: 5}
+    assert store.open_counts(campaign) == (5, 0)
@@ -0,0 +1,51 @@
+"""
+test_ingest.py
+clean_numbers() must return exactly series.apply(clean_phone).apply(normalize_number),
+checked on seeded random corpora (see bench_ingest.build_corpus) for several
+default countries, plus the batch de-duplication of prepare_contacts().
+
+Run with: python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_ingest import COUNTRIES, build_corpus
+from ingest import clean_numbers, clean_phone, normalize_number, prepare_contacts
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_clean_numbers_matches_reference(seed):
+    country = COUNTRIES[seed % len(COUNTRIES)]
+    corpus = build_corpus(2_000, seed)
+    expected = corpus.apply(clean_phone).apply(normalize_number, country=country)
+    actual = clean_numbers(corpus, country)
+    mismatches = [(v, e, a) for v, e, a in zip(corpus, expected, actual) if e != a]
+    assert not mismatches, mismatches[:10]
+    assert list(actual.index) == list(corpus.index)
+
+def test_clean_numbers_keeps_a_non_default_index():
+    numbers = pd.Series(["0300-1234567", None, "+44 7911 123456", 923001234567, "٠٣٠٠١٢٣٤٥٦٧"],
+                        index=[10, 3, 7, 1, 42], dtype=object)
+    out = clean_numbers(numbers, "PK")
+    assert out.to_dict() == {10: "923001234567", 3: "", 7: "447911123456", 1: "923001234567",
+                             42: "923001234567"}
+
+def test_clean_phone_handles_floats_and_blanks():
+    assert clean_phone(923001234567.0) == "923001234567"
+    assert clean_phone(np.nan) == ""
+    assert clean_phone(None) == ""
+    assert clean_phone("+92 (300) 123-4567") == "923001234567"
+
+def test_prepare_contacts_filters_and_deduplicates_across_batches():
+    seen = set()
+    first = pd.DataFrame({"number": ["03001234567", "923001234567", "bad", "03007654321"],
+                          "status": ["Applied", " applied ", "applied", "rejected"]})
+    contacts, stats = prepare_contacts(first, seen=seen)
+    assert contacts["number"].tolist() == ["923001234567"]
+    assert stats["rows"] == 4 and stats["matched"] == 3 and stats["valid"] == 2
+
+    second = pd.DataFrame({"number": ["+92 300 1234567", "03111111111"], "status": ["applied", "applied"]})
+    contacts, _ = prepare_contacts(second, seen=seen)
+    assert contacts["number"].tolist() == ["923111111111"]
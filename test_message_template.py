@@ -0,0 +1,72 @@
+"""
+test_message_template.py
+Template parsing, placeholder resolution and defaults (message_template.py),
+and that the grouped, cached render() matches filling every row on its own.
+
+Run with: python -m pytest -q
+"""
+
+import datetime
+import random
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from message_template import TemplateError, cell_text, compile_template, parse
+
+
+def test_parse_splits_literals_placeholders_and_braces():
+    assert parse("Hi {name|there}, {{x}} {city}!") == ["Hi ", ("name", "there"), ", {x} ", ("city", ""), "!"]
+    assert parse("no placeholders") == ["no placeholders"]
+    with pytest.raises(TemplateError):
+        parse("Hi { }")
+
+def test_compile_resolves_columns_case_and_space_insensitively():
+    template = compile_template("Hi {NAME}, {City|here}", [" name ", "city"])
+    assert template.columns == [" name ", "city"]
+
+def test_compile_reports_every_unknown_placeholder():
+    with pytest.raises(TemplateError) as error:
+        compile_template("{a} {b} {a} {name}", ["name"])
+    assert "{a}, {b}" in str(error.value)
+
+def test_aliases_and_optional_placeholders():
+    template = compile_template("Hi {name|friend}", ["Full Name"], aliases={"name": "Full Name"})
+    assert template.columns == ["Full Name"]
+    template = compile_template("Hi {name|friend}", ["number"], optional=("name",))
+    assert template.render(pd.DataFrame({"number": ["1", "2"]})) == (["Hi friend"] * 2,
+                                                                     [urllib.parse.quote("Hi friend")] * 2)
+
+def test_render_fills_defaults_for_blank_cells():
+    template = compile_template("Hi {name|there} from {city|your city}", ["name", "city"])
+    df = pd.DataFrame({"name": ["Ali", None, "", "Sara"], "city": ["Lahore", "Karachi", np.nan, None]})
+    bodies, encoded = template.render(df)
+    assert bodies == ["Hi Ali from Lahore", "Hi there from Karachi", "Hi there from your city",
+                      "Hi Sara from your city"]
+    assert encoded == [urllib.parse.quote(b) for b in bodies]
+
+def test_cell_text():
+    assert cell_text(3001234567.0) == "3001234567"
+    assert cell_text(2.5) == "2.5"
+    assert cell_text(datetime.datetime(2024, 5, 1)) == "2024-05-01"
+    assert cell_text("  padded ") == "padded"
+
+@pytest.mark.parametrize("seed", range(10))
+def test_grouped_render_matches_row_by_row_fill(seed):
+    rng = random.Random(seed)
+    n = 500
+    df = pd.DataFrame({
+        "name": [rng.choice(["Ali", "Sara", None, "", " Omar "]) for _ in range(n)],
+        "amount": [rng.choice([1.0, 2.5, 300.0, np.nan]) for _ in range(n)],
+        "city": [rng.choice(["Lahore", "Karachi", None]) for _ in range(n)],
+    })
+    template = compile_template("Dear {name|customer}, {amount|0} due in {city|town} {{ref}}", df.columns)
+    bodies, encoded = template.render(df)
+    expected = [template.fill({c: "" if pd.isna(v) else cell_text(v) for c, v in row.items()})
+                for row in df.to_dict("records")]
+    assert bodies == expected
+    assert encoded == [urllib.parse.quote(b) for b in expected]
+    # A second batch is served from the cache and gives the same result.
+    assert template.render(df) == (bodies, encoded)
@@ -0,0 +1,104 @@
+"""
+test_phone_numbers.py
+The per-country rule table (phone_numbers.py): every accepted form of a
+number, rejection of malformed ones (mobile numbers missing a digit
+included), and normalize_column() agreeing with normalize().
+
+Run with: python -m pytest -q
+"""
+
+import random
+
+import pandas as pd
+import pytest
+
+from phone_numbers import RULES, PhoneRules, rules_for
+
+VALID = [
+    ("PK", "923001234567", "923001234567"),
+    ("PK", "03001234567", "923001234567"),
+    ("PK", "3001234567", "923001234567"),
+    ("PK", "00923001234567", "923001234567"),
+    ("PK", "0211234567", "92211234567"),
+    ("PK", "447911123456", "447911123456"),
+    ("PK", "00447911123456", "447911123456"),
+    ("GB", "07911123456", "447911123456"),
+    ("GB", "7911123456", "447911123456"),
+    ("GB", "02071234567", "442071234567"),
+    ("GB", "923001234567", "923001234567"),
+    ("DE", "015123456789", "4915123456789"),
+    ("DE", "01701234567", "491701234567"),
+    ("US", "2025550123", "12025550123"),
+    ("US", "12025550123", "12025550123"),
+    ("AE", "0501234567", "971501234567"),
+    ("AE", "501234567", "971501234567"),
+    ("IN", "09876543210", "919876543210"),
+]
+
+MALFORMED = [
+    ("PK", "300123456"),         # mobile missing a digit
+    ("PK", "0300123456"),
+    ("PK", "92300123456"),
+    ("PK", "0092300123456"),
+    ("PK", "30012345678"),       # one digit too many
+    ("PK", "12345"),
+    ("PK", ""),
+    ("GB", "791112345"),
+    ("GB", "0791112345"),
+    ("GB", "44791112345"),
+    ("DE", "1512345678"),
+    ("US", "202555012"),
+    ("AE", "50123456"),
+]
+
+
+@pytest.mark.parametrize("country, digits, expected", VALID)
+def test_valid_numbers(country, digits, expected):
+    assert rules_for(country).normalize(digits) == expected
+
+@pytest.mark.parametrize("country, digits", MALFORMED)
+def test_malformed_numbers_are_rejected(country, digits):
+    assert rules_for(country).normalize(digits) == ""
+
+def test_unknown_country():
+    with pytest.raises(ValueError):
+        PhoneRules("XX")
+
+def test_calling_codes_are_prefix_free():
+    codes = {rule[0] for rule in RULES.values()}
+    assert not [(a, b) for a in codes for b in codes if a != b and b.startswith(a)]
+
+def test_mobile_lengths_fit_the_national_lengths():
+    for country, (_, _, lengths, mobile) in RULES.items():
+        for prefix, mobile_lengths in mobile.items():
+            assert set(mobile_lengths) <= set(lengths), (country, prefix)
+
+@pytest.mark.parametrize("country", sorted(RULES))
+def test_every_country_round_trips_its_own_numbers(country):
+    code, trunk, lengths, mobile = RULES[country]
+    rules = PhoneRules(country)
+    rng = random.Random(country)
+    for prefix, mobile_lengths in (mobile or {"2": lengths}).items():
+        for n in mobile_lengths:
+            national = prefix + "".join(rng.choice("0123456789") for _ in range(n - len(prefix)))
+            if not mobile and national.startswith(trunk or "-"):
+                continue
+            assert rules.normalize(code + national) == code + national
+            assert rules.normalize("00" + code + national) == code + national
+            if trunk:
+                assert rules.normalize(trunk + national) == code + national
+            if mobile:
+                assert rules.normalize(national) == code + national
+                if n - 1 not in mobile_lengths:
+                    assert rules.normalize(national[:-1]) != code + national[:-1]
+
+@pytest.mark.parametrize("country", ["PK", "GB", "US", "DE", "AE"])
+def test_normalize_column_matches_normalize(country):
+    rules = rules_for(country)
+    values = [v for _, v, _ in VALID] + [v for _, v in MALFORMED]
+    rng = random.Random(7)
+    values += ["".join(rng.choice("0123456789") for _ in range(rng.randint(5, 15))) for _ in range(2000)]
+    column = pd.Series(values, index=range(100, 100 + len(values)), dtype="str")
+    out = rules.normalize_column(column)
+    assert list(out.index) == list(column.index)
+    assert out.tolist() == [rules.normalize(v) for v in values]
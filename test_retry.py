@@ -0,0 +1,149 @@
+"""
+test_retry.py
+Failure classification, backoff and the RetryLane (retry.py), and how
+SenderPool acts on them with a fake send function and browser manager.
+
+Run with: python -m pytest -q
+"""
+
+import pytest
+from selenium.common.exceptions import (InvalidSessionIdException, StaleElementReferenceException,
+                                        WebDriverException)
+
+import sender_pool
+from metrics import METRICS
+from retry import ERROR, MAX_ATTEMPTS, PERMANENT, SESSION, TRANSIENT, RetryLane, backoff, classify, \
+    failure_from_error
+from whatsapp_web import BROWSER_GONE, INVALID, LOGGED_OUT, NOT_OPENED, NOT_SUBMITTED
+
+PACING = {"per_minute": 10 ** 9, "per_hour": 10 ** 9, "min_gap": 0, "jitter": 0}
+
+
+def test_classify():
+    assert classify(True) is None
+    assert classify(NOT_OPENED) == TRANSIENT
+    assert classify(NOT_SUBMITTED) == TRANSIENT
+    assert classify(INVALID) == PERMANENT
+    assert classify(LOGGED_OUT) == SESSION
+    assert classify(NOT_OPENED, alive=False) == SESSION
+    assert classify(False) == TRANSIENT
+
+def test_failure_from_error():
+    assert failure_from_error(InvalidSessionIdException()) is BROWSER_GONE
+    assert failure_from_error(WebDriverException("chrome not reachable")) is BROWSER_GONE
+    assert failure_from_error(StaleElementReferenceException("stale")) is ERROR
+    assert failure_from_error(ValueError()) is ERROR
+
+@pytest.mark.parametrize("attempt", range(1, 10))
+def test_backoff_doubles_within_jitter_and_cap(attempt):
+    delay = min(600.0, 30.0 * 2 ** (attempt - 1))
+    assert backoff(attempt, rng=lambda: 0.0) == delay / 2
+    assert backoff(attempt, rng=lambda: 1.0) == delay
+
+def test_retry_lane_orders_by_due_time_then_arrival():
+    now = [100.0]
+    lane = RetryLane(clock=lambda: now[0])
+    lane.push("late", 10)
+    lane.push("first", 0)
+    lane.push("second", 0)
+    assert len(lane) == 3
+    assert lane.pop_due() == "first"
+    assert lane.pop_due() == "second"
+    assert lane.pop_due() is None
+    now[0] += 10
+    assert lane.pop_due() == "late"
+    lane.push("a", 5)
+    assert lane.drain() == ["a"] and len(lane) == 0
+
+
+class Manager:
+    def __init__(self):
+        self.restarts = 0
+
+    def acquire(self, profile_dir, log=print):
+        return object()
+
+    def restart(self, profile_dir, log=print, logged_out=False):
+        self.restarts += 1
+        return object()
+
+    def shutdown(self):
+        pass
+
+def run_pool(results, monkeypatch, max_attempts=MAX_ATTEMPTS):
+    """Send one item per phone in `results` ({phone: [send results in order]}); returns
+    ({phone: final result}, [(phone, failure) retried], manager)."""
+    monkeypatch.setattr(sender_pool, "backoff", lambda attempt: 0)
+    monkeypatch.setattr(sender_pool, "is_alive", lambda driver: True)
+    results = {phone: list(r) for phone, r in results.items()}
+
+    def send(driver, phone, encoded, log):
+        result = results[phone].pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    manager = Manager()
+    pool = sender_pool.SenderPool(["p1"], log=lambda m: None, pacing=PACING, manager=manager,
+                                  max_attempts=max_attempts, send=send)
+    assert pool.start() == 1
+    final, retried = {}, []
+    pool.run([(phone, "hi", None) for phone in results],
+             on_result=lambda item, ok, seconds: final.__setitem__(item[0], ok),
+             on_retry=lambda item, failure, delay: retried.append((item[0], failure)))
+    pool.close()
+    return final, retried, manager
+
+def test_pool_retries_transient_failures_until_sent(monkeypatch):
+    METRICS.reset()
+    final, retried, _ = run_pool({"1": [NOT_OPENED, StaleElementReferenceException("x"), True]}, monkeypatch)
+    assert final == {"1": True}
+    assert retried == [("1", NOT_OPENED), ("1", ERROR)]
+    if METRICS.enabled:
+        assert METRICS.counters["retries"] == 2
+        assert "retries 2" in METRICS.live_line()
+
+def test_pool_gives_up_after_max_attempts(monkeypatch):
+    final, retried, _ = run_pool({"1": [NOT_OPENED] * 3}, monkeypatch, max_attempts=3)
+    assert final == {"1": NOT_OPENED} and len(retried) == 2
+
+def test_pool_does_not_retry_permanent_failures(monkeypatch):
+    final, retried, _ = run_pool({"1": [INVALID]}, monkeypatch)
+    assert final == {"1": INVALID} and retried == []
+
+def test_pool_restarts_the_session_when_logged_out(monkeypatch):
+    final, retried, manager = run_pool({"1": [LOGGED_OUT, True]}, monkeypatch)
+    assert final == {"1": True}
+    assert manager.restarts == 1 and retried == [("1", LOGGED_OUT)]
+
+class TabDriver:
+    """Just enough of a WebDriver for TabPipeline to open and load tabs."""
+    def __init__(self):
+        self.window_handles = ["home"]
+        self.current_window_handle = "home"
+        self.switch_to = self
+
+    def new_window(self, kind):
+        self.window_handles.append(f"tab{len(self.window_handles)}")
+        self.current_window_handle = self.window_handles[-1]
+
+    def window(self, handle):
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        pass
+
+def test_rejected_claims_free_their_preloaded_tabs(monkeypatch):
+    driver = TabDriver()
+    monkeypatch.setattr(Manager, "acquire", lambda self, profile_dir, log=print: driver)
+    pool = sender_pool.SenderPool(["p1"], log=lambda m: None, pacing=PACING, manager=Manager(), tabs=3,
+                                  claim=lambda item: False)
+    assert pool.start() == 1
+    pipeline = pool.sessions[0].pipeline
+    final = {}
+    pool.run([(str(phone), "hi", None) for phone in range(20)],
+             on_result=lambda item, ok, seconds: final.__setitem__(item[0], ok))
+    assert final == {}
+    assert pipeline.loading == {} and len(driver.window_handles) == 1 + pipeline.depth
+    assert pipeline.active
+    pool.close()
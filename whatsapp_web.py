@@ -0,0 +1,322 @@
+"""
+whatsapp_web.py
+Chrome/WhatsApp Web helpers used by the GUI and the sender pool.
+
+WHATSAPP_URL can be pointed at a local stand-in (see fake_whatsapp.py) through
+the environment variable of the same name. The chromedriver path resolved by
+webdriver_manager is cached in SESSION_CACHE so later launches skip resolution.
+"""
+
+import json
+import os
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
+
+from metrics import METRICS
+
+WHATSAPP_URL = os.environ.get("WHATSAPP_URL", "https://web.whatsapp.com")
+PROFILE_DIR = r"C:\chrome-whatsapp-profile"
+CHROME_BINARY = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+SESSION_CACHE = "session_cache.json"
+
+
+# ---------------- Cache ----------------
+def load_cache():
+    try:
+        with open(SESSION_CACHE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    tmp = SESSION_CACHE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, SESSION_CACHE)
+
+_driver_path = None
+cache_lock = threading.Lock()     # held around read-modify-write of SESSION_CACHE
+
+def chromedriver_path():
+    """Resolved chromedriver path, from memory, then the on-disk cache, then webdriver_manager."""
+    global _driver_path
+    if _driver_path and os.path.exists(_driver_path):
+        return _driver_path
+    with cache_lock:
+        cache = load_cache()
+        path = cache.get("chromedriver")
+        if not path or not os.path.exists(path):
+            path = ChromeDriverManager().install()
+            cache["chromedriver"] = path
+            save_cache(cache)
+        _driver_path = path
+    return path
+
+def forget_chromedriver():
+    """Drop the cached path, e.g. after Chrome updated and the old driver no longer matches."""
+    global _driver_path
+    with cache_lock:
+        _driver_path = None
+        cache = load_cache()
+        if cache.pop("chromedriver", None):
+            save_cache(cache)
+
+
+# ---------------- Driver ----------------
+def profile_dirs(count, base=PROFILE_DIR):
+    """One Chrome profile per account; the first keeps the original profile path."""
+    return [base if i == 0 else f"{base}-{i + 1}" for i in range(count)]
+
+def init_driver(headless=False, profile_dir=PROFILE_DIR):
+    options = webdriver.ChromeOptions()
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument("--start-maximized")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    if os.path.exists(CHROME_BINARY):
+        options.binary_location = CHROME_BINARY
+
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+
+    for attempt in range(2):
+        try:
+            driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+            driver.get(WHATSAPP_URL)
+            return driver
+        except Exception as e:
+            if attempt == 0:
+                forget_chromedriver()  # retry once with a freshly resolved driver
+                continue
+            print("[ERROR] Failed to start Chrome:", e)
+            return None
+
+def wait_for_login(driver, timeout=60):
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true']"))
+        )
+        return True
+    except:
+        return False
+
+def is_alive(driver):
+    """True while the browser behind `driver` still answers."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+# ---------------- WhatsApp ----------------
+CHAT_BOX = (By.XPATH, "//div[@contenteditable='true' and @data-tab='10']")
+SEND_ICON = (By.XPATH, "//span[@data-icon='send']")
+OUT_BUBBLE = (By.CSS_SELECTOR, "div.message-out")
+# "Phone number shared via url is invalid." popup shown for numbers not on WhatsApp
+INVALID_DIALOG = (By.XPATH, "//div[@data-animate-modal-popup='true'][contains(., 'invalid')]")
+INVALID_DIALOG_OK = (By.XPATH, ".//div[@role='button']")
+LOGIN_QR = (By.CSS_SELECTOR, "div[data-ref], canvas[aria-label*='Scan']")     # shown once logged out
+POLL = 0.05             # DOM polling interval for the waits below (WebDriverWait defaults to 0.5s)
+CONFIRM_TIMEOUT = 3     # how long ENTER gets to take effect before the send button is clicked
+
+# Failure kinds: worth retrying later, never worth retrying, or the browser session itself is broken.
+TRANSIENT, PERMANENT, SESSION = "transient", "permanent", "session"
+
+class Failure:
+    """Falsy result of send_message_to_number(): why the message did not go out."""
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return self.name
+
+INVALID = Failure("INVALID", PERMANENT)            # WhatsApp says the number is not on WhatsApp
+NOT_OPENED = Failure("NOT_OPENED", TRANSIENT)      # the chat did not open in time
+NOT_SUBMITTED = Failure("NOT_SUBMITTED", TRANSIENT)  # the chat opened but the message could not be submitted
+LOGGED_OUT = Failure("LOGGED_OUT", SESSION)        # WhatsApp Web shows its QR login screen
+BROWSER_GONE = Failure("BROWSER_GONE", SESSION)    # the browser or its window stopped answering
+
+class InvalidNumber(Exception):
+    pass
+
+def chat_box_or_invalid(previous_box=None, previous_dialogs=()):
+    """Wait condition: a usable (new) chat box, or raise InvalidNumber as soon as a new invalid-number popup shows."""
+    def check(driver):
+        dialogs = driver.find_elements(*INVALID_DIALOG)
+        if any(d not in previous_dialogs for d in dialogs):
+            raise InvalidNumber()
+        boxes = driver.find_elements(*CHAT_BOX)
+        if boxes and (previous_box is None or boxes[0] != previous_box) and boxes[0].is_enabled() \
+                and boxes[0].is_displayed():
+            return boxes[0]
+        return False
+    return check
+
+def logged_out(driver):
+    try:
+        return bool(driver.find_elements(*LOGIN_QR))
+    except Exception:
+        return False
+
+def dismiss_invalid_dialog(driver):
+    try:
+        for dialog in driver.find_elements(*INVALID_DIALOG):
+            dialog.find_element(*INVALID_DIALOG_OK).click()
+    except Exception:
+        pass
+
+def message_went_out(bubbles_before):
+    """Wait condition: a new outgoing bubble appeared or the send icon is gone."""
+    def check(driver):
+        if len(driver.find_elements(*OUT_BUBBLE)) > bubbles_before:
+            return True
+        return not driver.find_elements(*SEND_ICON)
+    return check
+
+# In-app navigation: WhatsApp Web opens links like this one, clicked inside the
+# already-loaded app, as a chat without reloading the page.
+IN_APP_LINK = "https://api.whatsapp.com/send?phone={phone}&text={text}"
+IN_APP_TIMEOUT = 4      # how long in-app navigation gets before falling back to a full page load
+NAV_MODE = os.environ.get("WHATSAPP_NAV_MODE", "in_app")    # "in_app" (with URL fallback) or "url"
+
+OPEN_LINK_JS = """
+const link = document.createElement("a");
+link.href = arguments[0];
+link.style.display = "none";
+document.body.appendChild(link);
+link.click();
+link.remove();
+"""
+
+def send_url(phone, encoded_message):
+    return f"{WHATSAPP_URL}/send?phone={phone}&text={encoded_message}"
+
+def open_chat_by_url(driver, phone, encoded_message, timeout, timings=None):
+    started = time.perf_counter()
+    driver.get(send_url(phone, encoded_message))
+    loaded = time.perf_counter()
+    if timings is not None:
+        timings["page_load"] = loaded - started
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL).until(chat_box_or_invalid())
+    finally:
+        if timings is not None:
+            timings["chat_box_wait"] = time.perf_counter() - loaded
+
+def open_chat_in_app(driver, phone, encoded_message, timeout=IN_APP_TIMEOUT):
+    """Open the chat from inside the loaded app; raises if no new chat box shows up in time
+    and InvalidNumber as soon as the invalid-number popup appears."""
+    previous = driver.find_elements(*CHAT_BOX)
+    previous_dialogs = driver.find_elements(*INVALID_DIALOG)
+    driver.execute_script(OPEN_LINK_JS, IN_APP_LINK.format(phone=phone, text=encoded_message))
+    condition = chat_box_or_invalid(previous[0] if previous else None, previous_dialogs)
+    return WebDriverWait(driver, timeout, poll_frequency=POLL).until(condition)
+
+def send_message_to_number(driver, phone, encoded_message, log_callback, timeout=8, mode=None, timings=None):
+    """Open the chat and send the prefilled message.
+
+    mode is "in_app" (navigate inside the loaded app, falling back to a full page load)
+    or "url" (always load the send URL). Returns True once sent, otherwise a falsy
+    Failure: INVALID as soon as WhatsApp's popup rejects the number, NOT_OPENED if
+    the chat did not open in time, NOT_SUBMITTED if the chat box went stale or the
+    browser failed while submitting, LOGGED_OUT if the login screen shows instead.
+    If `timings` is a dict it receives the seconds spent per stage ("in_app",
+    "page_load", "chat_box_wait", "navigate", "send", "send_button", "confirm",
+    "total") and the mode that opened the chat ("mode"). The stages are also
+    recorded in METRICS as send_<stage>.
+    """
+    mode = mode or NAV_MODE
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    try:
+        return _send(driver, phone, encoded_message, log_callback, timeout, mode, timings, started)
+    finally:
+        timings["total"] = time.perf_counter() - started
+        METRICS.observe_timings(timings, prefix="send_")
+
+def _send(driver, phone, encoded_message, log_callback, timeout, mode, timings, started):
+    chat_box = None
+    if mode == "in_app":
+        try:
+            chat_box = open_chat_in_app(driver, phone, encoded_message)
+            timings["mode"] = "in_app"
+        except InvalidNumber:
+            timings["mode"] = "in_app"
+            return report_invalid(driver, phone, log_callback, timings, started)
+        except:
+            chat_box = None
+            METRICS.inc("in_app_fallbacks")
+        timings["in_app"] = time.perf_counter() - started
+    if chat_box is None:
+        try:
+            chat_box = open_chat_by_url(driver, phone, encoded_message, timeout, timings)
+            timings["mode"] = "url"
+        except InvalidNumber:
+            timings["mode"] = "url"
+            return report_invalid(driver, phone, log_callback, timings, started)
+        except:
+            timings["navigate"] = time.perf_counter() - started
+            if logged_out(driver):
+                log_callback(f"❌ WhatsApp Web is logged out; could not send to {phone}")
+                return LOGGED_OUT
+            log_callback(f"⚠ Chat for {phone} did not open in time")
+            return NOT_OPENED
+    opened = time.perf_counter()
+    timings["navigate"] = opened - started
+    return submit_in_chat(driver, chat_box, phone, log_callback, timeout, timings, opened)
+
+def submit_in_chat(driver, chat_box, phone, log_callback, timeout, timings, opened):
+    """Send the message prefilled in an open chat's box and wait for it to go out.
+
+    Returns NOT_SUBMITTED if the box could not be clicked or typed into (e.g. a stale
+    element, a dead browser); once ENTER went through the message counts as sent.
+    """
+    try:
+        bubbles_before = len(driver.find_elements(*OUT_BUBBLE))
+        chat_box.click()
+        chat_box.send_keys(Keys.ENTER)
+    except Exception as e:
+        log_callback(f"⚠ Could not submit the message to {phone}: {type(e).__name__}")
+        return NOT_SUBMITTED
+    pressed = time.perf_counter()
+    timings["send"] = pressed - opened
+    try:
+        try:
+            WebDriverWait(driver, CONFIRM_TIMEOUT, poll_frequency=POLL).until(message_went_out(bubbles_before))
+        except:
+            # fallback send button
+            METRICS.inc("send_button_fallbacks")
+            fallback = time.perf_counter()
+            driver.find_element(*SEND_ICON).click()
+            WebDriverWait(driver, timeout, poll_frequency=POLL).until(message_went_out(bubbles_before))
+            timings["send_button"] = time.perf_counter() - fallback
+        log_callback(f"✔ Sent to {phone}")
+    except:
+        # The chat opened and the message was submitted, but delivery could not be confirmed.
+        METRICS.inc("unconfirmed")
+        log_callback(f"✔ Sent to {phone} (not confirmed)")
+    timings["confirm"] = time.perf_counter() - opened - timings.get("send", 0)
+    return True
+
+def report_invalid(driver, phone, log_callback, timings, started):
+    timings["navigate"] = time.perf_counter() - started
+    METRICS.inc("invalid")
+    dismiss_invalid_dialog(driver)
+    log_callback(f"❌ Invalid number (not on WhatsApp): {phone}")
+    return INVALID